@@ -0,0 +1,75 @@
+import numpy as np
+from sklearn.metrics import accuracy_score, classification_report # Métricas de avaliação
+from sklearn.model_selection import train_test_split # Função para dividir os dados
+from oficina.cache_binario import carregar_dados_codificados # CSV já limpo e codificado, mapeado do disco
+from oficina.artefatos import obter_ensemble # Modelos salvos em disco (só treina se o CSV ou a configuração mudar)
+from oficina.instrumentacao import configurar, etapa # Métricas por etapa (--metricas ou OFICINA_METRICAS)
+
+configurar() # Liga as métricas/perfil se pedido na linha de comando ou no ambiente
+
+# 1. Leitura dos dados (cache binário ao lado do CSV, montado na primeira execução ou quando o CSV muda)
+try:
+    dados = carregar_dados_codificados('oficina_Britt.csv')
+except FileNotFoundError:
+    print("Erro: O arquivo 'oficina_Britt.csv' não foi encontrado. Verifique o caminho.")
+    exit()
+
+# 2. Definição da variável alvo (alvo)
+alvo = dados.y_alvo
+
+# 3. Features na representação compacta do cache: 'Servico' como código inteiro e cada numérica no tipo mais
+# estreito; as colunas seguem o layout do pd.get_dummies
+
+# 4. Definição dos dados de treinamento e de teste
+with etapa('train_test_split', len(dados)):
+    indices_treino, indices_teste, alvo_treino, alvo_teste = train_test_split(
+        np.arange(len(dados)), alvo, test_size=0.3, random_state=1)
+# Matrizes esparsas (CSR): por linha, as cinco numéricas e o um da coluna do serviço
+X_treino = dados.matriz_esparsa(indices_treino, np.float64)
+X_teste = dados.matriz_esparsa(indices_teste, np.float64)
+
+# 5. Aprendizado do Ensemble (floresta aleatória + SVMs em subconjuntos, treinados em paralelo em todos os núcleos)
+# ou carregamento do ensemble já treinado com este CSV
+modelo_ensemble = obter_ensemble(X_treino, alvo_treino, dados.servicos, colunas=dados.colunas)['modelo']
+
+# 6. Mostrar desempenho
+with etapa('predict_ensemble', X_teste.shape[0]):
+    previsoes_no_teste = modelo_ensemble.predict(X_teste)
+print(f"Acurácia do Ensemble ({len(modelo_ensemble.arvores)} árvores + {len(modelo_ensemble.svms)} SVMs): "
+      f"{accuracy_score(alvo_teste, previsoes_no_teste):.2f}")
+print("-" * 30)
+
+# 6.1 Relatório de Classificação
+print("\nRelatório de Classificação do Ensemble:\n")
+classes = sorted(alvo.unique())
+with etapa('classification_report', len(alvo_teste)):
+    relatorio = classification_report(alvo_teste, previsoes_no_teste, labels=classes,
+                                      target_names=[str(c) for c in classes], zero_division=0)
+print(relatorio)
+print("-" * 30)
+
+# 7. Mostrar classificação para uma nova entrada do usuário
+print("\n--- Previsão para Nova Entrada (Ensemble) ---")
+try:
+    servicos_disponiveis = dados.servicos
+
+    servico_usuario = input(f"Digite o tipo de Serviço \n({', '.join(servicos_disponiveis)}): ").strip()
+    pecas_usuario = float(input("Digite o valor das peças (ex.: 150.0): "))
+    mao_obra_usuario = float(input("Digite o valor da mão de obra (ex.: 70.0): "))
+    tempo_usuario = float(input("Digite o tempo de serviço em horas (ex.: 2.5): "))
+    km_usuario = float(input("Digite a quilometragem do carro (ex.: 85000): "))
+    ano_usuario = int(input("Digite o ano de fabricação do carro (ex.: 2018): "))
+
+    # O ensemble prevê direto das colunas brutas: o voto suave é a média das probabilidades dos membros
+    with etapa('predict_ensemble_linha', 1):
+        probabilidades = modelo_ensemble.probabilidades(
+            [servico_usuario], [(pecas_usuario, mao_obra_usuario, tempo_usuario, km_usuario, ano_usuario)])[0]
+    print(f"\nPrevisão da Avaliação do Cliente para a nova entrada (Ensemble): "
+          f"{modelo_ensemble.classes_[probabilidades.argmax()]}")
+    for classe, probabilidade in zip(modelo_ensemble.classes_, probabilidades):
+        print(f"  nota {classe}: {probabilidade * 100:.1f}%")
+
+except ValueError:
+    print("\nErro: Entrada inválida. Por favor, verifique os tipos de dados e tente novamente.")
+except Exception as e:
+    print(f"\nOcorreu um erro inesperado: {e}")
@@ -1,38 +1,55 @@
-import pandas as pd
-import matplotlib.pyplot as plt # Lib para gráficos
-from sklearn.tree import plot_tree # Lib para plotar árvore de decisão
-from sklearn import tree, svm # Libs para modelos de Árvore de Decisão e SVM
-from sklearn.preprocessing import StandardScaler # Lib para escalonar features
+import numpy as np
 from sklearn.metrics import accuracy_score, classification_report # Libs para métricas de avaliação
-from sklearn.model_selection import train_test_split # Lib para dividir dados
+from oficina.dados import ARQUIVO_DADOS, escalonar
+from oficina.cache_binario import carregar_dados_codificados # CSV já limpo e codificado, mapeado do disco
+from oficina.artefatos import obter_arvore, obter_svm, obter_ensemble # Modelos salvos em disco (só treina se o CSV ou a configuração mudar)
+from oficina.codificador import CodificadorOficina, PreditorCodificado # Codificação de novas entradas sem get_dummies/reindex
+from oficina.svm_linear import compilar_se_linear # SVM linear com escalonador embutido nos pesos
+from oficina.arvore_compilada import compilar_arvore # Árvore em arrays planos, sem pandas na previsão
+from oficina.cache_previsoes import CachePrevisoes # Orçamentos repetidos não passam de novo pelo modelo
+from oficina.instrumentacao import configurar, etapa # Métricas por etapa (--metricas ou OFICINA_METRICAS)
+from oficina.treino_segundo_plano import TreinoSegundoPlano, TREINANDO # Treino dos modelos em processos separados
+from oficina.relatorio import (DIRETORIO_RELATORIO, PROFUNDIDADE_FIGURA, PROFUNDIDADE_TEXTO,
+                               salvar_arvore) # Árvore em PNG/texto, sem janela bloqueante
+
+configurar() # Liga as métricas/perfil se pedido na linha de comando ou no ambiente
 
 # --- 1. Carregamento + Teste de CSV + Preparação Inicial dos Dados ---
 try:
-    dataframe_oficina = pd.read_csv('oficina_Britt.csv') # Carrega os dados do arquivo CSV
+    # Lê o cache binário ao lado do CSV (oficina_Britt.cache/); na primeira execução, ou se o CSV mudar, ele é
+    # montado a partir do CSV (remove espaços extras das colunas e dos serviços e guarda cada coluna no tipo mais
+    # estreito, com 'Servico' como código inteiro)
+    dados_oficina = carregar_dados_codificados(ARQUIVO_DADOS)
 except FileNotFoundError:
-    print("Erro: O arquivo 'oficina_Britt.csv' não foi encontrado.")
+    print(f"Erro: O arquivo '{ARQUIVO_DADOS}' não foi encontrado.")
     exit() # Encerra se o arquivo não existir
 
-dataframe_oficina.columns = dataframe_oficina.columns.str.strip() # Remove espaços extras dos nomes das colunas
-
-dataframe_oficina['Servico'] = dataframe_oficina['Servico'].astype(str).str.strip() # Converte para string e remove espaços extras das linhas da tabela
-
 # Armazena serviços disponíveis
-lista_servicos_disponiveis = dataframe_oficina['Servico'].unique().tolist()
-
-# Define a variável alvo (y_alvo) e as features brutas (X_features_originais)
-y_alvo = dataframe_oficina['Avaliacao_Cliente']
-X_features_originais = dataframe_oficina.drop('Avaliacao_Cliente', axis=1)
-# Armazena nomes das colunas ANTES do get_dummies
-nomes_colunas_originais = X_features_originais.columns.tolist()
-
-# Transforma variável categórica 'Servico' em colunas numéricas
-X_features_codificadas = pd.get_dummies(X_features_originais.copy(), columns=['Servico'], prefix='Servico', dtype=int) #copy() cria copia do dataframe para não modificar documento
-#original(procedimento de segurança)
-
-# Divide os dados em conjuntos de treino e teste, estratificando pelo alvo
-X_treino, X_teste, y_treino, y_teste = train_test_split(
-    X_features_codificadas, y_alvo, test_size=0.3, random_state=1)
+lista_servicos_disponiveis = dados_oficina.servicos
+
+# Variável alvo (y_alvo) e nomes das colunas ANTES do get_dummies
+y_alvo = dados_oficina.y_alvo
+nomes_colunas_originais = dados_oficina.nomes_colunas_originais
+
+# Colunas no layout do get_dummies ('Servico' já transformado em colunas numéricas)
+colunas_features = dados_oficina.colunas
+
+# Divide os dados em conjuntos de treino e teste (só os índices das linhas) e monta as matrizes esparsas:
+# por linha, as cinco numéricas e o um do serviço, em vez da matriz densa do get_dummies
+indices_treino, indices_teste, y_treino, y_teste = dados_oficina.dividir()
+X_treino = dados_oficina.matriz_esparsa(indices_treino, np.float64)
+X_teste_matriz = dados_oficina.matriz_esparsa(indices_teste, np.float64)
+# Linhas brutas do teste, usadas para conferir os modos compilados contra o predict do sklearn
+servicos_teste, numericos_teste = dados_oficina.linhas_brutas(indices_teste)
+
+# Codificador compartilhado pela árvore e (com o escalonador embutido) pelo SVM
+codificador_features = CodificadorOficina(colunas_features)
+preditor_arvore = None
+preditor_svm = None
+# Cache LRU das novas classificações; esvazia sozinho se o preditor for trocado (modelo retreinado/recarregado)
+cache_previsoes_arvore = CachePrevisoes()
+cache_previsoes_svm = CachePrevisoes()
+cache_previsoes_ensemble = CachePrevisoes()
 
 # Variáveis para armazenar modelos e escalonador(Procedimento para evitar treinar várias vezes na mesma execução de código)
 modelo_arvore_decisao = None
@@ -40,10 +57,18 @@ modelo_svm_oficina = None
 escalonador_features = None
 X_treino_escalonado = None
 X_teste_escalonado = None
+modelo_ensemble = None # Floresta + SVMs em subconjuntos; prevê direto das colunas brutas (oficina/ensemble.py)
+
+# Árvore e SVM começam a treinar já, cada um em seu processo; o menu responde enquanto isso e, ao escolher
+# um modelo, só carrega o artefato que o processo de treino gravou em disco
+rotulos_modelos = {'arvore': 'Árvore de Decisão', 'svm': 'SVM', 'ensemble': 'Ensemble'}
+treino_segundo_plano = TreinoSegundoPlano(tuple(rotulos_modelos), ARQUIVO_DADOS).iniciar()
 
 # --- 2. Loop Principal do Menu Interativo ---
 while True:
-    print("\nMenu principal\nEscolha uma opção: \n1 - Árvore de Decisão\n2 - SVM\n3 - Encerrar programa")
+    print(f"\nModelos: {treino_segundo_plano.resumo(rotulos_modelos)}")
+    print("Menu principal\nEscolha uma opção: \n1 - Árvore de Decisão\n2 - SVM\n3 - Encerrar programa"
+          "\n4 - Cancelar treino em segundo plano\n5 - Ensemble (Floresta + SVMs)")
     try:
         opcao_menu_principal = int(input("Digite uma opção: "))
 
@@ -51,8 +76,21 @@ while True:
         if opcao_menu_principal == 1:
             #IF para verificar se o codigo ja foi treinado ou não, se foi ele ignora o treinamento.
             if modelo_arvore_decisao is None:
-                modelo_arvore_decisao = tree.DecisionTreeClassifier()
-                modelo_arvore_decisao.fit(X_treino, y_treino)
+                if treino_segundo_plano.situacao('arvore') == TREINANDO:
+                    print("A Árvore de Decisão ainda está treinando em segundo plano. Aguardando... (Ctrl+C volta ao menu)")
+                    try:
+                        treino_segundo_plano.aguardar('arvore')
+                    except KeyboardInterrupt:
+                        print("\nVoltando ao menu principal; o treino continua em segundo plano.")
+                        continue
+                # Treino concluído: carrega o artefato do disco; cancelado ou com falha: treina aqui mesmo
+                modelo_arvore_decisao = obter_arvore(dados_oficina.matriz_arvore(indices_treino), y_treino,
+                                                     lista_servicos_disponiveis, ARQUIVO_DADOS,
+                                                     colunas=colunas_features)['modelo']
+                # Árvore compilada só é usada se prever exatamente o mesmo que o sklearn no conjunto de teste
+                with etapa('compilar_arvore', len(servicos_teste)):
+                    preditor_arvore = (compilar_arvore(modelo_arvore_decisao, codificador_features, servicos_teste, numericos_teste)
+                                       or PreditorCodificado(modelo_arvore_decisao, codificador_features))
 
             while True: # Loop do submenu da Árvore de Decisão
                 print("\nSeção Árvore de Decisão\nEscolha uma opção:")
@@ -61,19 +99,24 @@ while True:
                     opcao_submenu_arvore = int(input("Digite uma opção: "))
 
                     if opcao_submenu_arvore == 1: # Mostrar Desempenho da árvore
-                        predicoes_arvore = modelo_arvore_decisao.predict(X_teste)
+                        with etapa('predict_arvore', X_teste_matriz.shape[0]):
+                            predicoes_arvore = modelo_arvore_decisao.predict(X_teste_matriz)
                         print(f"\nAcurácia (Árvore de Decisão): {(accuracy_score(y_teste, predicoes_arvore) * 100):.2f}%")
+                        estatisticas_cache = cache_previsoes_arvore.estatisticas()
+                        print(f"Cache de previsões: {estatisticas_cache['acertos']} acertos em "
+                              f"{estatisticas_cache['acertos'] + estatisticas_cache['faltas']} classificações")
                         print("-" * 30)
                     elif opcao_submenu_arvore == 2: # ________Mostrar Árvore_________
                         print("\n--- Visualização da Árvore de Decisão ---")
                         try:
-                            nomes_features_plot_arvore = X_treino.columns.tolist() # Separa os serviços em lista para mostrar servico + regra logica(Servico <= X)
-
-                            plt.figure(figsize=(20,10))
-                            plot_tree(modelo_arvore_decisao, feature_names=nomes_features_plot_arvore,
-                                      filled=True, rounded=True, proportion=False, fontsize=7)
-                            plt.title("Árvore de Decisão Treinada")
-                            plt.show()
+                            nomes_features_plot_arvore = list(colunas_features) # Separa os serviços em lista para mostrar servico + regra logica(Servico <= X)
+
+                            # Grava PNG (limitado em profundidade) e texto em vez de abrir janela: árvores grandes travavam o plt.show()
+                            caminho_png_arvore, caminho_txt_arvore = salvar_arvore(modelo_arvore_decisao, nomes_features_plot_arvore,
+                                                                                   DIRETORIO_RELATORIO)
+                            print(f"Árvore com profundidade {modelo_arvore_decisao.get_depth()} e {modelo_arvore_decisao.get_n_leaves()} folhas.")
+                            print(f"Figura (até a profundidade {PROFUNDIDADE_FIGURA}): {caminho_png_arvore}")
+                            print(f"Texto (até a profundidade {PROFUNDIDADE_TEXTO}): {caminho_txt_arvore}")
                         except Exception as erro_plot_arvore:
                             print(f"\nOcorreu um erro ao visualizar a árvore: {erro_plot_arvore}")
 
@@ -134,14 +177,11 @@ while True:
                                 print(f"Verifique 'nomes_colunas_originais': {nomes_colunas_originais}")
                                 continue
 
-                            valores_nova_entrada_arvore = [[servico_digitado_usuario, valor_pecas_usuario_arvore, valor_mao_obra_usuario_arvore, tempo_horas_usuario_arvore, km_carro_usuario_arvore, ano_carro_usuario_arvore]]
-                            dataframe_nova_entrada_arvore = pd.DataFrame(valores_nova_entrada_arvore, columns=nomes_colunas_originais)
-                            
-                            nova_entrada_codificada_arvore = pd.get_dummies(dataframe_nova_entrada_arvore, columns=['Servico'], prefix='Servico', dtype=int)
-                            nova_entrada_reindexada_arvore = nova_entrada_codificada_arvore.reindex(columns=X_treino.columns, fill_value=0)
-
-                            predicao_final_arvore = modelo_arvore_decisao.predict(nova_entrada_reindexada_arvore)
-                            print(f"\nPrevisão da Avaliação do Cliente (Árvore): {predicao_final_arvore[0]}")
+                            with etapa('prever_linha_arvore', 1):
+                                predicao_final_arvore = cache_previsoes_arvore.prever_linha(
+                                    preditor_arvore, servico_digitado_usuario, valor_pecas_usuario_arvore, valor_mao_obra_usuario_arvore,
+                                    tempo_horas_usuario_arvore, km_carro_usuario_arvore, ano_carro_usuario_arvore)
+                            print(f"\nPrevisão da Avaliação do Cliente (Árvore): {predicao_final_arvore}")
 
                         except ValueError:
                             print("\nErro: Entrada inválida para valor numérico. Tente a classificação novamente.")
@@ -158,11 +198,23 @@ while True:
         # --- Seção SVM ---
         elif opcao_menu_principal == 2:
             if X_treino_escalonado is None:
-                escalonador_features = StandardScaler()
-                X_treino_escalonado = escalonador_features.fit_transform(X_treino)
-                X_teste_escalonado = escalonador_features.transform(X_teste)
-                modelo_svm_oficina = svm.SVC(kernel='linear', C=1.0)
-                modelo_svm_oficina.fit(X_treino_escalonado, y_treino)
+                if treino_segundo_plano.situacao('svm') == TREINANDO:
+                    print("O SVM ainda está treinando em segundo plano. Aguardando... (Ctrl+C volta ao menu)")
+                    try:
+                        treino_segundo_plano.aguardar('svm')
+                    except KeyboardInterrupt:
+                        print("\nVoltando ao menu principal; o treino continua em segundo plano.")
+                        continue
+                artefato_svm = obter_svm(X_treino, y_treino, lista_servicos_disponiveis, ARQUIVO_DADOS, colunas=colunas_features)
+                modelo_svm_oficina, escalonador_features = artefato_svm['modelo'], artefato_svm['escalonador']
+                codificador_features_svm = codificador_features.com_escalonador(escalonador_features)
+                # Kernel linear: previsão compilada (pesos x entrada + votação); outros kernels usam o predict do sklearn
+                with etapa('compilar_svm'):
+                    preditor_svm = (compilar_se_linear(modelo_svm_oficina, codificador_features_svm)
+                                    or PreditorCodificado(modelo_svm_oficina, codificador_features_svm))
+                with etapa('escalonador_transform', X_treino.shape[0] + X_teste_matriz.shape[0]):
+                    X_treino_escalonado = escalonar(escalonador_features, X_treino)
+                    X_teste_escalonado = escalonar(escalonador_features, X_teste_matriz)
 
             while True: # Loop do submenu SVM
                 print("\nSeção SVM\nEscolha uma opção:")
@@ -171,12 +223,18 @@ while True:
                     opcao_submenu_svm = int(input("Digite uma opção: "))
 
                     if opcao_submenu_svm == 1: # Mostrar Desempenho
-                        predicoes_svm = modelo_svm_oficina.predict(X_teste_escalonado)
+                        with etapa('predict_svm', X_teste_escalonado.shape[0]):
+                            predicoes_svm = modelo_svm_oficina.predict(X_teste_escalonado)
                         print(f"\nAcurácia (SVM): {(accuracy_score(y_teste, predicoes_svm) * 100):.2f}%")
                         print("-" * 30)
                         print("\nRelatório de Classificação (SVM):\n")
                         rotulos_classes_relatorio_svm = [str(classe) for classe in sorted(y_alvo.unique())]
-                        print(classification_report(y_teste, predicoes_svm, target_names=rotulos_classes_relatorio_svm, zero_division=0))
+                        with etapa('classification_report', len(y_teste)):
+                            relatorio_svm = classification_report(y_teste, predicoes_svm, target_names=rotulos_classes_relatorio_svm, zero_division=0)
+                        print(relatorio_svm)
+                        estatisticas_cache = cache_previsoes_svm.estatisticas()
+                        print(f"Cache de previsões: {estatisticas_cache['acertos']} acertos em "
+                              f"{estatisticas_cache['acertos'] + estatisticas_cache['faltas']} classificações")
                         print("-" * 30)
 
                     elif opcao_submenu_svm == 2: # Fazer Nova Classificação
@@ -236,15 +294,12 @@ while True:
                                 print(f"Verifique 'nomes_colunas_originais': {nomes_colunas_originais}")
                                 continue
                                 
-                            valores_nova_entrada_svm = [[servico_digitado_usuario_svm, valor_pecas_usuario_svm, valor_mao_obra_usuario_svm, tempo_horas_usuario_svm, km_carro_usuario_svm, ano_carro_usuario_svm]]
-                            dataframe_nova_entrada_svm = pd.DataFrame(valores_nova_entrada_svm, columns=nomes_colunas_originais)
-                            
-                            nova_entrada_codificada_svm = pd.get_dummies(dataframe_nova_entrada_svm, columns=['Servico'], prefix='Servico', dtype=int)
-                            nova_entrada_reindexada_svm = nova_entrada_codificada_svm.reindex(columns=X_treino.columns, fill_value=0)
-                            nova_entrada_escalonada_svm = escalonador_features.transform(nova_entrada_reindexada_svm)
-
-                            predicao_final_svm = modelo_svm_oficina.predict(nova_entrada_escalonada_svm)
-                            print(f"\nPrevisão da Avaliação do Cliente (SVM): {predicao_final_svm[0]}")
+                            # Codifica, escalona e prevê em um único passo (equivale a get_dummies + reindex + transform + predict; entradas repetidas vêm do cache)
+                            with etapa('prever_linha_svm', 1):
+                                predicao_final_svm = cache_previsoes_svm.prever_linha(
+                                    preditor_svm, servico_digitado_usuario_svm, valor_pecas_usuario_svm, valor_mao_obra_usuario_svm,
+                                    tempo_horas_usuario_svm, km_carro_usuario_svm, ano_carro_usuario_svm)
+                            print(f"\nPrevisão da Avaliação do Cliente (SVM): {predicao_final_svm}")
 
                         except ValueError:
                             print("\nErro: Entrada inválida para valor numérico. Tente a classificação novamente.")
@@ -258,9 +313,130 @@ while True:
                 except ValueError:
                     print("Entrada inválida para opção do submenu. Digite um número.")
 
+        # --- Seção Ensemble ---
+        elif opcao_menu_principal == 5:
+            if modelo_ensemble is None:
+                if treino_segundo_plano.situacao('ensemble') == TREINANDO:
+                    print("O Ensemble ainda está treinando em segundo plano. Aguardando... (Ctrl+C volta ao menu)")
+                    try:
+                        treino_segundo_plano.aguardar('ensemble')
+                    except KeyboardInterrupt:
+                        print("\nVoltando ao menu principal; o treino continua em segundo plano.")
+                        continue
+                modelo_ensemble = obter_ensemble(X_treino, y_treino, lista_servicos_disponiveis, ARQUIVO_DADOS,
+                                                 colunas=colunas_features)['modelo']
+
+            while True: # Loop do submenu Ensemble
+                print("\nSeção Ensemble (Floresta + SVMs)\nEscolha uma opção:")
+                print("1 - Mostrar Desempenho\n2 - Fazer nova classificação\n3 - Voltar ao menu principal")
+                try:
+                    opcao_submenu_ensemble = int(input("Digite uma opção: "))
+
+                    if opcao_submenu_ensemble == 1: # Mostrar Desempenho
+                        with etapa('predict_ensemble', X_teste_matriz.shape[0]):
+                            predicoes_ensemble = modelo_ensemble.predict(X_teste_matriz)
+                        print(f"\nAcurácia (Ensemble): {(accuracy_score(y_teste, predicoes_ensemble) * 100):.2f}%")
+                        print(f"Membros: {len(modelo_ensemble.arvores)} árvores e {len(modelo_ensemble.svms)} SVMs")
+                        print("-" * 30)
+                        print("\nRelatório de Classificação (Ensemble):\n")
+                        rotulos_classes_relatorio_ensemble = [str(classe) for classe in sorted(y_alvo.unique())]
+                        with etapa('classification_report', len(y_teste)):
+                            relatorio_ensemble = classification_report(y_teste, predicoes_ensemble, labels=sorted(y_alvo.unique()),
+                                                                        target_names=rotulos_classes_relatorio_ensemble, zero_division=0)
+                        print(relatorio_ensemble)
+                        estatisticas_cache = cache_previsoes_ensemble.estatisticas()
+                        print(f"Cache de previsões: {estatisticas_cache['acertos']} acertos em "
+                              f"{estatisticas_cache['acertos'] + estatisticas_cache['faltas']} classificações")
+                        print("-" * 30)
+
+                    elif opcao_submenu_ensemble == 2: # Fazer Nova Classificação
+                        print("\n--- Previsão para Nova Entrada (Ensemble) ---")
+                        fluxo_classificacao_interrompido_ensemble = False
+                        try:
+                            servico_digitado_usuario_ensemble = ""
+                            while True: # Loop para obter entrada de serviço válida
+                                print(f"Serviços disponíveis: {', '.join(lista_servicos_disponiveis)}")
+                                if not lista_servicos_disponiveis:
+                                    print("Nenhum serviço disponível para classificação. Voltando ao menu anterior.")
+                                    fluxo_classificacao_interrompido_ensemble = True
+                                    break
+
+                                entrada_servico_usuario_temp_ensemble = input(f"Digite o tipo de Serviço (ou 'cancelar' para voltar): ").strip()
+
+                                if entrada_servico_usuario_temp_ensemble.lower() == 'cancelar':
+                                    print("Classificação cancelada.")
+                                    fluxo_classificacao_interrompido_ensemble = True
+                                    break
+
+                                nome_servico_correspondente_ensemble = None
+                                for item_servico_lista_ensemble in lista_servicos_disponiveis:
+                                    if entrada_servico_usuario_temp_ensemble.lower() == item_servico_lista_ensemble.lower():
+                                        nome_servico_correspondente_ensemble = item_servico_lista_ensemble
+                                        break
+
+                                if nome_servico_correspondente_ensemble is None:
+                                    print(f"Erro: Serviço '{entrada_servico_usuario_temp_ensemble}' inválido ou não encontrado. Por favor, tente novamente ou digite 'cancelar'.")
+                                else:
+                                    servico_digitado_usuario_ensemble = nome_servico_correspondente_ensemble
+                                    print(f"Serviço selecionado: {servico_digitado_usuario_ensemble}")
+                                    break
+
+                            if fluxo_classificacao_interrompido_ensemble:
+                                continue
+
+                            try:
+                                #input para usuario
+                                valor_pecas_usuario_ensemble = float(input(f"Valor das peças (para '{nomes_colunas_originais[1]}', ex.: 150.0): "))
+                                valor_mao_obra_usuario_ensemble = float(input(f"Valor da mão de obra (para '{nomes_colunas_originais[2]}', ex.: 70.0): "))
+                                tempo_horas_usuario_ensemble = float(input(f"Tempo de serviço em horas (para '{nomes_colunas_originais[3]}', ex.: 2.5): "))
+                                km_carro_usuario_ensemble = float(input(f"Quilometragem do carro (para '{nomes_colunas_originais[4]}', ex.: 85000): "))
+                                ano_carro_usuario_ensemble = int(input(f"Ano de fabricação (para '{nomes_colunas_originais[5]}', ex.: 2018): "))
+                            except IndexError:
+                                print("\nErro de configuração: O número de colunas em 'nomes_colunas_originais' não é o esperado.")
+                                print(f"Verifique 'nomes_colunas_originais': {nomes_colunas_originais}")
+                                continue
+
+                            entrada_ensemble = (servico_digitado_usuario_ensemble, valor_pecas_usuario_ensemble, valor_mao_obra_usuario_ensemble,
+                                                tempo_horas_usuario_ensemble, km_carro_usuario_ensemble, ano_carro_usuario_ensemble)
+                            with etapa('prever_linha_ensemble', 1):
+                                predicao_final_ensemble = cache_previsoes_ensemble.prever_linha(modelo_ensemble, *entrada_ensemble)
+                                probabilidades_ensemble = modelo_ensemble.probabilidades([entrada_ensemble[0]], [entrada_ensemble[1:]])[0]
+                            print(f"\nPrevisão da Avaliação do Cliente (Ensemble): {predicao_final_ensemble}")
+                            print("Voto suave dos membros: " + ", ".join(f"nota {classe}: {probabilidade * 100:.1f}%" for classe, probabilidade
+                                                                         in zip(modelo_ensemble.classes_, probabilidades_ensemble)))
+
+                        except ValueError:
+                            print("\nErro: Entrada inválida para valor numérico. Tente a classificação novamente.")
+                        except Exception as erro_classificacao_ensemble:
+                            print(f"\nErro inesperado durante a nova classificação (Ensemble): {erro_classificacao_ensemble}")
+
+                    elif opcao_submenu_ensemble == 3:
+                        break
+                    else:
+                        print("Opção inválida.")
+                except ValueError:
+                    print("Entrada inválida para opção do submenu. Digite um número.")
+
         elif opcao_menu_principal == 3:
+            treino_segundo_plano.encerrar() # Não espera treinos que ainda estejam rodando
             print("Programa encerrado.")
             break
+        elif opcao_menu_principal == 4: # Cancelar o treino de um modelo que não vai ser usado
+            modelos_em_treino = treino_segundo_plano.em_andamento()
+            if not modelos_em_treino:
+                print("Nenhum treino em andamento.")
+                continue
+            for indice_modelo, nome_modelo in enumerate(modelos_em_treino, start=1):
+                print(f"{indice_modelo} - {rotulos_modelos[nome_modelo]}")
+            opcao_cancelar = int(input("Qual treino cancelar? "))
+            if 1 <= opcao_cancelar <= len(modelos_em_treino):
+                nome_modelo = modelos_em_treino[opcao_cancelar - 1]
+                if treino_segundo_plano.cancelar(nome_modelo):
+                    print(f"Treino de {rotulos_modelos[nome_modelo]} cancelado; se o modelo for escolhido, ele é treinado na hora.")
+                else:
+                    print(f"O treino de {rotulos_modelos[nome_modelo]} já tinha terminado.")
+            else:
+                print("Opção inválida.")
         else:
             print("Opção inválida.")
     except ValueError:
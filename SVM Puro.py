@@ -1,41 +1,42 @@
-import pandas as pd
-from sklearn import svm
+import numpy as np
 from sklearn.metrics import accuracy_score, classification_report
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
+from oficina.cache_binario import carregar_dados_codificados # CSV já limpo e codificado, mapeado do disco
+from oficina.artefatos import obter_pipeline # Modelos salvos em disco (só treina se o CSV ou a configuração mudar)
+from oficina.pipeline import PipelineOficina, matriz_bruta # One-hot + escalonador + SVM em um único Pipeline
+from oficina.instrumentacao import configurar, etapa # Métricas por etapa (--metricas ou OFICINA_METRICAS)
 
-# 1. Leitura dos dados
+configurar() # Liga as métricas/perfil se pedido na linha de comando ou no ambiente
+
+# 1. Leitura dos dados (cache binário ao lado do CSV, montado na primeira execução ou quando o CSV muda)
 try:
-    dados = pd.read_csv('oficina_Britt.csv')
+    dados = carregar_dados_codificados('oficina_Britt.csv')
 except FileNotFoundError:
     print("Erro: O arquivo 'oficina_Britt.csv' não foi encontrado. Verifique o caminho.")
     exit()
 
-dados.columns = dados.columns.str.strip()
-
-# 2. Definição da variável alvo (alvo) e das features (features_originais)
-alvo = dados['Avaliacao_Cliente']
-features_originais = dados.drop('Avaliacao_Cliente', axis=1)
+# 2. Definição da variável alvo (alvo)
+alvo = dados.y_alvo
 
-# 3. Aplicação do pd.get_dummies na feature categórica 'Servico'
-features_processadas = pd.get_dummies(features_originais, columns=['Servico'], prefix='Servico', dtype=int)
+# 3. Só os índices das linhas do cache são divididos; o Pipeline (oficina/pipeline.py) recebe as seis colunas
+# brutas ('Servico' + numéricas) e faz ele mesmo o one-hot de 'Servico' e o escalonamento das numéricas
 
 # 4. Definição dos dados de treinamento e de teste
-X_treino, X_teste, alvo_treino, alvo_teste = train_test_split(
-    features_processadas, alvo, test_size=0.3, random_state=1)
-
-# 4.1 Escalonamento das features (IMPORTANTE para SVM)
-scaler = StandardScaler()
-X_treino_scaled = scaler.fit_transform(X_treino)
-X_teste_scaled = scaler.transform(X_teste)
-
-# 5. Aprendizado do modelo SVM
-
-modelo_svm = svm.SVC(kernel='linear', C=1.0)
-modelo_svm.fit(X_treino_scaled, alvo_treino)
+with etapa('train_test_split', len(dados)):
+    indices_treino, indices_teste, alvo_treino, alvo_teste = train_test_split(
+        np.arange(len(dados)), alvo, test_size=0.3, random_state=1)
+X_treino_bruto = matriz_bruta(*dados.linhas_brutas(indices_treino))
+servicos_teste, numericos_teste = dados.linhas_brutas(indices_teste) # Também conferem a previsão compilada
+X_teste_bruto = matriz_bruta(servicos_teste, numericos_teste)
+
+# 5. Aprendizado do pipeline SVM (ou carregamento do pipeline já treinado com este CSV)
+# O escalonador (IMPORTANTE para SVM) é ajustado no treino dentro do próprio pipeline
+svm_pipeline = PipelineOficina(obter_pipeline('svm', X_treino_bruto, alvo_treino, dados.servicos)['modelo'],
+                               servicos_teste, numericos_teste)
 
 # 6. Mostrar desempenho
-previsoes_no_teste_svm = modelo_svm.predict(X_teste_scaled)
+with etapa('predict_svm', len(X_teste_bruto)):
+    previsoes_no_teste_svm = svm_pipeline.predict(X_teste_bruto)
 print(f"Acurácia do modelo SVM: {accuracy_score(alvo_teste, previsoes_no_teste_svm):.2f}")
 print("-" * 30)
 
@@ -43,7 +44,9 @@ print("-" * 30)
 print("\nRelatório de Classificação SVM:\n")
 try:
     target_names = [str(c) for c in sorted(alvo.unique())] # Usar alvo.unique() do dataset original para pegar todos os nomes de classe possíveis
-    print(classification_report(alvo_teste, previsoes_no_teste_svm, target_names=target_names, zero_division=0))
+    with etapa('classification_report', len(alvo_teste)):
+        relatorio = classification_report(alvo_teste, previsoes_no_teste_svm, target_names=target_names, zero_division=0)
+    print(relatorio)
 except Exception as e:
     print(f"Não foi possível gerar nomes de classe para o relatório, usando padrão: {e}")
     print(classification_report(alvo_teste, previsoes_no_teste_svm, zero_division=0))
@@ -53,7 +56,7 @@ print("-" * 30)
 # 7. Mostrar classificação para uma nova entrada do usuário
 print("\n--- Previsão para Nova Entrada (SVM) ---")
 try:
-    servicos_disponiveis = features_originais['Servico'].unique()
+    servicos_disponiveis = dados.servicos
 
     servico_usuario = input(f"Digite o tipo de Serviço: \n ({', '.join(servicos_disponiveis)}): ")
     pecas_usuario = float(input("Digite o valor das peças (ex.: 150.0): "))
@@ -62,18 +65,11 @@ try:
     km_usuario = float(input("Digite a quilometragem do carro (ex.: 85000): "))
     ano_usuario = int(input("Digite o ano de fabricação do carro (ex.: 2018): "))
 
-    nova_entrada_df = pd.DataFrame([[
-        servico_usuario, pecas_usuario, mao_obra_usuario,
-        tempo_usuario, km_usuario, ano_usuario
-    ]], columns=features_originais.columns)
-
-    nova_entrada_processada_df = pd.get_dummies(nova_entrada_df, columns=['Servico'], prefix='Servico', dtype=int)
-    nova_entrada_reindexada_df = nova_entrada_processada_df.reindex(columns=X_treino.columns, fill_value=0)
-
-    nova_entrada_scaled = scaler.transform(nova_entrada_reindexada_df)
-
-    resultado_previsao_svm = modelo_svm.predict(nova_entrada_scaled)
-    print(f"\nPrevisão da Avaliação do Cliente para a nova entrada (SVM): {resultado_previsao_svm[0]}")
+    # A entrada vai crua para o pipeline, que aplica o one-hot, o escalonamento e a predição
+    with etapa('predict_svm_linha', 1):
+        resultado_previsao_svm = svm_pipeline.prever_linha(
+            servico_usuario, pecas_usuario, mao_obra_usuario, tempo_usuario, km_usuario, ano_usuario)
+    print(f"\nPrevisão da Avaliação do Cliente para a nova entrada (SVM): {resultado_previsao_svm}")
 
 except ValueError:
     print("\nErro: Entrada inválida. Por favor, verifique os tipos de dados e tente novamente.")
@@ -0,0 +1 @@
+# Benchmarks de desempenho. Execute a partir da raiz do repositório: python -m benchmarks.<nome>
@@ -0,0 +1,51 @@
+# Árvore compilada versus DecisionTreeClassifier.predict: confere os rótulos no X_teste e em um lote
+# sintético e mede a vazão de uma linha por vez e em lote.
+# Uso: python -m benchmarks.benchmark_arvore_compilada [linhas_lote]
+import sys
+
+import numpy as np
+import pandas as pd
+
+from oficina.dados import (ARQUIVO_DADOS, COLUNA_SERVICO, COLUNAS_ENTRADA, COLUNAS_NUMERICAS, carregar_dados,
+                           separar_alvo, codificar_features, dividir_treino_teste, treinar_arvore)
+from oficina.codificador import CodificadorOficina, PreditorCodificado
+from oficina.arvore_compilada import ArvoreCompilada
+from benchmarks.benchmark_svm_linear import gerar_lote, vazao_linha, vazao_lote
+
+
+def main(linhas_lote=200_000):
+    X_features_originais, y_alvo = separar_alvo(carregar_dados(ARQUIVO_DADOS))
+    X_treino, X_teste, y_treino, y_teste = dividir_treino_teste(codificar_features(X_features_originais), y_alvo)
+    modelo_arvore = treinar_arvore(X_treino, y_treino)
+    codificador = CodificadorOficina(X_treino.columns)
+    preditor_atual = PreditorCodificado(modelo_arvore, codificador)
+    compilada = ArvoreCompilada.do_modelo(modelo_arvore, codificador)
+
+    X_teste_bruto = X_features_originais.loc[X_teste.index]
+    servicos, numericos = gerar_lote(X_features_originais, linhas_lote)
+    divergencias_teste = compilada.divergencias(modelo_arvore, codificador, X_teste_bruto[COLUNA_SERVICO].to_numpy(),
+                                                X_teste_bruto[COLUNAS_NUMERICAS].to_numpy(np.float64))
+    divergencias_lote = compilada.divergencias(modelo_arvore, codificador, servicos[:20_000], numericos[:20_000])
+    print(f"Profundidade {compilada.profundidade}, {len(compilada.feature)} nós")
+    print(f"Divergências de rótulo: {divergencias_teste} no X_teste, {divergencias_lote} em 20000 linhas sintéticas")
+
+    entradas = list(X_features_originais[COLUNAS_ENTRADA].itertuples(index=False, name=None)) * 10
+
+    def caminho_pandas(entrada):
+        matriz = codificar_features(pd.DataFrame([entrada], columns=COLUNAS_ENTRADA), X_treino.columns).to_numpy(dtype=float)
+        return modelo_arvore.predict(matriz)
+
+    print("\nUma linha por vez (previsões/s):")
+    print(f"  get_dummies + reindex + predict        {vazao_linha(caminho_pandas, entradas[:200]):>12,.0f}")
+    print(f"  CodificadorOficina + predict           {vazao_linha(lambda e: preditor_atual.prever_linha(*e), entradas):>12,.0f}")
+    print(f"  ArvoreCompilada                        {vazao_linha(lambda e: compilada.prever_linha(*e), entradas):>12,.0f}")
+
+    print(f"\nLote de {linhas_lote} linhas (linhas/s):")
+    segundos = vazao_lote(lambda: preditor_atual.prever(servicos, numericos))
+    print(f"  CodificadorOficina + predict           {linhas_lote / segundos:>12,.0f}")
+    segundos = vazao_lote(lambda: compilada.prever(servicos, numericos))
+    print(f"  ArvoreCompilada (nível a nível)        {linhas_lote / segundos:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
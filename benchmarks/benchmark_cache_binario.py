@@ -0,0 +1,68 @@
+# Tempo de carga do CSV (read_csv + strip + get_dummies, como os scripts faziam) versus o cache binário
+# mapeado do disco (oficina/cache_binario.py) até a matriz esparsa de treino, em CSVs sintéticos gerados pelo
+# oficina/sintetico.py.
+# Uso: python -m benchmarks.benchmark_cache_binario [linhas ...]   (padrão: 10000 1000000 10000000)
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from oficina.dados import carregar_dados, separar_alvo, codificar_features
+from oficina.cache_binario import diretorio_cache, construir_cache, carregar_dados_codificados
+from oficina.sintetico import GeradorOficina
+
+LINHAS_PADRAO = (10_000, 1_000_000, 10_000_000)
+
+
+def memoria_fisica():
+    return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+
+
+def cronometrar(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return resultado, time.perf_counter() - inicio
+
+
+def carregar_csv(caminho):
+    X_features_originais, y_alvo = separar_alvo(carregar_dados(caminho))
+    return codificar_features(X_features_originais).to_numpy(dtype=float), y_alvo.to_numpy()
+
+
+def main(tamanhos=LINHAS_PADRAO):
+    gerador = GeradorOficina.do_csv()
+    print(f"{'linhas':>12}  {'CSV MB':>8}  {'cache MB':>8}  {'read_csv+dummies':>16}  {'montar cache':>12}"
+          f"  {'abrir cache':>11}  {'abrir+ler tudo':>14}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for n_linhas in tamanhos:
+            caminho = os.path.join(diretorio, f'sintetico_{n_linhas}.csv')
+            gerador.escrever_csv(caminho, n_linhas)
+
+            _, segundos_montar = cronometrar(lambda: construir_cache(caminho))
+            dados, segundos_abrir = cronometrar(lambda: carregar_dados_codificados(caminho))
+            # O mmap só lê as páginas quando são acessadas; monta a matriz esparsa de treino inteira para medir a
+            # leitura completa
+            _, segundos_ler = cronometrar(lambda: (float(dados.matriz_esparsa().sum()), float(np.sum(dados.y))))
+            # O caminho do CSV monta a matriz densa inteira na memória (e cópias intermediárias do pandas);
+            # quando ela não cabe, só o cache é medido (ele é lido do disco sob demanda)
+            tempo_csv = "sem memória"
+            if len(dados) * len(dados.colunas) * 8 * 4 < memoria_fisica():
+                (X_csv, y_csv), segundos_csv = cronometrar(lambda: carregar_csv(caminho))
+                # Preços e horas ficam em float32 no cache: iguais ao CSV até a precisão do float32
+                assert np.allclose(X_csv, dados.matriz_esparsa(dtype=np.float64).toarray(), rtol=1e-6, atol=0)
+                assert np.array_equal(y_csv, dados.y)
+                tempo_csv = f"{segundos_csv:.3f} s"
+                del X_csv, y_csv
+            del dados
+
+            pasta_cache = diretorio_cache(caminho)
+            mb_cache = sum(os.path.getsize(os.path.join(pasta_cache, nome)) for nome in os.listdir(pasta_cache)) / 2**20
+            print(f"{n_linhas:>12,}  {os.path.getsize(caminho) / 2**20:>8.1f}  {mb_cache:>8.1f}  {tempo_csv:>16}"
+                  f"  {segundos_montar:>10.3f} s  {segundos_abrir:>9.4f} s  {segundos_abrir + segundos_ler:>12.3f} s",
+                  flush=True)
+
+
+if __name__ == '__main__':
+    main([int(argumento) for argumento in sys.argv[1:]] or LINHAS_PADRAO)
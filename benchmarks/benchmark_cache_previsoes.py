@@ -0,0 +1,70 @@
+# Cache LRU de previsões (oficina/cache_previsoes.py) com uma mistura realista de orçamentos repetidos:
+# um conjunto fixo de orçamentos distintos gerados pelo oficina/sintetico.py, consultados com frequência
+# de Zipf (poucos orçamentos muito repetidos e uma cauda longa). Mede previsões/s sem e com cache, de
+# várias capacidades, e confere que o cache devolve o mesmo que o modelo.
+# Uso: python -m benchmarks.benchmark_cache_previsoes [consultas] [orcamentos_distintos]
+import sys
+import time
+
+import numpy as np
+
+from oficina.dados import (COLUNA_SERVICO, COLUNAS_NUMERICAS, PARAMETROS_ARVORE, PARAMETROS_SVM, dividir_treino_teste,
+                           treinar_arvore, treinar_svm)
+from oficina.cache_binario import carregar_dados_codificados
+from oficina.cache_previsoes import CachePrevisoes
+from oficina.codificador import CodificadorOficina, PreditorCodificado
+from oficina.svm_linear import SVMLinearCompilado
+from oficina.arvore_compilada import ArvoreCompilada
+from oficina.sintetico import GeradorOficina
+
+EXPOENTE_ZIPF = 1.1
+CAPACIDADES = (256, 1024, 4096)
+
+
+def consultas_zipf(n_consultas, n_orcamentos, semente=1):
+    gerador = np.random.default_rng(semente)
+    pesos = 1.0 / np.arange(1, n_orcamentos + 1) ** EXPOENTE_ZIPF
+    return gerador.choice(n_orcamentos, n_consultas, p=pesos / pesos.sum())
+
+
+def medir(prever_linha, entradas):
+    inicio = time.perf_counter()
+    previsoes = [prever_linha(*entrada) for entrada in entradas]
+    return previsoes, len(entradas) / (time.perf_counter() - inicio)
+
+
+def main(n_consultas=50_000, n_orcamentos=5_000):
+    dados = carregar_dados_codificados()
+    X_treino, X_teste, y_treino, y_teste = dividir_treino_teste(dados.X_features_codificadas, dados.y_alvo)
+    codificador = CodificadorOficina(X_treino.columns)
+    modelo_arvore = treinar_arvore(X_treino, y_treino, PARAMETROS_ARVORE)
+    modelo_svm, escalonador = treinar_svm(X_treino, y_treino, PARAMETROS_SVM)
+    codificador_svm = codificador.com_escalonador(escalonador)
+    preditores = {
+        'árvore (sklearn)': PreditorCodificado(modelo_arvore, codificador),
+        'árvore compilada': ArvoreCompilada.do_modelo(modelo_arvore, codificador),
+        'SVM (sklearn)': PreditorCodificado(modelo_svm, codificador_svm),
+        'SVM compilado': SVMLinearCompilado(modelo_svm, codificador_svm),
+    }
+
+    orcamentos = GeradorOficina.do_csv().gerar(n_orcamentos)
+    orcamentos = list(orcamentos[[COLUNA_SERVICO] + COLUNAS_NUMERICAS].itertuples(index=False, name=None))
+    entradas = [orcamentos[indice] for indice in consultas_zipf(n_consultas, n_orcamentos)]
+    print(f"{n_consultas:,} consultas sobre {n_orcamentos:,} orçamentos distintos (Zipf, s={EXPOENTE_ZIPF}); "
+          f"{len(set(entradas)):,} aparecem ao menos uma vez\n")
+
+    print(f"{'preditor':<18} {'sem cache':>12}" + ''.join(f" {f'cache {capacidade}':>12} {'acerto':>7}"
+                                                         for capacidade in CAPACIDADES))
+    for nome, preditor in preditores.items():
+        referencia, vazao_sem_cache = medir(preditor.prever_linha, entradas)
+        linha = f"{nome:<18} {vazao_sem_cache:>10,.0f}/s"
+        for capacidade in CAPACIDADES:
+            cache = CachePrevisoes(capacidade)
+            previsoes, vazao = medir(lambda *entrada: cache.prever_linha(preditor, *entrada), entradas)
+            assert previsoes == referencia
+            linha += f" {vazao:>10,.0f}/s {cache.estatisticas()['taxa_acerto'] * 100:>6.1f}%"
+        print(linha)
+
+
+if __name__ == '__main__':
+    main(*(int(argumento) for argumento in sys.argv[1:3]))
@@ -0,0 +1,61 @@
+# Latência por previsão: get_dummies + reindex (+ transform) versus o CodificadorOficina.
+# Uso: python -m benchmarks.benchmark_codificador [repeticoes]
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from oficina.dados import (ARQUIVO_DADOS, COLUNAS_ENTRADA, carregar_dados, separar_alvo, codificar_features,
+                           dividir_treino_teste, treinar_arvore, treinar_svm)
+from oficina.codificador import CodificadorOficina
+
+
+def medir(funcao, entradas, repeticoes):
+    # Retorna a mediana de microssegundos por chamada
+    tempos = []
+    for _ in range(repeticoes):
+        for entrada in entradas:
+            inicio = time.perf_counter()
+            funcao(entrada)
+            tempos.append(time.perf_counter() - inicio)
+    return np.median(tempos) * 1e6
+
+
+def main(repeticoes=20):
+    X_features_originais, y_alvo = separar_alvo(carregar_dados(ARQUIVO_DADOS))
+    X_treino, X_teste, y_treino, y_teste = dividir_treino_teste(codificar_features(X_features_originais), y_alvo)
+    modelo_arvore = treinar_arvore(X_treino, y_treino)
+    modelo_svm, escalonador = treinar_svm(X_treino, y_treino)
+    codificador = CodificadorOficina.ajustar(X_features_originais)
+    codificador_svm = codificador.com_escalonador(escalonador)
+    entradas = list(X_features_originais[COLUNAS_ENTRADA].itertuples(index=False, name=None))
+
+    # Confere que os dois caminhos geram exatamente a mesma matriz antes de medir
+    referencia = codificar_features(X_features_originais, X_treino.columns).to_numpy(dtype=float)
+    assert np.array_equal(codificador.codificar_dataframe(X_features_originais), referencia)
+    assert np.allclose(codificador_svm.codificar_dataframe(X_features_originais), escalonador.transform(referencia))
+
+    def pandas_arvore(entrada):
+        entrada_df = pd.DataFrame([entrada], columns=COLUNAS_ENTRADA)
+        return modelo_arvore.predict(codificar_features(entrada_df, X_treino.columns).to_numpy(dtype=float))
+
+    def pandas_svm(entrada):
+        entrada_df = pd.DataFrame([entrada], columns=COLUNAS_ENTRADA)
+        return modelo_svm.predict(escalonador.transform(codificar_features(entrada_df, X_treino.columns).to_numpy(dtype=float)))
+
+    buffer = codificador.novo_buffer()
+    resultados = {
+        'codificação pandas': medir(lambda e: codificar_features(pd.DataFrame([e], columns=COLUNAS_ENTRADA), X_treino.columns), entradas, repeticoes),
+        'codificação CodificadorOficina': medir(lambda e: codificador.codificar_linha(*e, saida=buffer), entradas, repeticoes),
+        'árvore pandas': medir(pandas_arvore, entradas, repeticoes),
+        'árvore CodificadorOficina': medir(lambda e: modelo_arvore.predict(codificador.codificar_linha(*e, saida=buffer)), entradas, repeticoes),
+        'SVM pandas + transform': medir(pandas_svm, entradas, repeticoes),
+        'SVM CodificadorOficina': medir(lambda e: modelo_svm.predict(codificador_svm.codificar_linha(*e, saida=buffer)), entradas, repeticoes),
+    }
+    for nome, microssegundos in resultados.items():
+        print(f"{nome:<35} {microssegundos:>10.1f} µs/previsão")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,110 @@
+# Pico de memória (RSS) do caminho antigo, read_csv + get_dummies + matriz densa float64, contra a representação
+# compacta (oficina/dados_compactos.py: código inteiro do serviço, numéricas em tipos estreitos e matriz CSR),
+# do CSV até o modelo treinado e o X_teste previsto, em CSVs sintéticos (oficina/sintetico.py) com cada vez mais
+# linhas e serviços. Como na suite_escala, cada caso roda em um subprocesso próprio e o pico de RSS é só dele;
+# 'acréscimo' desconta o RSS do processo já com as bibliotecas importadas.
+# Uso: python -m benchmarks.benchmark_dados_compactos [--linhas 100000 1000000] [--servicos 106 1000]
+#                                                      [--modelos arvore svm_aproximado]
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from oficina.dados import (carregar_dados, codificar_features, dividir_treino_teste, separar_alvo, treinar_arvore,
+                           treinar_svm_aproximado)
+from oficina.dados_compactos import ler_csv_compacto
+from oficina.sintetico import GeradorOficina
+from oficina.treino_em_blocos import pico_memoria_mb
+from benchmarks.suite_escala import memoria_fisica_mb, rodar_subprocesso
+
+LINHAS_PADRAO = (100_000, 1_000_000)
+SERVICOS_PADRAO = (106, 1_000)
+CAMINHOS = ('denso', 'compacto')
+TREINAR = {'arvore': treinar_arvore, 'svm_aproximado': treinar_svm_aproximado}
+
+
+def executar_caso(caminho_csv, caminho, nome_modelo):
+    # Roda no subprocesso: do CSV ao modelo treinado e à previsão do teste por um dos dois caminhos
+    rss_inicial = pico_memoria_mb()
+    inicio = time.perf_counter()
+    if caminho == 'denso':
+        X_features_originais, y_alvo = separar_alvo(carregar_dados(caminho_csv))
+        X_features_codificadas = codificar_features(X_features_originais)
+        del X_features_originais
+        X_treino, X_teste, y_treino, y_teste = dividir_treino_teste(X_features_codificadas, y_alvo)
+        X_treino, X_teste = X_treino.to_numpy(dtype=np.float64), X_teste.to_numpy(dtype=np.float64)
+        bytes_dados = X_features_codificadas.to_numpy().nbytes
+    else:
+        dados = ler_csv_compacto(caminho_csv)
+        indices_treino, indices_teste, y_treino, y_teste = dados.dividir()
+        # Como o menu: a árvore densifica a matriz float32 enquanto ela couber em LIMITE_ARVORE_DENSA
+        if nome_modelo == 'arvore':
+            X_treino, X_teste = dados.matriz_arvore(indices_treino), dados.matriz_esparsa(indices_teste, np.float32)
+        else:
+            X_treino, X_teste = dados.matriz_esparsa(indices_treino, np.float64), dados.matriz_esparsa(indices_teste, np.float64)
+        bytes_dados = dados.nbytes()
+    segundos_dados = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    modelo = TREINAR[nome_modelo](X_treino, y_treino)
+    acuracia = float(np.mean(modelo.predict(X_teste) == y_teste.to_numpy()))
+    return {
+        'dados_s': segundos_dados,
+        'treino_s': time.perf_counter() - inicio,
+        'dados_mb': bytes_dados / 2**20,
+        'acuracia': acuracia,
+        'rss_inicial_mb': rss_inicial,
+        'pico_rss_mb': pico_memoria_mb(),
+    }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Compara o pico de memória do get_dummies denso com a representação compacta.")
+    parser.add_argument('--linhas', type=int, nargs='+', default=list(LINHAS_PADRAO))
+    parser.add_argument('--servicos', type=int, nargs='+', default=list(SERVICOS_PADRAO))
+    parser.add_argument('--modelos', nargs='+', choices=tuple(TREINAR), default=['arvore'])
+    parser.add_argument('--tempo-limite', type=float, default=1800, help="Segundos por caso")
+    parser.add_argument('--semente', type=int, default=1)
+    parser.add_argument('--caso', nargs=3, metavar=('CSV', 'CAMINHO', 'MODELO'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argumentos)
+
+    if args.caso:
+        print(json.dumps(executar_caso(*args.caso)))
+        return 0
+
+    gerador_base = GeradorOficina.do_csv()
+    print(f"{'modelo':<14} {'linhas':>10} {'serviços':>8} {'caminho':<9} {'dados MB':>9} {'dados s':>8} {'treino s':>9}"
+          f" {'acurácia':>9} {'pico MB':>8} {'acréscimo MB':>13}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for n_servicos in args.servicos:
+            gerador = gerador_base.com_servicos(n_servicos, args.semente)
+            for n_linhas in args.linhas:
+                caminho_csv = os.path.join(diretorio, f'sintetico_{n_linhas}_{n_servicos}.csv')
+                gerador.escrever_csv(caminho_csv, n_linhas, args.semente)
+                for nome_modelo in args.modelos:
+                    for caminho in CAMINHOS:
+                        # Matriz densa do get_dummies mais as cópias de treino/teste
+                        memoria_estimada_mb = n_linhas * (n_servicos + 5) * 8 * 3 / 2**20
+                        if caminho == 'denso' and memoria_estimada_mb > memoria_fisica_mb():
+                            caso = {'pulado': f"precisaria de ~{memoria_estimada_mb:,.0f} MB"}
+                        else:
+                            caso = rodar_subprocesso([caminho_csv, caminho, nome_modelo], args.tempo_limite,
+                                                     'benchmarks.benchmark_dados_compactos')
+                        if 'pico_rss_mb' in caso:
+                            print(f"{nome_modelo:<14} {n_linhas:>10,} {n_servicos:>8,} {caminho:<9} {caso['dados_mb']:>9.1f}"
+                                  f" {caso['dados_s']:>8.2f} {caso['treino_s']:>9.2f} {caso['acuracia'] * 100:>8.2f}%"
+                                  f" {caso['pico_rss_mb']:>8.1f} {caso['pico_rss_mb'] - caso['rss_inicial_mb']:>13.1f}",
+                                  flush=True)
+                        else:
+                            print(f"{nome_modelo:<14} {n_linhas:>10,} {n_servicos:>8,} {caminho:<9}"
+                                  f"  {caso.get('pulado') or caso.get('erro')}", flush=True)
+                os.remove(caminho_csv)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# Acurácia contra tempo de relógio: Árvore e SVM isolados versus o ensemble (floresta + SVMs em subconjuntos,
+# oficina/ensemble.py) treinado em 1 núcleo e em todos. Usa o CSV real e CSVs sintéticos (oficina/sintetico.py)
+# de tamanhos crescentes; o X_teste é o mesmo para todos os modelos de cada tamanho.
+# Uso: python -m benchmarks.benchmark_ensemble [linhas_sinteticas ...]   (padrão: 2000 10000)
+import os
+import sys
+import time
+
+import numpy as np
+
+from oficina.dados import (PARAMETROS_ARVORE, PARAMETROS_ENSEMBLE, PARAMETROS_SVM, codificar_features,
+                           dividir_treino_teste, separar_alvo, treinar_arvore, treinar_svm)
+from oficina.cache_binario import carregar_dados_codificados
+from oficina.ensemble import treinar_ensemble
+from oficina.sintetico import GeradorOficina
+
+LINHAS_PADRAO = (2_000, 10_000)
+
+
+def medir(treinar, prever, X_teste, y_teste):
+    inicio = time.perf_counter()
+    modelo = treinar()
+    segundos_treino = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    previsoes = prever(modelo, X_teste)
+    segundos_previsao = time.perf_counter() - inicio
+    return segundos_treino, float(np.mean(previsoes == y_teste)), len(X_teste) / segundos_previsao
+
+
+def comparar(nome_dados, X_features_codificadas, y_alvo):
+    X_treino, X_teste, y_treino, y_teste = dividir_treino_teste(X_features_codificadas, y_alvo)
+    X_teste, y_teste = X_teste.to_numpy(dtype=float), y_teste.to_numpy()
+    candidatos = [
+        ('árvore', lambda: treinar_arvore(X_treino, y_treino, PARAMETROS_ARVORE), lambda m, X: m.predict(X)),
+        ('SVM', lambda: treinar_svm(X_treino, y_treino, PARAMETROS_SVM),
+         lambda m, X: m[0].predict(m[1].transform(X))),
+        ('ensemble 1 núcleo', lambda: treinar_ensemble(X_treino, y_treino, PARAMETROS_ENSEMBLE, n_jobs=1),
+         lambda m, X: m.predict(X)),
+        (f'ensemble todos ({os.cpu_count()})', lambda: treinar_ensemble(X_treino, y_treino, PARAMETROS_ENSEMBLE, n_jobs=-1),
+         lambda m, X: m.predict(X)),
+    ]
+    for nome_modelo, treinar, prever in candidatos:
+        segundos_treino, acuracia, vazao = medir(treinar, prever, X_teste, y_teste)
+        print(f"{nome_dados:<16} {nome_modelo:<22} {segundos_treino:>9.2f} {acuracia * 100:>9.2f}% {vazao:>14,.0f}",
+              flush=True)
+
+
+def main(linhas_sinteticas=LINHAS_PADRAO):
+    print(f"Ensemble: {PARAMETROS_ENSEMBLE['arvores']} árvores + {PARAMETROS_ENSEMBLE['svms']} SVMs "
+          f"({PARAMETROS_ENSEMBLE['fracao_svm']:.0%} das linhas cada)\n")
+    print(f"{'dados':<16} {'modelo':<22} {'treino s':>9} {'acurácia':>10} {'previsões/s':>14}")
+    dados = carregar_dados_codificados()
+    comparar(f'CSV ({len(dados.y_alvo)})', dados.X_features_codificadas, dados.y_alvo)
+
+    gerador = GeradorOficina.do_csv()
+    for n_linhas in linhas_sinteticas:
+        X_features_originais, y_alvo = separar_alvo(gerador.gerar(n_linhas))
+        comparar(f'sintético {n_linhas}', codificar_features(X_features_originais), y_alvo)
+
+
+if __name__ == '__main__':
+    main([int(argumento) for argumento in sys.argv[1:]] or LINHAS_PADRAO)
@@ -0,0 +1,110 @@
+# Custo por previsão do pipeline único (oficina/pipeline.py: one-hot + escalonador + modelo em um Pipeline sobre as
+# colunas brutas) contra o caminho antigo dos scripts: DataFrame da entrada + get_dummies + reindex (+ transform do
+# escalonador) + predict. Mede tempo e, com tracemalloc, o pico de memória temporária por previsão (cópias da
+# entrada, DataFrames e matrizes intermediárias), para uma entrada e para um lote. O pipeline aparece duas vezes:
+# pelo predict do sklearn (ColumnTransformer a cada chamada) e pelo PipelineOficina.prever (codificador equivalente).
+# Uso: python -m benchmarks.benchmark_pipeline [repeticoes] [linhas_lote]
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from oficina.dados import (ARQUIVO_DADOS, COLUNA_SERVICO, COLUNAS_ENTRADA, COLUNAS_NUMERICAS, carregar_dados,
+                           codificar_features, dividir_treino_teste, separar_alvo, treinar_arvore, treinar_svm)
+from oficina.pipeline import PipelineOficina, matriz_bruta, treinar_pipeline
+
+
+def medir_tempo(funcao, entradas, repeticoes):
+    # Mediana de microssegundos por chamada
+    tempos = []
+    for _ in range(repeticoes):
+        for entrada in entradas:
+            inicio = time.perf_counter()
+            funcao(entrada)
+            tempos.append(time.perf_counter() - inicio)
+    return np.median(tempos) * 1e6
+
+
+def medir_memoria(funcao, entradas):
+    # Média, por chamada, do pico de memória temporária: bytes acima do que já estava alocado no início da chamada
+    picos = []
+    funcao(entradas[0]) # Aquecimento: caches internos do pandas/sklearn não entram na conta
+    tracemalloc.start()
+    try:
+        for entrada in entradas:
+            tracemalloc.reset_peak()
+            atual_inicio, _ = tracemalloc.get_traced_memory()
+            funcao(entrada)
+            _, pico = tracemalloc.get_traced_memory()
+            picos.append(pico - atual_inicio)
+    finally:
+        tracemalloc.stop()
+    return float(np.mean(picos))
+
+
+def main(repeticoes=20, linhas_lote=10_000):
+    X_features_originais, y_alvo = separar_alvo(carregar_dados(ARQUIVO_DADOS))
+    X_treino, X_teste, y_treino, y_teste = dividir_treino_teste(codificar_features(X_features_originais), y_alvo)
+    modelo_arvore = treinar_arvore(X_treino, y_treino)
+    modelo_svm, escalonador = treinar_svm(X_treino, y_treino)
+    X_treino_bruto = X_features_originais.loc[X_treino.index, COLUNAS_ENTRADA].to_numpy(dtype=object)
+    servicos_teste = X_features_originais.loc[X_teste.index, COLUNA_SERVICO].to_numpy()
+    numericos_teste = X_features_originais.loc[X_teste.index, COLUNAS_NUMERICAS].to_numpy(np.float64)
+    pipeline_arvore = PipelineOficina(treinar_pipeline('arvore', X_treino_bruto, y_treino), servicos_teste, numericos_teste)
+    pipeline_svm = PipelineOficina(treinar_pipeline('svm', X_treino_bruto, y_treino), servicos_teste, numericos_teste)
+    entradas = list(X_features_originais[COLUNAS_ENTRADA].itertuples(index=False, name=None))
+
+    # Lote: as ordens do CSV repetidas até linhas_lote, já separadas em serviços e numéricas (como no lote/servidor)
+    repeticao = np.resize(np.arange(len(X_features_originais)), linhas_lote)
+    servicos_lote = X_features_originais[COLUNA_SERVICO].to_numpy()[repeticao]
+    numericos_lote = X_features_originais[COLUNAS_NUMERICAS].to_numpy(np.float64)[repeticao]
+    buffer_lote = pipeline_svm.novo_buffer(linhas_lote)
+
+    # Confere que o codificador equivalente prevê exatamente o mesmo que o pipeline do sklearn antes de medir
+    X_lote_bruto = matriz_bruta(servicos_lote, numericos_lote)
+    for pipeline in (pipeline_arvore, pipeline_svm):
+        assert np.array_equal(pipeline.prever(servicos_lote, numericos_lote), pipeline.predict(X_lote_bruto))
+
+    def pandas_arvore(entrada):
+        entrada_df = pd.DataFrame([entrada], columns=COLUNAS_ENTRADA)
+        return modelo_arvore.predict(codificar_features(entrada_df, X_treino.columns).to_numpy(dtype=float))
+
+    def pandas_svm(entrada):
+        entrada_df = pd.DataFrame([entrada], columns=COLUNAS_ENTRADA)
+        return modelo_svm.predict(escalonador.transform(codificar_features(entrada_df, X_treino.columns).to_numpy(dtype=float)))
+
+    def pandas_svm_lote(_):
+        lote_df = pd.DataFrame({COLUNA_SERVICO: servicos_lote, **dict(zip(COLUNAS_NUMERICAS, numericos_lote.T))})
+        return modelo_svm.predict(escalonador.transform(codificar_features(lote_df, X_treino.columns).to_numpy(dtype=float)))
+
+    casos_linha = {
+        'árvore get_dummies + reindex': pandas_arvore,
+        'árvore pipeline (predict do sklearn)': lambda e: pipeline_arvore.predict(np.array([e], dtype=object)),
+        'árvore pipeline (prever_linha)': lambda e: pipeline_arvore.prever_linha(*e),
+        'SVM get_dummies + reindex + transform': pandas_svm,
+        'SVM pipeline (predict do sklearn)': lambda e: pipeline_svm.predict(np.array([e], dtype=object)),
+        'SVM pipeline (prever_linha)': lambda e: pipeline_svm.prever_linha(*e),
+    }
+    casos_lote = {
+        'SVM get_dummies + reindex + transform': pandas_svm_lote,
+        'SVM pipeline (predict do sklearn)': lambda _: pipeline_svm.predict(matriz_bruta(servicos_lote, numericos_lote)),
+        'SVM pipeline (prever)': lambda _: pipeline_svm.prever(servicos_lote, numericos_lote, buffer_lote),
+    }
+
+    print(f"Uma entrada por chamada ({len(entradas)} entradas x {repeticoes} repetições):")
+    print(f"{'caminho':<40} {'µs/previsão':>12} {'pico KB':>10}")
+    for nome, funcao in casos_linha.items():
+        microssegundos = medir_tempo(funcao, entradas, repeticoes)
+        print(f"{nome:<40} {microssegundos:>12.1f} {medir_memoria(funcao, entradas) / 1024:>10.1f}")
+
+    print(f"\nLote de {linhas_lote} entradas (por linha):")
+    print(f"{'caminho':<40} {'µs/previsão':>12} {'pico bytes':>10}")
+    for nome, funcao in casos_lote.items():
+        microssegundos = medir_tempo(funcao, [None], repeticoes) / linhas_lote
+        print(f"{nome:<40} {microssegundos:>12.2f} {medir_memoria(funcao, [None] * 5) / linhas_lote:>10.1f}")
+
+
+if __name__ == '__main__':
+    main(*(int(argumento) for argumento in sys.argv[1:3]))
@@ -0,0 +1,56 @@
+# Kernel RBF aproximado (Nystroem + LinearSVC, RBFSampler + SGD) versus o SVC(kernel='rbf') exato: tempo de
+# treino e acurácia no mesmo X_teste, em CSVs sintéticos (oficina/sintetico.py) de tamanhos crescentes.
+# O SVC exato cresce de forma quadrática ou pior com as linhas; acima de --linhas-maximas-exato ele é pulado.
+# Uso: python -m benchmarks.benchmark_svm_aproximado [--linhas 1000 5000 20000 100000] [--componentes 300]
+import argparse
+import sys
+import time
+
+import numpy as np
+from sklearn import svm
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from oficina.dados import (PARAMETROS_SVM_APROXIMADO, codificar_features, dividir_treino_teste, montar_svm_aproximado,
+                           separar_alvo)
+from oficina.sintetico import GeradorOficina
+
+LINHAS_PADRAO = (1_000, 5_000, 20_000, 100_000)
+LINHAS_MAXIMAS_EXATO = 20_000
+
+
+def candidatos(n_linhas, n_colunas, componentes):
+    yield 'SVC rbf exato', Pipeline([('scaler', StandardScaler()), ('svc', svm.SVC(kernel='rbf', gamma='scale'))])
+    for mapa, classificador in (('nystroem', 'linearsvc'), ('rff', 'sgd')):
+        parametros = dict(PARAMETROS_SVM_APROXIMADO, mapa=mapa, classificador=classificador, componentes=componentes)
+        yield f'{mapa} + {classificador}', montar_svm_aproximado(n_linhas, n_colunas, parametros)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Compara o SVM de kernel RBF aproximado com o SVC exato.")
+    parser.add_argument('--linhas', type=int, nargs='+', default=list(LINHAS_PADRAO))
+    parser.add_argument('--componentes', type=int, default=PARAMETROS_SVM_APROXIMADO['componentes'])
+    parser.add_argument('--linhas-maximas-exato', type=int, default=LINHAS_MAXIMAS_EXATO)
+    args = parser.parse_args(argumentos)
+
+    gerador = GeradorOficina.do_csv()
+    print(f"{'linhas':>8} {'modelo':<20} {'treino s':>9} {'s / mil linhas':>15} {'acurácia':>9}")
+    for n_linhas in args.linhas:
+        X_features_originais, y_alvo = separar_alvo(gerador.gerar(n_linhas))
+        X_treino, X_teste, y_treino, y_teste = dividir_treino_teste(codificar_features(X_features_originais), y_alvo)
+        X_treino, X_teste = X_treino.to_numpy(dtype=float), X_teste.to_numpy(dtype=float)
+        for nome_modelo, modelo in candidatos(*X_treino.shape, args.componentes):
+            if nome_modelo == 'SVC rbf exato' and n_linhas > args.linhas_maximas_exato:
+                print(f"{n_linhas:>8,} {nome_modelo:<20}  pulado (acima de --linhas-maximas-exato)", flush=True)
+                continue
+            inicio = time.perf_counter()
+            modelo.fit(X_treino, y_treino)
+            segundos = time.perf_counter() - inicio
+            acuracia = float(np.mean(modelo.predict(X_teste) == y_teste.to_numpy()))
+            print(f"{n_linhas:>8,} {nome_modelo:<20} {segundos:>9.2f} {segundos / len(X_treino) * 1000:>15.4f}"
+                  f" {acuracia * 100:>8.2f}%", flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
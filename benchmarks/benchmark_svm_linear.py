@@ -0,0 +1,81 @@
+# SVM linear compilado versus SVC.predict: confere que os rótulos são idênticos e mede a vazão
+# de uma linha por vez e em lote.
+# Uso: python -m benchmarks.benchmark_svm_linear [linhas_lote]
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from oficina.dados import (ARQUIVO_DADOS, COLUNA_SERVICO, COLUNAS_ENTRADA, COLUNAS_NUMERICAS, PARAMETROS_SVM,
+                           carregar_dados, separar_alvo, codificar_features, dividir_treino_teste, treinar_svm)
+from oficina.codificador import CodificadorOficina, PreditorCodificado
+from oficina.svm_linear import SVMLinearCompilado
+
+
+def gerar_lote(X_features_originais, n_linhas, semente=1):
+    # Reamostra o CSV com ruído multiplicativo nas colunas numéricas e 5% de serviços desconhecidos
+    gerador = np.random.default_rng(semente)
+    amostra = X_features_originais.iloc[gerador.integers(0, len(X_features_originais), n_linhas)]
+    servicos = amostra[COLUNA_SERVICO].to_numpy().copy()
+    servicos[gerador.random(n_linhas) < 0.05] = 'Servico Desconhecido'
+    numericos = amostra[COLUNAS_NUMERICAS].to_numpy(np.float64) * gerador.uniform(0.7, 1.3, (n_linhas, len(COLUNAS_NUMERICAS)))
+    return servicos, numericos
+
+
+def vazao_linha(funcao, entradas):
+    inicio = time.perf_counter()
+    for entrada in entradas:
+        funcao(entrada)
+    return len(entradas) / (time.perf_counter() - inicio)
+
+
+def vazao_lote(funcao, repeticoes=3):
+    melhor = np.inf
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main(linhas_lote=200_000):
+    X_features_originais, y_alvo = separar_alvo(carregar_dados(ARQUIVO_DADOS))
+    X_treino, X_teste, y_treino, y_teste = dividir_treino_teste(codificar_features(X_features_originais), y_alvo)
+    modelo_svm, escalonador = treinar_svm(X_treino, y_treino, PARAMETROS_SVM)
+    codificador = CodificadorOficina(X_treino.columns)
+    codificador_svm = codificador.com_escalonador(escalonador)
+    preditor_atual = PreditorCodificado(modelo_svm, codificador_svm)
+    compilado = SVMLinearCompilado(modelo_svm, codificador_svm)
+
+    servicos, numericos = gerar_lote(X_features_originais, linhas_lote)
+    divergencias_csv = compilado.divergencias(modelo_svm, codificador_svm, X_features_originais[COLUNA_SERVICO].to_numpy(),
+                                              X_features_originais[COLUNAS_NUMERICAS].to_numpy(np.float64))
+    divergencias_lote = compilado.divergencias(modelo_svm, codificador_svm, servicos, numericos)
+    print(f"Divergências de rótulo: {divergencias_csv} no CSV, {divergencias_lote} em {linhas_lote} linhas sintéticas")
+
+    entradas = list(X_features_originais[COLUNAS_ENTRADA].itertuples(index=False, name=None)) * 10
+
+    def caminho_pandas(entrada):
+        matriz = codificar_features(pd.DataFrame([entrada], columns=COLUNAS_ENTRADA), X_treino.columns).to_numpy(dtype=float)
+        return modelo_svm.predict(escalonador.transform(matriz))
+
+    print("\nUma linha por vez (previsões/s):")
+    print(f"  get_dummies + reindex + transform + predict  {vazao_linha(caminho_pandas, entradas[:200]):>12,.0f}")
+    print(f"  CodificadorOficina + SVC.predict             {vazao_linha(lambda e: preditor_atual.prever_linha(*e), entradas):>12,.0f}")
+    print(f"  SVMLinearCompilado                           {vazao_linha(lambda e: compilado.prever_linha(*e), entradas):>12,.0f}")
+
+    print(f"\nLote de {linhas_lote} linhas (linhas/s):")
+    X_lote = codificar_features(pd.DataFrame({COLUNA_SERVICO: servicos, **dict(zip(COLUNAS_NUMERICAS, numericos.T))}),
+                                X_treino.columns).to_numpy(dtype=float)
+    segundos = vazao_lote(lambda: modelo_svm.predict(escalonador.transform(X_lote)))
+    print(f"  escalonador.transform + SVC.predict (já codificado)  {linhas_lote / segundos:>12,.0f}")
+    segundos = vazao_lote(lambda: preditor_atual.prever(servicos, numericos))
+    print(f"  CodificadorOficina + SVC.predict                     {linhas_lote / segundos:>12,.0f}")
+    buffer = compilado.novo_buffer(linhas_lote)
+    segundos = vazao_lote(lambda: compilado.prever(servicos, numericos, buffer))
+    print(f"  SVMLinearCompilado                                   {linhas_lote / segundos:>12,.0f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,134 @@
+# Gerador de carga do servidor de previsões: mede latência p50/p99 e requisições por segundo.
+# Compara o caminho atual de uma linha por vez (DataFrame + get_dummies + reindex + predict, como no menu)
+# com o servidor sem agrupamento (--max-lote 1) e com micro-lotes.
+# Uso: python -m benchmarks.carga_servidor [--requisicoes 2000] [--concorrencia 32] [--modelo svm]
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from oficina.dados import ARQUIVO_DADOS, COLUNAS_ENTRADA, carregar_dados, codificar_features
+from oficina.artefatos import carregar_modelos, obter_arvore, obter_svm
+from oficina.cache_binario import carregar_dados_codificados
+
+
+def resumir(nome, latencias, duracao_total):
+    latencias_ms = np.asarray(latencias) * 1000
+    print(f"{nome:<38} p50 {np.percentile(latencias_ms, 50):8.2f} ms   p99 {np.percentile(latencias_ms, 99):8.2f} ms"
+          f"   {len(latencias_ms) / duracao_total:9.0f} req/s")
+
+
+def medir_caminho_atual(entradas, nome_modelo, total_requisicoes):
+    # Reproduz o fluxo antigo do menu para cada requisição, em sequência. O modelo é o mesmo artefato do menu,
+    # treinado como em carregar_modelos (matriz da representação compacta): treiná-lo aqui em um DataFrame denso
+    # usaria a mesma chave com outro escalonador (with_mean) e o artefato dependeria de quem rodasse primeiro
+    dados = carregar_dados_codificados(ARQUIVO_DADOS)
+    indices_treino, indices_teste, y_treino, y_teste = dados.dividir()
+    if nome_modelo == 'arvore':
+        modelo, escalonador = obter_arvore(dados.matriz_arvore(indices_treino), y_treino, dados.servicos,
+                                           colunas=dados.colunas)['modelo'], None
+    else:
+        artefato_svm = obter_svm(dados.matriz_esparsa(indices_treino, np.float64), y_treino, dados.servicos,
+                                 colunas=dados.colunas)
+        modelo, escalonador = artefato_svm['modelo'], artefato_svm['escalonador']
+    latencias = []
+    inicio_total = time.perf_counter()
+    for indice in range(total_requisicoes):
+        entrada = entradas[indice % len(entradas)]
+        inicio = time.perf_counter()
+        entrada_df = pd.DataFrame([[entrada[coluna] for coluna in COLUNAS_ENTRADA]], columns=COLUNAS_ENTRADA)
+        matriz = codificar_features(entrada_df, dados.colunas).to_numpy(dtype=float)
+        modelo.predict(matriz if escalonador is None else escalonador.transform(matriz))
+        latencias.append(time.perf_counter() - inicio)
+    return latencias, time.perf_counter() - inicio_total
+
+
+async def cliente(host, porta, caminho, corpos, latencias):
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    try:
+        for corpo in corpos:
+            inicio = time.perf_counter()
+            escritor.write(f"POST {caminho} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                           f"Content-Length: {len(corpo)}\r\n\r\n".encode('latin-1') + corpo)
+            await escritor.drain()
+            linha_status = await leitor.readline()
+            tamanho_corpo = 0
+            while True:
+                linha = await leitor.readline()
+                if linha in (b'\r\n', b''):
+                    break
+                nome, _, valor = linha.decode('latin-1').partition(':')
+                if nome.strip().lower() == 'content-length':
+                    tamanho_corpo = int(valor)
+            await leitor.readexactly(tamanho_corpo)
+            if b' 200 ' not in linha_status:
+                raise RuntimeError(f"Resposta inesperada do servidor: {linha_status!r}")
+            latencias.append(time.perf_counter() - inicio)
+    finally:
+        escritor.close()
+
+
+async def gerar_carga(host, porta, caminho, entradas, total_requisicoes, concorrencia):
+    corpos = [json.dumps(entradas[indice % len(entradas)]).encode('utf-8') for indice in range(total_requisicoes)]
+    latencias = []
+    inicio_total = time.perf_counter()
+    await asyncio.gather(*(cliente(host, porta, caminho, corpos[indice::concorrencia], latencias)
+                           for indice in range(concorrencia)))
+    return latencias, time.perf_counter() - inicio_total
+
+
+async def aguardar_servidor(host, porta, tempo_limite=120):
+    prazo = time.monotonic() + tempo_limite
+    while time.monotonic() < prazo:
+        try:
+            leitor, escritor = await asyncio.open_connection(host, porta)
+            escritor.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("O servidor não respondeu a tempo.")
+
+
+def medir_servidor(args, entradas, max_lote, max_espera_ms):
+    processo = subprocess.Popen([sys.executable, '-m', 'oficina.servidor', '--host', args.host, '--porta', str(args.porta),
+                                 '--max-lote', str(max_lote), '--max-espera-ms', str(max_espera_ms),
+                                 '--modelos', args.modelo], stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(aguardar_servidor(args.host, args.porta))
+        return asyncio.run(gerar_carga(args.host, args.porta, f'/prever/{args.modelo}', entradas,
+                                       args.requisicoes, args.concorrencia))
+    finally:
+        processo.terminate()
+        processo.wait()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Gerador de carga do servidor de previsões.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--requisicoes', type=int, default=2000)
+    parser.add_argument('--concorrencia', type=int, default=32)
+    parser.add_argument('--modelo', choices=('arvore', 'svm'), default='svm')
+    parser.add_argument('--max-lote', type=int, default=64)
+    parser.add_argument('--max-espera-ms', type=float, default=2.0)
+    args = parser.parse_args(argumentos)
+
+    # Carrega os modelos uma vez antes de subir os servidores, assim o artefato já está salvo em disco
+    carregar_modelos(ARQUIVO_DADOS, (args.modelo,))
+    dados = carregar_dados(ARQUIVO_DADOS)
+    entradas = dados[COLUNAS_ENTRADA].to_dict(orient='records')
+
+    print(f"{args.requisicoes} requisições, modelo {args.modelo}, concorrência {args.concorrencia}")
+    resumir("caminho atual (1 linha, sequencial)", *medir_caminho_atual(entradas, args.modelo, args.requisicoes))
+    resumir("servidor sem agrupamento", *medir_servidor(args, entradas, 1, 0))
+    resumir(f"servidor micro-lotes ({args.max_lote}, {args.max_espera_ms} ms)",
+            *medir_servidor(args, entradas, args.max_lote, args.max_espera_ms))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+# Suíte de escala: tempo de treino, latência de uma previsão, vazão em lote e pico de memória (RSS)
+# da Árvore e do SVM à medida que crescem as linhas e as categorias de 'Servico', em dados do
+# oficina/sintetico.py. Cada caso roda em um subprocesso próprio, para o pico de RSS ser só dele.
+# O resultado vai para um JSON (--saida) para comparar execuções e achar regressões.
+#
+# Uso: python -m benchmarks.suite_escala [--linhas 1000 10000 100000] [--servicos 106 1000]
+#                                        [--modelos arvore svm] [--saida resultados_escala.json]
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import sklearn
+
+from oficina.dados import (COLUNAS_NUMERICAS, PARAMETROS_ARVORE, PARAMETROS_SVM, PROPORCAO_TESTE, treinar_arvore,
+                           treinar_svm)
+from oficina.dados_compactos import LIMITE_ARVORE_DENSA, TIPOS_COMPACTOS, tipo_codigos
+from oficina.artefatos import escrever_atomicamente
+from oficina.cache_binario import carregar_dados_codificados
+from oficina.codificador import CodificadorOficina, PreditorCodificado
+from oficina.svm_linear import compilar_se_linear
+from oficina.arvore_compilada import compilar_arvore
+from oficina.sintetico import GeradorOficina
+from oficina.treino_em_blocos import pico_memoria_mb
+
+LINHAS_PADRAO = (1_000, 10_000, 100_000)
+SERVICOS_PADRAO = (106, 1_000)
+LINHAS_MAXIMAS_SVM = 20_000 # O SVC exato cresce de forma quadrática com as linhas; acima disso o caso é pulado
+AMOSTRAS_LATENCIA = 1_000
+
+
+def executar_caso(caminho_csv, nome_modelo):
+    # Roda no subprocesso: treina no CSV sintético com os hiperparâmetros padrão e mede o preditor
+    # que o menu usaria (modo compilado quando ele confere com o sklearn), sobre a matriz esparsa do menu
+    rss_inicial = pico_memoria_mb()
+    dados = carregar_dados_codificados(caminho_csv)
+    indices_treino, indices_teste, y_treino, y_teste = dados.dividir()
+    X_treino = dados.matriz_arvore(indices_treino) if nome_modelo == 'arvore' else dados.matriz_esparsa(indices_treino, np.float64)
+    servicos_teste, numericos_teste = dados.linhas_brutas(indices_teste)
+    codificador = CodificadorOficina(dados.colunas)
+
+    inicio = time.perf_counter()
+    if nome_modelo == 'arvore':
+        modelo = treinar_arvore(X_treino, y_treino, PARAMETROS_ARVORE)
+    else:
+        modelo, escalonador = treinar_svm(X_treino, y_treino, PARAMETROS_SVM)
+        codificador = codificador.com_escalonador(escalonador)
+    segundos_treino = time.perf_counter() - inicio
+
+    if nome_modelo == 'arvore':
+        preditor = compilar_arvore(modelo, codificador, servicos_teste, numericos_teste)
+    else:
+        preditor = compilar_se_linear(modelo, codificador)
+    preditor = preditor or PreditorCodificado(modelo, codificador)
+
+    latencias = []
+    for servico, valores in zip(servicos_teste[:AMOSTRAS_LATENCIA], numericos_teste[:AMOSTRAS_LATENCIA].tolist()):
+        inicio = time.perf_counter()
+        preditor.prever_linha(servico, *valores)
+        latencias.append(time.perf_counter() - inicio)
+
+    buffer = preditor.novo_buffer(len(servicos_teste))
+    melhor_lote = np.inf
+    for _ in range(3):
+        inicio = time.perf_counter()
+        previsoes = preditor.prever(servicos_teste, numericos_teste, buffer)
+        melhor_lote = min(melhor_lote, time.perf_counter() - inicio)
+
+    return {
+        'preditor': type(preditor).__name__,
+        'linhas_treino': X_treino.shape[0],
+        'colunas': len(dados.colunas),
+        'treino_s': segundos_treino,
+        'latencia_p50_us': float(np.percentile(latencias, 50) * 1e6),
+        'latencia_p99_us': float(np.percentile(latencias, 99) * 1e6),
+        'vazao_lote_linhas_s': len(servicos_teste) / melhor_lote,
+        'acuracia': float(np.mean(previsoes == y_teste.to_numpy())),
+        'rss_inicial_mb': rss_inicial,
+        'pico_rss_mb': pico_memoria_mb(),
+    }
+
+
+def rodar_subprocesso(argumentos_caso, tempo_limite, modulo='benchmarks.suite_escala'):
+    # Roda 'python -m <modulo> --caso <argumentos_caso>' e devolve o JSON da última linha da saída
+    comando = [sys.executable, '-m', modulo, '--caso', *argumentos_caso]
+    try:
+        processo = subprocess.run(comando, capture_output=True, text=True, timeout=tempo_limite)
+    except subprocess.TimeoutExpired:
+        return {'erro': f"excedeu {tempo_limite} s"}
+    if processo.returncode != 0:
+        return {'erro': processo.stderr.strip().splitlines()[-1] if processo.stderr.strip() else f"código {processo.returncode}"}
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+
+def memoria_estimada_mb(n_linhas, n_servicos, nome_modelo):
+    # Pico aproximado do executar_caso, que parte da representação compacta: as colunas do cache, a matriz de
+    # treino (árvore: CSR float32 e, enquanto couber em LIMITE_ARVORE_DENSA, a cópia densa; SVM: CSR float64, a
+    # cópia escalonada, a do libsvm e, no máximo, o cache de kernel de cache_size MB) e a matriz densa do teste,
+    # que a verificação da árvore compilada (float64 e float32) e o PreditorCodificado montam
+    colunas = n_servicos + len(COLUNAS_NUMERICAS)
+    linhas_teste = int(np.ceil(n_linhas * PROPORCAO_TESTE))
+    linhas_treino = n_linhas - linhas_teste
+    bytes_linha_compacta = (sum(np.dtype(tipo).itemsize for tipo in TIPOS_COMPACTOS.values())
+                            + np.dtype(tipo_codigos(n_servicos)).itemsize + 1) # Códigos do serviço e nota int8
+
+    def bytes_csr(linhas, tipo):
+        # Por linha: as cinco numéricas e o um do serviço (valor e índice int32) e o ponteiro int64
+        return linhas * ((len(COLUNAS_NUMERICAS) + 1) * (np.dtype(tipo).itemsize + 4) + 8)
+
+    if nome_modelo == 'arvore':
+        bytes_densa = linhas_treino * colunas * 4
+        bytes_treino = bytes_csr(linhas_treino, np.float32) + (bytes_densa if bytes_densa <= LIMITE_ARVORE_DENSA else 0)
+        bytes_teste = linhas_teste * colunas * (8 + 4)
+    else:
+        bytes_treino = 3 * bytes_csr(linhas_treino, np.float64) + PARAMETROS_SVM.get('cache_size', 200) * 2**20
+        bytes_teste = linhas_teste * colunas * 8
+    return (n_linhas * bytes_linha_compacta + bytes_treino + bytes_teste) / 2**20
+
+
+def memoria_fisica_mb():
+    return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+def ambiente():
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'sklearn': sklearn.__version__,
+            'plataforma': platform.platform(), 'cpus': os.cpu_count(), 'memoria_mb': round(memoria_fisica_mb()),
+            'data': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Mede treino, latência, vazão e memória à medida que os dados crescem.")
+    parser.add_argument('--linhas', type=int, nargs='+', default=list(LINHAS_PADRAO))
+    parser.add_argument('--servicos', type=int, nargs='+', default=list(SERVICOS_PADRAO))
+    parser.add_argument('--modelos', nargs='+', choices=('arvore', 'svm'), default=['arvore', 'svm'])
+    parser.add_argument('--linhas-maximas-svm', type=int, default=LINHAS_MAXIMAS_SVM)
+    parser.add_argument('--tempo-limite', type=float, default=1800, help="Segundos por caso")
+    parser.add_argument('--semente', type=int, default=1)
+    parser.add_argument('--saida', default='resultados_escala.json')
+    parser.add_argument('--caso', nargs=2, metavar=('CSV', 'MODELO'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argumentos)
+
+    if args.caso:
+        print(json.dumps(executar_caso(*args.caso)))
+        return 0
+
+    gerador_base = GeradorOficina.do_csv()
+    resultados = []
+    print(f"{'modelo':<7} {'linhas':>9} {'serviços':>8} {'treino s':>9} {'p50 µs':>8} {'p99 µs':>8}"
+          f" {'lote linhas/s':>14} {'pico MB':>8}  preditor")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for n_servicos in args.servicos:
+            gerador = gerador_base.com_servicos(n_servicos, args.semente)
+            for n_linhas in args.linhas:
+                caminho_csv = os.path.join(diretorio, f'sintetico_{n_linhas}_{n_servicos}.csv')
+                gerador.escrever_csv(caminho_csv, n_linhas, args.semente)
+                for nome_modelo in args.modelos:
+                    caso = {'modelo': nome_modelo, 'linhas': n_linhas, 'servicos': n_servicos}
+                    memoria_estimada = memoria_estimada_mb(n_linhas, n_servicos, nome_modelo)
+                    if nome_modelo == 'svm' and n_linhas > args.linhas_maximas_svm:
+                        caso['pulado'] = f"acima de --linhas-maximas-svm ({args.linhas_maximas_svm})"
+                    elif memoria_estimada > memoria_fisica_mb():
+                        caso['pulado'] = f"precisaria de ~{memoria_estimada:,.0f} MB"
+                    else:
+                        caso.update(rodar_subprocesso([caminho_csv, nome_modelo], args.tempo_limite))
+                    resultados.append(caso)
+
+                    if 'treino_s' in caso:
+                        print(f"{nome_modelo:<7} {n_linhas:>9,} {n_servicos:>8,} {caso['treino_s']:>9.3f}"
+                              f" {caso['latencia_p50_us']:>8.1f} {caso['latencia_p99_us']:>8.1f}"
+                              f" {caso['vazao_lote_linhas_s']:>14,.0f} {caso['pico_rss_mb']:>8.1f}  {caso['preditor']}",
+                              flush=True)
+                    else:
+                        print(f"{nome_modelo:<7} {n_linhas:>9,} {n_servicos:>8,}  {caso.get('pulado') or caso.get('erro')}",
+                              flush=True)
+
+    conteudo = json.dumps({'ambiente': ambiente(), 'resultados': resultados}, indent=2, ensure_ascii=False)
+    escrever_atomicamente(args.saida, lambda arquivo: arquivo.write(conteudo.encode('utf-8')))
+    print(f"Resultados gravados em '{args.saida}'.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+# Módulos compartilhados pelo Menu(Main).py, pelos scripts isolados e pelas ferramentas de linha de comando.
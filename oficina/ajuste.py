@@ -0,0 +1,166 @@
+# Busca de hiperparâmetros com validação cruzada k-fold estratificada em Avaliacao_Cliente.
+# As dobras são montadas uma única vez, nas mesmas matrizes dos artefatos (oficina/dados_compactos.py: CSR e, na
+# árvore, matriz_arvore), e enviadas para cada processo do pool na inicialização. Cada candidato treina com
+# treinar_arvore/treinar_svm, o mesmo treino do menu (semente da árvore, escalonador e gamma do SVM);
+# candidatos fracos são descartados cedo por successive halving (cada rodada usa mais dobras e mantém 1/eta).
+# A configuração vencedora vai para parametros_modelos.json, lido pelo Menu(Main).py e pelos scripts.
+#
+# Uso: python -m oficina.ajuste [--modelos arvore svm] [--dobras 5] [--busca grade|aleatoria] [--amostras 20]
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.stats import loguniform, randint
+from sklearn.model_selection import StratifiedKFold, ParameterGrid, ParameterSampler
+
+from oficina.dados import ARQUIVO_DADOS, ARQUIVO_PARAMETROS, escalonar, treinar_arvore, treinar_svm
+from oficina.artefatos import escrever_atomicamente
+from oficina.cache_binario import carregar_dados_codificados
+
+# Espaços de busca: grade completa e distribuições para a busca aleatória
+GRADES = {
+    'arvore': {'max_depth': [None, 3, 5, 8, 12], 'min_samples_leaf': [1, 2, 4, 8]},
+    'svm': [{'kernel': ['linear'], 'C': [0.01, 0.1, 1.0, 10.0]},
+            {'kernel': ['rbf'], 'C': [0.1, 1.0, 10.0, 100.0], 'gamma': ['scale', 0.001, 0.01, 0.1]}],
+}
+DISTRIBUICOES = {
+    'arvore': {'max_depth': [None] + list(range(2, 21)), 'min_samples_leaf': randint(1, 16)},
+    'svm': [{'kernel': ['linear'], 'C': loguniform(1e-3, 1e2)},
+            {'kernel': ['rbf'], 'C': loguniform(1e-2, 1e3), 'gamma': loguniform(1e-4, 1e0)}],
+}
+SEMENTE = 1
+
+_dobras_trabalhador = None # Dobras pré-processadas, recebidas uma vez por processo
+
+
+def preparar_dobras(dados, y, n_dobras):
+    # Para cada dobra guarda as matrizes como o menu as monta: a da árvore (matriz_arvore) e a CSR float64 do SVM
+    # e do teste. O escalonador do SVM é ajustado pelo treinar_svm no treino da dobra, como no artefato
+    dobras = []
+    divisor = StratifiedKFold(n_dobras, shuffle=True, random_state=SEMENTE)
+    for indices_treino, indices_teste in divisor.split(np.zeros(len(y)), y):
+        dobras.append({
+            'X_treino_arvore': dados.matriz_arvore(indices_treino),
+            'X_treino': dados.matriz_esparsa(indices_treino, np.float64),
+            'X_teste': dados.matriz_esparsa(indices_teste, np.float64),
+            'y_treino': y[indices_treino], 'y_teste': y[indices_teste],
+        })
+    return dobras
+
+
+def _inicializar_trabalhador(dobras):
+    global _dobras_trabalhador
+    _dobras_trabalhador = dobras
+
+
+def prever_dobra(nome_modelo, parametros, dobra):
+    # Treina como os artefatos (oficina/artefatos.py: obter_arvore, obter_svm) e prevê o teste da dobra
+    if nome_modelo == 'arvore':
+        return treinar_arvore(dobra['X_treino_arvore'], dobra['y_treino'], parametros).predict(dobra['X_teste'])
+    modelo_svm, escalonador = treinar_svm(dobra['X_treino'], dobra['y_treino'], parametros)
+    return modelo_svm.predict(escalonar(escalonador, dobra['X_teste']))
+
+
+def avaliar_dobra(nome_modelo, parametros, indice_dobra):
+    # Executado nos processos do pool: treina na dobra e retorna a acurácia no teste da dobra
+    dobra = _dobras_trabalhador[indice_dobra]
+    return float(np.mean(prever_dobra(nome_modelo, parametros, dobra) == dobra['y_teste']))
+
+
+def gerar_candidatos(nome_modelo, busca, amostras):
+    if busca == 'grade':
+        return list(ParameterGrid(GRADES[nome_modelo]))
+    candidatos = ParameterSampler(DISTRIBUICOES[nome_modelo], amostras, random_state=SEMENTE)
+    # Converte tipos NumPy em tipos nativos para poderem ir para o JSON
+    return [{nome: (valor.item() if isinstance(valor, np.generic) else valor) for nome, valor in candidato.items()}
+            for candidato in candidatos]
+
+
+def successive_halving(executor, nome_modelo, candidatos, n_dobras, eta=2, dobras_iniciais=1):
+    # Rodada r avalia os sobreviventes em min(n_dobras, dobras_iniciais * eta**r) dobras, reaproveitando
+    # as notas das dobras já avaliadas, e mantém os ceil(n / eta) melhores até usar todas as dobras.
+    notas = [[] for _ in candidatos]
+    sobreviventes = list(range(len(candidatos)))
+    dobras_rodada = min(n_dobras, dobras_iniciais)
+    while True:
+        tarefas = {}
+        for indice_candidato in sobreviventes:
+            for indice_dobra in range(len(notas[indice_candidato]), dobras_rodada):
+                futuro = executor.submit(avaliar_dobra, nome_modelo, candidatos[indice_candidato], indice_dobra)
+                tarefas[futuro] = indice_candidato
+        # Os futuros são lidos na ordem de submissão, então as notas ficam na ordem das dobras
+        for futuro, indice_candidato in tarefas.items():
+            notas[indice_candidato].append(futuro.result())
+
+        sobreviventes.sort(key=lambda indice: np.mean(notas[indice]), reverse=True)
+        print(f"  {nome_modelo}: {len(sobreviventes)} candidatos avaliados em {dobras_rodada} dobra(s)")
+        if dobras_rodada == n_dobras:
+            break
+        sobreviventes = sobreviventes[:max(1, math.ceil(len(sobreviventes) / eta))]
+        dobras_rodada = min(n_dobras, dobras_rodada * eta)
+
+    return [(candidatos[indice], float(np.mean(notas[indice])), float(np.std(notas[indice]))) for indice in sobreviventes]
+
+
+def salvar_parametros(melhores, caminho=ARQUIVO_PARAMETROS):
+    # Mescla com o arquivo existente para não apagar o ajuste de um modelo não incluído nesta execução
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            parametros = json.load(arquivo)
+    except FileNotFoundError:
+        parametros = {}
+    parametros.update(melhores)
+    conteudo = json.dumps(parametros, indent=2, ensure_ascii=False).encode('utf-8')
+    escrever_atomicamente(caminho, lambda arquivo: arquivo.write(conteudo))
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Busca de hiperparâmetros da Árvore e do SVM com validação cruzada.")
+    parser.add_argument('--modelos', nargs='+', choices=('arvore', 'svm'), default=['arvore', 'svm'])
+    parser.add_argument('--dobras', type=int, default=5)
+    parser.add_argument('--busca', choices=('grade', 'aleatoria'), default='grade')
+    parser.add_argument('--amostras', type=int, default=20, help="Candidatos por modelo na busca aleatória")
+    parser.add_argument('--eta', type=int, default=2, help="Fator de corte do successive halving")
+    parser.add_argument('--processos', type=int, default=os.cpu_count())
+    parser.add_argument('--dados-treino', default=ARQUIVO_DADOS)
+    parser.add_argument('--nao-salvar', action='store_true', help="Só mostra o resultado, sem gravar " + ARQUIVO_PARAMETROS)
+    args = parser.parse_args(argumentos)
+
+    try:
+        dados = carregar_dados_codificados(args.dados_treino) # Lê e codifica o CSV só se o cache estiver desatualizado
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.dados_treino}' não foi encontrado.")
+        return 1
+
+    y = dados.y_alvo.to_numpy()
+    try:
+        dobras = preparar_dobras(dados, y, args.dobras)
+    except ValueError as erro_dobras:
+        print(f"Erro: Não foi possível montar {args.dobras} dobras estratificadas: {erro_dobras}")
+        return 1
+
+    melhores = {}
+    with ProcessPoolExecutor(args.processos, initializer=_inicializar_trabalhador, initargs=(dobras,)) as executor:
+        for nome_modelo in args.modelos:
+            candidatos = gerar_candidatos(nome_modelo, args.busca, args.amostras)
+            inicio = time.perf_counter()
+            ranking = successive_halving(executor, nome_modelo, candidatos, args.dobras, args.eta)
+            print(f"\n{nome_modelo}: {len(candidatos)} candidatos em {time.perf_counter() - inicio:.1f} s")
+            for parametros, media, desvio in ranking[:5]:
+                print(f"  acurácia {media * 100:6.2f}% ± {desvio * 100:5.2f}  {parametros}")
+            print("-" * 30)
+            melhores[nome_modelo] = ranking[0][0]
+
+    if not args.nao_salvar:
+        salvar_parametros(melhores)
+        print(f"Configuração vencedora gravada em '{ARQUIVO_PARAMETROS}'; o menu e os scripts passam a usá-la.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,231 @@
+# Armazenamento versionado dos modelos treinados: estimador, escalonador, layout das colunas do get_dummies
+# e lista de serviços. Cada artefato é identificado por um hash do CSV de treino + configuração, então só há
+# retreino quando o CSV ou os hiperparâmetros mudam.
+import hashlib
+import json
+import os
+import tempfile
+
+import joblib
+import numpy as np
+import sklearn
+
+from oficina.dados import (ARQUIVO_DADOS, COLUNAS_ENTRADA, parametros_modelo, treinar_arvore,
+                           treinar_svm, treinar_svm_aproximado)
+from oficina.codificador import CodificadorOficina, PreditorCodificado
+from oficina.svm_linear import compilar_se_linear
+from oficina.arvore_compilada import compilar_arvore
+from oficina.ensemble import treinar_ensemble
+from oficina.pipeline import PipelineOficina, matriz_bruta, treinar_pipeline
+from oficina.instrumentacao import etapa
+
+MODELOS_SERVIDOS = ('arvore', 'svm', 'svm_incremental', 'ensemble', 'svm_aproximado', 'pipeline_arvore', 'pipeline_svm')
+MODELOS_PADRAO = ('arvore', 'svm') # Os dois modelos do Menu(Main).py
+
+DIRETORIO_ARTEFATOS = 'modelos_salvos'
+VERSAO_FORMATO = 7 # Incrementar sempre que o conteúdo do artefato mudar de estrutura
+ARQUIVO_INDICE_HASHES = 'hashes_dados.json' # Evita recalcular o hash de CSVs grandes que não mudaram
+
+
+def hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    hash_conteudo = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''):
+            hash_conteudo.update(bloco)
+    return hash_conteudo.hexdigest()
+
+
+def hash_dados(caminho_dados, diretorio=DIRETORIO_ARTEFATOS):
+    # Reaproveita o hash anterior enquanto tamanho e mtime do CSV forem os mesmos
+    estado = os.stat(caminho_dados)
+    assinatura = [estado.st_size, estado.st_mtime_ns]
+    caminho_indice = os.path.join(diretorio, ARQUIVO_INDICE_HASHES)
+    try:
+        with open(caminho_indice, encoding='utf-8') as arquivo:
+            indice = json.load(arquivo)
+    except (FileNotFoundError, ValueError):
+        indice = {}
+
+    chave_indice = os.path.abspath(caminho_dados)
+    registro = indice.get(chave_indice)
+    if registro is not None and registro['assinatura'] == assinatura:
+        return registro['hash']
+
+    hash_conteudo = hash_arquivo(caminho_dados)
+    indice[chave_indice] = {'assinatura': assinatura, 'hash': hash_conteudo}
+    escrever_atomicamente(caminho_indice, lambda arquivo: arquivo.write(json.dumps(indice, indent=2).encode('utf-8')))
+    return hash_conteudo
+
+
+def chave_artefato(caminho_dados, nome_modelo, configuracao, diretorio=DIRETORIO_ARTEFATOS):
+    conteudo_chave = {
+        'versao_formato': VERSAO_FORMATO,
+        'versao_sklearn': sklearn.__version__, # Pickles do sklearn não são compatíveis entre versões
+        'hash_dados': hash_dados(caminho_dados, diretorio),
+        'modelo': nome_modelo,
+        'configuracao': configuracao,
+    }
+    return hashlib.sha256(json.dumps(conteudo_chave, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def escrever_atomicamente(caminho, escrever):
+    # Escreve em um arquivo temporário no mesmo diretório e troca com os.replace, assim um leitor
+    # nunca vê um artefato pela metade, mesmo se o processo cair no meio da escrita
+    diretorio = os.path.dirname(caminho) or '.'
+    os.makedirs(diretorio, exist_ok=True)
+    descritor, caminho_temporario = tempfile.mkstemp(dir=diretorio, prefix='.tmp-')
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            escrever(arquivo)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.chmod(caminho_temporario, 0o644) # mkstemp cria com 0600
+        os.replace(caminho_temporario, caminho)
+    except BaseException:
+        os.unlink(caminho_temporario)
+        raise
+
+
+def salvar_artefato(artefato, caminho):
+    escrever_atomicamente(caminho, lambda arquivo: joblib.dump(artefato, arquivo))
+
+
+def carregar_artefato(caminho):
+    # mmap_mode='r' mapeia os arrays NumPy do estimador direto do disco em vez de copiá-los para a memória
+    return joblib.load(caminho, mmap_mode='r')
+
+
+def obter_artefato(nome_modelo, configuracao, treinar, caminho_dados=ARQUIVO_DADOS, diretorio=DIRETORIO_ARTEFATOS):
+    # Carrega o artefato salvo para (CSV, configuração); se não existir, chama treinar() e salva o resultado
+    chave = chave_artefato(caminho_dados, nome_modelo, configuracao, diretorio)
+    caminho_artefato = os.path.join(diretorio, f'{nome_modelo}-{chave}.joblib')
+    if os.path.exists(caminho_artefato):
+        try:
+            with etapa('carregar_artefato'):
+                artefato = carregar_artefato(caminho_artefato)
+            if artefato.get('versao_formato') == VERSAO_FORMATO:
+                return artefato
+        except Exception as erro_carregamento:
+            print(f"Aviso: artefato '{caminho_artefato}' ilegível ({erro_carregamento}); treinando novamente.")
+
+    artefato = treinar()
+    artefato['versao_formato'] = VERSAO_FORMATO
+    artefato['chave'] = chave
+    salvar_artefato(artefato, caminho_artefato)
+    return artefato
+
+
+def montar_artefato(modelo, colunas, servicos, escalonador=None):
+    return {'modelo': modelo, 'escalonador': escalonador, 'colunas': list(colunas), 'servicos': list(servicos)}
+
+
+# X_treino: DataFrame do get_dummies ou a matriz esparsa da representação compacta (oficina/dados_compactos.py),
+# que não tem nomes de colunas; nesse caso o layout vem em colunas
+def obter_arvore(X_treino, y_treino, servicos, caminho_dados=ARQUIVO_DADOS, estratificar=False, parametros=None,
+                 colunas=None):
+    colunas = X_treino.columns if colunas is None else colunas
+    parametros = parametros_modelo('arvore') if parametros is None else parametros
+    configuracao = {'parametros': parametros, 'estratificar': estratificar}
+    return obter_artefato('arvore', configuracao,
+                          lambda: montar_artefato(treinar_arvore(X_treino, y_treino, parametros), colunas, servicos),
+                          caminho_dados)
+
+
+def obter_svm(X_treino, y_treino, servicos, caminho_dados=ARQUIVO_DADOS, estratificar=False, parametros=None,
+              colunas=None):
+    colunas = X_treino.columns if colunas is None else colunas
+    parametros = parametros_modelo('svm') if parametros is None else parametros
+    configuracao = {'parametros': parametros, 'estratificar': estratificar}
+
+    def treinar():
+        modelo_svm, escalonador = treinar_svm(X_treino, y_treino, parametros)
+        return montar_artefato(modelo_svm, colunas, servicos, escalonador)
+
+    return obter_artefato('svm', configuracao, treinar, caminho_dados)
+
+
+def obter_svm_aproximado(X_treino, y_treino, servicos, caminho_dados=ARQUIVO_DADOS, estratificar=False, parametros=None,
+                         colunas=None):
+    # O modelo é o Pipeline inteiro (escalonador -> mapa RBF -> classificador linear) sobre as colunas do get_dummies
+    colunas = X_treino.columns if colunas is None else colunas
+    parametros = parametros_modelo('svm_aproximado') if parametros is None else parametros
+    configuracao = {'parametros': parametros, 'estratificar': estratificar}
+    return obter_artefato('svm_aproximado', configuracao,
+                          lambda: montar_artefato(treinar_svm_aproximado(X_treino, y_treino, parametros),
+                                                  colunas, servicos),
+                          caminho_dados)
+
+
+def obter_ensemble(X_treino, y_treino, servicos, caminho_dados=ARQUIVO_DADOS, estratificar=False, parametros=None,
+                   n_jobs=-1, colunas=None):
+    # O próprio EnsembleOficina já prevê a partir das colunas brutas (não tem modo compilado à parte)
+    colunas = X_treino.columns if colunas is None else colunas
+    parametros = parametros_modelo('ensemble') if parametros is None else parametros
+    configuracao = {'parametros': parametros, 'estratificar': estratificar}
+    return obter_artefato('ensemble', configuracao,
+                          lambda: montar_artefato(treinar_ensemble(X_treino, y_treino, parametros, n_jobs, colunas),
+                                                  colunas, servicos),
+                          caminho_dados)
+
+
+def obter_pipeline(nome_modelo, X_treino_bruto, y_treino, servicos, caminho_dados=ARQUIVO_DADOS, estratificar=False,
+                   parametros=None):
+    # O modelo é o Pipeline inteiro (one-hot + escalonador + Árvore ou SVM) sobre as colunas brutas; o layout
+    # das colunas do one-hot fica dentro do próprio pipeline
+    parametros = parametros_modelo(nome_modelo) if parametros is None else parametros
+    configuracao = {'parametros': parametros, 'estratificar': estratificar}
+    return obter_artefato(f'pipeline_{nome_modelo}', configuracao,
+                          lambda: montar_artefato(treinar_pipeline(nome_modelo, X_treino_bruto, y_treino, parametros),
+                                                  COLUNAS_ENTRADA, servicos),
+                          caminho_dados)
+
+
+def carregar_modelos(caminho_dados=ARQUIVO_DADOS, nomes=MODELOS_PADRAO):
+    # Carrega (ou treina uma vez) os modelos do Menu(Main).py, com a mesma codificação e divisão treino/teste.
+    # Retorna {nome: preditor}, onde o preditor prevê a partir das colunas brutas (prever / prever_linha);
+    # a árvore (se conferir com o sklearn no X_teste) e o SVM de kernel linear usam os modos compilados.
+    # 'svm_incremental' é treinado lendo o CSV em blocos (oficina/treino_em_blocos.py); 'pipeline_arvore' e
+    # 'pipeline_svm' são o pipeline único sobre as colunas brutas (oficina/pipeline.py).
+    # Lança FileNotFoundError se o CSV de treino não existir.
+    modelos = {}
+    if 'svm_incremental' in nomes:
+        from oficina.treino_em_blocos import obter_svm_incremental # Import local: treino_em_blocos importa este módulo
+        artefato_incremental = obter_svm_incremental(caminho_dados)
+        modelos['svm_incremental'] = PreditorCodificado(artefato_incremental['modelo'],
+                                                        CodificadorOficina.do_artefato(artefato_incremental))
+    if not {'arvore', 'svm', 'ensemble', 'svm_aproximado', 'pipeline_arvore', 'pipeline_svm'} & set(nomes):
+        return modelos # Não precisa carregar o CSV de treino
+
+    from oficina.cache_binario import carregar_dados_codificados # Import local: cache_binario importa este módulo
+    dados = carregar_dados_codificados(caminho_dados)
+    servicos, colunas = dados.servicos, dados.colunas
+    # Representação compacta: só os índices da divisão treino/teste, e a matriz CSR de cada modelo montada das colunas
+    indices_treino, indices_teste, y_treino, y_teste = dados.dividir()
+    verificacao = dados.linhas_brutas(indices_teste)
+
+    if 'arvore' in nomes:
+        modelo_arvore = obter_arvore(dados.matriz_arvore(indices_treino), y_treino, servicos, caminho_dados,
+                                     colunas=colunas)['modelo']
+        codificador = CodificadorOficina(colunas)
+        modelos['arvore'] = (compilar_arvore(modelo_arvore, codificador, *verificacao)
+                             or PreditorCodificado(modelo_arvore, codificador))
+    if {'svm', 'svm_aproximado', 'ensemble'} & set(nomes):
+        X_treino = dados.matriz_esparsa(indices_treino, np.float64)
+    if 'svm' in nomes:
+        artefato_svm = obter_svm(X_treino, y_treino, servicos, caminho_dados, colunas=colunas)
+        codificador_svm = CodificadorOficina.do_artefato(artefato_svm)
+        modelos['svm'] = (compilar_se_linear(artefato_svm['modelo'], codificador_svm)
+                          or PreditorCodificado(artefato_svm['modelo'], codificador_svm))
+    if 'svm_aproximado' in nomes:
+        modelos['svm_aproximado'] = PreditorCodificado(
+            obter_svm_aproximado(X_treino, y_treino, servicos, caminho_dados, colunas=colunas)['modelo'],
+            CodificadorOficina(colunas))
+    if 'ensemble' in nomes:
+        modelos['ensemble'] = obter_ensemble(X_treino, y_treino, servicos, caminho_dados, colunas=colunas)['modelo']
+    nomes_pipeline = [nome for nome in ('arvore', 'svm') if f'pipeline_{nome}' in nomes]
+    if nomes_pipeline:
+        X_treino_bruto = matriz_bruta(*dados.linhas_brutas(indices_treino))
+        for nome_modelo in nomes_pipeline:
+            modelos[f'pipeline_{nome_modelo}'] = PipelineOficina(
+                obter_pipeline(nome_modelo, X_treino_bruto, y_treino, servicos, caminho_dados)['modelo'], *verificacao)
+    return modelos
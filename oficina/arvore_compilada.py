@@ -0,0 +1,135 @@
+# Forma exportada da Árvore de Decisão treinada: arrays planos feature/threshold/filhos/classe por nó.
+# Uma linha é percorrida sem pandas nem codificação (a coluna one-hot de um nó vale 1 só se for a do serviço
+# da entrada); um lote é avaliado de forma vetorizada, um nível da árvore por vez.
+import numpy as np
+
+FOLHA = -1 # Valor de children_left/children_right nas folhas do sklearn
+
+
+class ArvoreCompilada:
+    def __init__(self, feature, threshold, filhos_esquerda, filhos_direita, classe_no, classes, colunas,
+                 indices_numericos, indice_servico):
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.filhos_esquerda = np.asarray(filhos_esquerda, dtype=np.intp)
+        self.filhos_direita = np.asarray(filhos_direita, dtype=np.intp)
+        self.classe_no = np.asarray(classe_no, dtype=np.intp) # Índice em classes da classe prevista em cada nó
+        self.classes = np.asarray(classes)
+        self.colunas = list(colunas)
+        self.indices_numericos = np.asarray(indices_numericos, dtype=np.intp)
+        self.indice_servico = dict(indice_servico) # serviço -> índice da coluna one-hot
+
+        # Para cada coluna: posição entre as cinco numéricas, ou -1 se for uma coluna one-hot de serviço
+        self.posicao_numerica_coluna = np.full(len(self.colunas), -1, dtype=np.intp)
+        self.posicao_numerica_coluna[self.indices_numericos] = np.arange(len(self.indices_numericos))
+        self.eh_folha = self.filhos_esquerda == FOLHA
+        self.profundidade = self._calcular_profundidade()
+        # Listas Python são mais rápidas que arrays NumPy no laço de uma única linha
+        self._no_lista = (self.feature.tolist(), self.threshold.tolist(), self.filhos_esquerda.tolist(),
+                          self.filhos_direita.tolist(), self.posicao_numerica_coluna.tolist())
+
+    @classmethod
+    def do_modelo(cls, modelo_arvore, codificador):
+        # modelo_arvore: DecisionTreeClassifier treinado no layout de colunas do codificador
+        estrutura = modelo_arvore.tree_
+        classe_no = np.argmax(estrutura.value[:, 0, :], axis=1) # Empate: primeira classe, como no predict
+        return cls(estrutura.feature, estrutura.threshold, estrutura.children_left, estrutura.children_right,
+                   classe_no, modelo_arvore.classes_, codificador.colunas, codificador.indices_numericos,
+                   codificador.indice_servico)
+
+    def _calcular_profundidade(self):
+        profundidade = 0
+        nivel = np.array([0])
+        while nivel.size:
+            internos = nivel[~self.eh_folha[nivel]]
+            if not internos.size:
+                break
+            profundidade += 1
+            nivel = np.concatenate([self.filhos_esquerda[internos], self.filhos_direita[internos]])
+        return profundidade
+
+    def salvar(self, caminho):
+        np.savez(caminho, feature=self.feature, threshold=self.threshold, filhos_esquerda=self.filhos_esquerda,
+                 filhos_direita=self.filhos_direita, classe_no=self.classe_no, classes=self.classes,
+                 colunas=np.array(self.colunas), indices_numericos=self.indices_numericos,
+                 servicos=np.array(list(self.indice_servico)), indices_servico=np.array(list(self.indice_servico.values())))
+
+    @classmethod
+    def carregar(cls, caminho):
+        with np.load(caminho) as arrays:
+            return cls(arrays['feature'], arrays['threshold'], arrays['filhos_esquerda'], arrays['filhos_direita'],
+                       arrays['classe_no'], arrays['classes'], arrays['colunas'].tolist(), arrays['indices_numericos'],
+                       zip(arrays['servicos'].tolist(), arrays['indices_servico'].tolist()))
+
+    def novo_buffer(self, n_linhas=1):
+        # Mantém a interface dos outros preditores; a árvore compilada não precisa de buffer
+        return None
+
+    def prever_linha(self, servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao):
+        feature, threshold, esquerda, direita, posicao_numerica = self._no_lista
+        # O sklearn converte a entrada para float32 antes de comparar com o threshold (float64)
+        numericos = np.array((valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao),
+                             dtype=np.float32).tolist()
+        coluna_servico = self.indice_servico.get(servico, -1)
+        no = 0
+        while esquerda[no] != FOLHA:
+            coluna = feature[no]
+            posicao = posicao_numerica[coluna]
+            valor = numericos[posicao] if posicao >= 0 else (1.0 if coluna == coluna_servico else 0.0)
+            no = esquerda[no] if valor <= threshold[no] else direita[no]
+        return self.classes[self.classe_no[no]]
+
+    def _percorrer(self, n_linhas, valor_no):
+        # valor_no(linhas, colunas) devolve o valor de cada linha na coluna do seu nó atual.
+        # A cada nível só as linhas que ainda não chegaram a uma folha são avançadas.
+        nos = np.zeros(n_linhas, dtype=np.intp)
+        ativas = np.arange(n_linhas)
+        for _ in range(self.profundidade):
+            ativas = ativas[~self.eh_folha[nos[ativas]]]
+            if not ativas.size:
+                break
+            nos_ativos = nos[ativas]
+            vai_esquerda = valor_no(ativas, self.feature[nos_ativos]) <= self.threshold[nos_ativos]
+            nos[ativas] = np.where(vai_esquerda, self.filhos_esquerda[nos_ativos], self.filhos_direita[nos_ativos])
+        return self.classes[self.classe_no[nos]]
+
+    def prever(self, servicos, valores_numericos, buffer=None):
+        numericos = np.asarray(valores_numericos, dtype=np.float32)
+        colunas_servico = np.fromiter((self.indice_servico.get(servico, -1) for servico in servicos),
+                                      dtype=np.intp, count=len(numericos))
+        posicao_numerica = self.posicao_numerica_coluna
+
+        def valor_no(linhas, colunas):
+            posicoes = posicao_numerica[colunas]
+            valores_numericos_no = numericos[linhas, np.maximum(posicoes, 0)]
+            return np.where(posicoes >= 0, valores_numericos_no, (colunas_servico[linhas] == colunas).astype(np.float32))
+
+        return self._percorrer(len(numericos), valor_no)
+
+    def prever_matriz(self, X):
+        # X já codificado no layout das colunas (ex.: X_teste); mesmo resultado de modelo.predict(X)
+        X = np.asarray(X, dtype=np.float32)
+
+        def valor_no(linhas, colunas):
+            return X[linhas, colunas]
+
+        return self._percorrer(len(X), valor_no)
+
+    def divergencias(self, modelo_arvore, codificador, servicos, valores_numericos):
+        # Número de linhas em que a árvore compilada (entrada bruta, matriz codificada ou linha a linha)
+        # discorda do DecisionTreeClassifier.predict (esperado: 0)
+        X = codificador.codificar(servicos, valores_numericos)
+        esperado = modelo_arvore.predict(X)
+        por_linha = np.array([self.prever_linha(servico, *valores) for servico, valores
+                              in zip(servicos, np.asarray(valores_numericos).tolist())], dtype=self.classes.dtype)
+        return int(np.sum((self.prever(servicos, valores_numericos) != esperado)
+                          | (self.prever_matriz(X) != esperado) | (por_linha.reshape(esperado.shape) != esperado)))
+
+
+def compilar_arvore(modelo_arvore, codificador, servicos_verificacao, numericos_verificacao):
+    # Compila e confere contra o predict do sklearn nas entradas de verificação (ex.: as linhas do X_teste);
+    # retorna None se houver qualquer divergência, para quem chama manter o caminho do sklearn
+    arvore_compilada = ArvoreCompilada.do_modelo(modelo_arvore, codificador)
+    if arvore_compilada.divergencias(modelo_arvore, codificador, servicos_verificacao, numericos_verificacao):
+        return None
+    return arvore_compilada
@@ -0,0 +1,281 @@
+# Atualização incremental com as novas avaliações (Avaliacao_Cliente) que chegam ao longo do dia, sem
+# reiniciar o programa. Cada lote de linhas avaliadas:
+#   1. é comparado com a previsão do modelo atual, antes de aprender (acurácia usada para detectar deriva): só
+#      linhas que ainda não passaram pelo partial_fit entram na acurácia
+#   2. vai para o log de espera (<csv sem extensão>.avaliacoes.csv, no esquema do CSV de treino)
+#   3. entra no StandardScaler (partial_fit) e no SVM linear incremental (SGDClassifier.partial_fit)
+#      do artefato 'svm_incremental', sem refazer o treino
+# O aprendizado é feito em cópias do escalonador e do modelo, e o preditor novo substitui o antigo em uma única
+# atribuição: quem está prevendo nunca vê um modelo pela metade nem espera o treino.
+# O retreino completo (Árvore, SVM e svm_incremental no CSV de treino + log) só acontece quando:
+#   - o log acumula limite_linhas desde o último retreino
+#   - a acurácia das últimas janela avaliações cai limite_queda abaixo da referência: a acurácia do artefato nas
+#     linhas de teste que o treino em blocos deixa de fora (oficina/treino_em_blocos.py)
+#   - aparecem notas que o modelo não conhece, ou limite_servicos_novos serviços fora do layout das colunas
+# Ele roda em outro processo (retreinar_completo), incorpora o log ao CSV de treino e os modelos novos
+# entram no lugar dos antigos quando ficam prontos. No servidor: --atualizacao-incremental e POST /avaliacoes.
+#
+# Uso: python -m oficina.atualizacao_incremental novas_avaliacoes.csv [--dados-treino oficina_Britt.csv]
+import argparse
+import copy
+import os
+import shutil
+import sys
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from oficina.dados import ARQUIVO_DADOS, COLUNA_ALVO, COLUNA_SERVICO, COLUNAS_NUMERICAS, carregar_dados
+from oficina.codificador import CodificadorOficina, PreditorCodificado
+from oficina.artefatos import MODELOS_PADRAO, carregar_modelos, escrever_atomicamente
+from oficina.treino_em_blocos import obter_svm_incremental
+from oficina.instrumentacao import etapa
+
+LIMITE_LINHAS_RETREINO = 500 # Linhas no log que disparam o retreino completo
+JANELA_DERIVA = 200 # Avaliações usadas para medir a acurácia recente
+LIMITE_QUEDA_ACURACIA = 0.10 # Queda (absoluta) da acurácia recente em relação à referência
+LIMITE_SERVICOS_NOVOS = 10 # Serviços fora do layout das colunas: o SGD não tem peso para eles até o retreino
+FORMATO_NUMEROS_LOG = '%.10g' # 85000 e não 85000.0 no log (que depois vai para o CSV de treino)
+
+
+def caminho_log_padrao(caminho_dados):
+    return os.path.splitext(caminho_dados)[0] + '.avaliacoes.csv'
+
+
+def colunas_csv(caminho_dados):
+    # Ordem das colunas do CSV de treino, para o log poder ser anexado direto a ele
+    return pd.read_csv(caminho_dados, nrows=0).columns.str.strip().tolist()
+
+
+class RegistroAvaliacoes:
+    # Log de espera: CSV só de acréscimos com as linhas avaliadas que ainda não estão no CSV de treino.
+    # Ao começar um retreino, o log é renomeado para <log>.incorporando e as avaliações seguintes vão
+    # para um log novo; o retreino anexa o arquivo separado ao CSV de treino e o apaga.
+    def __init__(self, caminho, colunas):
+        self.caminho = caminho
+        self.caminho_incorporando = os.path.splitext(caminho)[0] + '.incorporando.csv'
+        self.colunas = list(colunas)
+
+    def anexar(self, dataframe):
+        novo = not os.path.exists(self.caminho) or os.path.getsize(self.caminho) == 0
+        with open(self.caminho, 'a', encoding='utf-8', newline='') as arquivo:
+            dataframe[self.colunas].to_csv(arquivo, header=novo, index=False, float_format=FORMATO_NUMEROS_LOG)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+
+    def ler(self):
+        # Linhas ainda fora do CSV de treino: primeiro as de um retreino que não terminou, depois as do log
+        partes = [carregar_dados(caminho) for caminho in (self.caminho_incorporando, self.caminho)
+                  if os.path.exists(caminho) and os.path.getsize(caminho) > 0]
+        return pd.concat(partes, ignore_index=True) if partes else None
+
+    def separar(self):
+        # Retorna o arquivo que o retreino deve incorporar (ou None se não há linhas novas)
+        if not os.path.exists(self.caminho):
+            return self.caminho_incorporando if os.path.exists(self.caminho_incorporando) else None
+        if not os.path.exists(self.caminho_incorporando):
+            os.replace(self.caminho, self.caminho_incorporando)
+            return self.caminho_incorporando
+        # Sobrou um arquivo de um retreino que falhou: o log atual vai para o fim dele
+        with open(self.caminho, 'rb') as log, open(self.caminho_incorporando, 'ab') as incorporando:
+            log.readline() # Cabeçalho
+            shutil.copyfileobj(log, incorporando)
+            incorporando.flush()
+            os.fsync(incorporando.fileno())
+        os.remove(self.caminho)
+        return self.caminho_incorporando
+
+
+def incorporar_avaliacoes(caminho_dados, caminho_avaliacoes):
+    # Reescreve o CSV de treino (de forma atômica) com as linhas do log no final e apaga o log.
+    # Se o processo cair entre as duas coisas, as linhas do log entram duas vezes no próximo retreino.
+    def escrever(arquivo):
+        with open(caminho_dados, 'rb') as dados:
+            shutil.copyfileobj(dados, arquivo)
+            if dados.tell() > 0:
+                dados.seek(-1, os.SEEK_END)
+                if dados.read(1) != b'\n':
+                    arquivo.write(b'\n')
+        with open(caminho_avaliacoes, 'rb') as avaliacoes:
+            avaliacoes.readline() # Cabeçalho
+            shutil.copyfileobj(avaliacoes, arquivo)
+
+    escrever_atomicamente(caminho_dados, escrever)
+    os.remove(caminho_avaliacoes)
+
+
+def retreinar_completo(caminho_dados, caminho_avaliacoes, nomes=MODELOS_PADRAO):
+    # Roda em outro processo: junta o log ao CSV de treino, deixa o artefato 'svm_incremental' do CSV novo
+    # salvo (o processo principal o recarrega) e retorna {nome: preditor} dos demais modelos retreinados
+    if caminho_avaliacoes is not None:
+        incorporar_avaliacoes(caminho_dados, caminho_avaliacoes)
+    obter_svm_incremental(caminho_dados)
+    return carregar_modelos(caminho_dados, [nome for nome in nomes if nome != 'svm_incremental'])
+
+
+class MonitorDeriva:
+    # Acurácia "antes de aprender" das últimas janela avaliações. A referência é a acurácia no teste guardada
+    # no artefato; em artefatos sem ela, a da primeira janela completa depois do último (re)carregamento.
+    def __init__(self, janela=JANELA_DERIVA):
+        self.janela = max(1, janela)
+        self.reiniciar()
+
+    def reiniciar(self, referencia=None):
+        self.acertos = deque(maxlen=self.janela)
+        self.referencia = referencia
+
+    def observar(self, acertos):
+        self.acertos.extend(np.asarray(acertos, dtype=bool).tolist())
+        if self.referencia is None and len(self.acertos) == self.janela:
+            self.referencia = self.acuracia()
+
+    def acuracia(self):
+        return sum(self.acertos) / len(self.acertos) if self.acertos else None
+
+    def queda(self):
+        # Só com a janela completa: poucas avaliações não bastam para comparar com a referência
+        if self.referencia is None or len(self.acertos) < self.janela:
+            return 0.0
+        return self.referencia - self.acuracia()
+
+
+class AtualizadorIncremental:
+    # Mantém o SVM linear incremental em dia com as avaliações novas e decide quando retreinar tudo.
+    # registrar() deve ser chamado de uma thread só por vez; self.preditor pode ser lido de qualquer thread.
+    def __init__(self, caminho_dados=ARQUIVO_DADOS, caminho_log=None, limite_linhas=LIMITE_LINHAS_RETREINO,
+                 janela=JANELA_DERIVA, limite_queda=LIMITE_QUEDA_ACURACIA, limite_servicos_novos=LIMITE_SERVICOS_NOVOS):
+        self.caminho_dados = caminho_dados
+        self.registro = RegistroAvaliacoes(caminho_log or caminho_log_padrao(caminho_dados), colunas_csv(caminho_dados))
+        self.limite_linhas = limite_linhas
+        self.limite_queda = limite_queda
+        self.limite_servicos_novos = limite_servicos_novos
+        self.monitor = MonitorDeriva(janela)
+        self.retreino_em_andamento = False
+        self.retreinos = 0
+        self.recarregar()
+
+    def recarregar(self):
+        # (Re)começa do artefato 'svm_incremental' do CSV de treino e reaplica as linhas que estão no log
+        artefato = obter_svm_incremental(self.caminho_dados)
+        self.codificador = CodificadorOficina(artefato['colunas'])
+        self.escalonador = artefato['escalonador']
+        self.modelo = artefato['modelo']
+        self.preditor = PreditorCodificado(self.modelo, self.codificador.com_escalonador(self.escalonador))
+        self.linhas_pendentes = 0
+        self.servicos_novos = set()
+        self.notas_novas = set()
+        self.monitor.reiniciar(artefato.get('acuracia_teste'))
+
+        pendentes = self.registro.ler()
+        if pendentes is not None:
+            self._aprender(pendentes[COLUNA_SERVICO].to_numpy(dtype=object),
+                           pendentes[COLUNAS_NUMERICAS].to_numpy(np.float64), pendentes[COLUNA_ALVO].to_numpy())
+
+    def _aprender(self, servicos, numericos, notas):
+        conhecidas = np.isin(notas, self.modelo.classes_)
+        self.notas_novas.update(notas[~conhecidas].tolist())
+        self.servicos_novos.update(servico for servico in servicos if servico not in self.codificador.indice_servico)
+
+        # Cópias: o preditor em uso continua apontando para o escalonador e o modelo antigos
+        escalonador, modelo = copy.deepcopy(self.escalonador), copy.deepcopy(self.modelo)
+        with etapa('partial_fit_incremental', len(notas)):
+            escalonador.partial_fit(self.codificador.codificar(servicos, numericos))
+            codificador_escalonado = self.codificador.com_escalonador(escalonador)
+            if conhecidas.any():
+                modelo.partial_fit(codificador_escalonado.codificar(servicos[conhecidas], numericos[conhecidas]),
+                                   notas[conhecidas])
+        self.escalonador, self.modelo = escalonador, modelo
+        self.preditor = PreditorCodificado(modelo, codificador_escalonado) # Troca atômica
+        self.linhas_pendentes += len(notas)
+
+    def registrar(self, servicos, numericos, notas):
+        # Registra linhas avaliadas e retorna o preditor atualizado
+        servicos = np.asarray(servicos, dtype=object)
+        numericos = np.asarray(numericos, dtype=np.float64).reshape(-1, len(COLUNAS_NUMERICAS))
+        notas = np.asarray(notas)
+        if not len(notas):
+            return self.preditor
+
+        self.monitor.observar(self.preditor.prever(servicos, numericos) == notas) # Antes do _aprender destas linhas
+        linhas = pd.DataFrame(numericos, columns=COLUNAS_NUMERICAS)
+        linhas.insert(0, COLUNA_SERVICO, servicos)
+        linhas[COLUNA_ALVO] = notas
+        self.registro.anexar(linhas)
+        self._aprender(servicos, numericos, notas)
+        return self.preditor
+
+    def motivo_retreino(self):
+        # Texto com o motivo para um retreino completo, ou None se ainda não é preciso
+        if self.notas_novas:
+            return f"notas fora das classes do modelo: {sorted(self.notas_novas)}"
+        if len(self.servicos_novos) >= self.limite_servicos_novos:
+            return f"{len(self.servicos_novos)} serviços fora do layout das colunas"
+        if self.linhas_pendentes >= self.limite_linhas:
+            return f"{self.linhas_pendentes} linhas no log (limite {self.limite_linhas})"
+        if self.monitor.queda() >= self.limite_queda:
+            return (f"acurácia recente {self.monitor.acuracia() * 100:.1f}% contra "
+                    f"{self.monitor.referencia * 100:.1f}% de referência")
+        return None
+
+    def iniciar_retreino(self):
+        # Separa o log para o retreino; as avaliações seguintes vão para um log novo
+        self.retreino_em_andamento = True
+        return self.registro.separar()
+
+    def concluir_retreino(self):
+        # Depois de retreinar_completo: recomeça do artefato novo (as linhas do log novo são reaplicadas)
+        self.recarregar()
+        self.retreinos += 1
+        self.retreino_em_andamento = False
+        return self.preditor
+
+    def cancelar_retreino(self):
+        # O arquivo separado continua no disco e entra no próximo retreino
+        self.retreino_em_andamento = False
+
+    def estatisticas(self):
+        acuracia_recente = self.monitor.acuracia()
+        return {'linhas_pendentes': self.linhas_pendentes, 'acuracia_recente': acuracia_recente,
+                'acuracia_referencia': self.monitor.referencia, 'servicos_novos': len(self.servicos_novos),
+                'notas_novas': sorted(self.notas_novas), 'retreino_em_andamento': self.retreino_em_andamento,
+                'retreinos': self.retreinos}
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Aplica novas avaliações ao SVM incremental e retreina se preciso.")
+    parser.add_argument('avaliacoes', help="CSV com as colunas de entrada e Avaliacao_Cliente")
+    parser.add_argument('--dados-treino', default=ARQUIVO_DADOS)
+    parser.add_argument('--limite-linhas', type=int, default=LIMITE_LINHAS_RETREINO)
+    parser.add_argument('--sem-retreino', action='store_true', help="Só registra e aprende, mesmo se um limite for cruzado")
+    args = parser.parse_args(argumentos)
+
+    try:
+        atualizador = AtualizadorIncremental(args.dados_treino, limite_linhas=args.limite_linhas)
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.dados_treino}' não foi encontrado.")
+        return 1
+    try:
+        avaliacoes = carregar_dados(args.avaliacoes)
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.avaliacoes}' não foi encontrado.")
+        return 1
+
+    atualizador.registrar(avaliacoes[COLUNA_SERVICO].to_numpy(dtype=object),
+                          avaliacoes[COLUNAS_NUMERICAS].to_numpy(np.float64), avaliacoes[COLUNA_ALVO].to_numpy())
+    estatisticas = atualizador.estatisticas()
+    print(f"{len(avaliacoes)} avaliações registradas em '{atualizador.registro.caminho}'; "
+          f"{estatisticas['linhas_pendentes']} linhas aguardando o retreino completo.")
+
+    motivo = atualizador.motivo_retreino()
+    if motivo is None or args.sem_retreino:
+        return 0
+    print(f"Retreino completo: {motivo}")
+    retreinar_completo(args.dados_treino, atualizador.iniciar_retreino())
+    atualizador.concluir_retreino()
+    print(f"Avaliações incorporadas a '{args.dados_treino}' e modelos retreinados.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+# Cache binário do CSV de treino já limpo, gravado ao lado do CSV (oficina_Britt.cache/) na representação
+# compacta (oficina/dados_compactos.py):
+#   servicos.npy        código de cada linha na lista de serviços (int16, ou int32 com mais de 32767 serviços)
+#   <coluna>.npy        uma por coluna numérica: preços e horas em float32, quilometragem em int32, ano em int16
+#   y.npy               Avaliacao_Cliente no menor inteiro que a comporta
+#   meta.json           layout das colunas, serviços, colunas originais, tamanho/mtime e hash do CSV
+#   X.npy               matriz densa do pd.get_dummies (float64), gravada só se alguém pedir X_features_codificadas
+# Nas execuções seguintes os arrays são mapeados do disco (np.load com mmap_mode='r'), em vez de read_csv + strip +
+# get_dummies; o menu e os scripts treinam e preveem sobre a matriz CSR montada dessas colunas. O cache vale
+# enquanto tamanho e mtime do CSV forem os mesmos; se só o mtime mudar, o hash do conteúdo decide se ele é refeito.
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from oficina.dados import ARQUIVO_DADOS, COLUNA_ALVO, COLUNAS_NUMERICAS
+from oficina.dados_compactos import TAMANHO_BLOCO_COMPACTO, DadosCompactos, ler_csv_compacto
+from oficina.artefatos import hash_arquivo, escrever_atomicamente
+from oficina.instrumentacao import etapa
+
+VERSAO_CACHE = 2 # Incrementar sempre que o conteúdo do cache mudar de estrutura
+TAMANHO_BLOCO_CACHE = TAMANHO_BLOCO_COMPACTO
+LINHAS_POR_BLOCO_DENSO = 65_536 # Linhas da matriz densa escritas por vez em X.npy
+ARQUIVO_METADADOS = 'meta.json'
+ARQUIVO_DENSO = 'X.npy'
+
+
+def diretorio_cache(caminho_dados):
+    return os.path.splitext(caminho_dados)[0] + '.cache'
+
+
+class DadosCodificados(DadosCompactos):
+    # Dados de treino mapeados do cache (somente leitura). Para treinar: dividir() e matriz_esparsa(indices);
+    # y_alvo aponta direto para o array mapeado
+    def __init__(self, diretorio, codigos_servico, numericas, y, metadados):
+        super().__init__(metadados['servicos'], codigos_servico, numericas, y)
+        self.diretorio = diretorio
+        self.nomes_colunas_originais = metadados['colunas_originais']
+        self.y_alvo = pd.Series(y, name=COLUNA_ALVO, copy=False)
+        self._X = None
+
+    @property
+    def X_features_codificadas(self):
+        # Matriz densa do get_dummies, como DataFrame sem cópia sobre X.npy. Só existe para quem ainda precisa
+        # dela: na primeira vez é escrita em blocos a partir das colunas compactas (linhas x colunas x 8 bytes)
+        if self._X is None:
+            caminho_denso = os.path.join(self.diretorio, ARQUIVO_DENSO)
+            if not os.path.exists(caminho_denso):
+                with etapa('montar_matriz_densa', len(self)):
+                    gravar_matriz_densa(self, caminho_denso)
+            self._X = np.load(caminho_denso, mmap_mode='r')
+        return pd.DataFrame(self._X, columns=self.colunas, copy=False)
+
+
+def gravar_matriz_densa(dados, caminho):
+    descritor, caminho_temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), prefix='.tmp-', suffix='.npy')
+    os.close(descritor)
+    try:
+        X = np.lib.format.open_memmap(caminho_temporario, mode='w+', dtype=np.float64, shape=(len(dados), len(dados.colunas)))
+        for inicio in range(0, len(dados), LINHAS_POR_BLOCO_DENSO):
+            indices = np.arange(inicio, min(inicio + LINHAS_POR_BLOCO_DENSO, len(dados)))
+            X[inicio:inicio + len(indices)] = dados.matriz_esparsa(indices, np.float64).toarray()
+        X.flush()
+        del X
+        os.chmod(caminho_temporario, 0o644)
+        os.replace(caminho_temporario, caminho)
+    except BaseException:
+        os.unlink(caminho_temporario)
+        raise
+
+
+def ler_metadados(diretorio):
+    try:
+        with open(os.path.join(diretorio, ARQUIVO_METADADOS), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def gravar_metadados(metadados, diretorio):
+    conteudo = json.dumps(metadados, indent=2, ensure_ascii=False).encode('utf-8')
+    escrever_atomicamente(os.path.join(diretorio, ARQUIVO_METADADOS), lambda arquivo: arquivo.write(conteudo))
+
+
+def cache_valido(metadados, caminho_dados, diretorio):
+    if metadados is None or metadados.get('versao') != VERSAO_CACHE:
+        return False
+    estado = os.stat(caminho_dados)
+    assinatura = [estado.st_size, estado.st_mtime_ns]
+    if metadados['assinatura'] == assinatura:
+        return True
+    if estado.st_size != metadados['assinatura'][0] or hash_arquivo(caminho_dados) != metadados['hash']:
+        return False
+    metadados['assinatura'] = assinatura # O CSV só foi tocado (mesmo conteúdo)
+    gravar_metadados(metadados, diretorio)
+    return True
+
+
+def _salvar_npy(caminho, array):
+    escrever_atomicamente(caminho, lambda arquivo: np.save(arquivo, array))
+
+
+def construir_cache(caminho_dados=ARQUIVO_DADOS, diretorio=None, tamanho_bloco=TAMANHO_BLOCO_CACHE):
+    # Uma passada em blocos pelo CSV (oficina/dados_compactos.py: ler_csv_compacto), sem montar a matriz do get_dummies
+    diretorio = diretorio_cache(caminho_dados) if diretorio is None else diretorio
+    os.makedirs(diretorio, exist_ok=True)
+    for nome_arquivo in (ARQUIVO_METADADOS, ARQUIVO_DENSO): # Invalida o cache antigo antes de sobrescrever
+        try:
+            os.remove(os.path.join(diretorio, nome_arquivo))
+        except FileNotFoundError:
+            pass
+    hash_conteudo = hash_arquivo(caminho_dados)
+    estado = os.stat(caminho_dados)
+
+    colunas_originais = [nome.strip() for nome in pd.read_csv(caminho_dados, nrows=0).columns if nome.strip() != COLUNA_ALVO]
+    compactos = ler_csv_compacto(caminho_dados, tamanho_bloco)
+    _salvar_npy(os.path.join(diretorio, 'servicos.npy'), compactos.codigos_servico)
+    for nome in COLUNAS_NUMERICAS:
+        _salvar_npy(os.path.join(diretorio, f'{nome}.npy'), compactos.numericas[nome])
+    _salvar_npy(os.path.join(diretorio, 'y.npy'), compactos.y)
+
+    # meta.json é gravado por último: sem ele, o cache é considerado inválido
+    metadados = {'versao': VERSAO_CACHE, 'assinatura': [estado.st_size, estado.st_mtime_ns], 'hash': hash_conteudo,
+                 'linhas': len(compactos), 'colunas': compactos.colunas, 'servicos': compactos.servicos,
+                 'colunas_originais': colunas_originais}
+    gravar_metadados(metadados, diretorio)
+    return metadados
+
+
+def abrir_cache(diretorio, metadados):
+    codigos_servico = np.load(os.path.join(diretorio, 'servicos.npy'), mmap_mode='r')
+    numericas = {nome: np.load(os.path.join(diretorio, f'{nome}.npy'), mmap_mode='r') for nome in COLUNAS_NUMERICAS}
+    y = np.load(os.path.join(diretorio, 'y.npy'), mmap_mode='r')
+    return DadosCodificados(diretorio, codigos_servico, numericas, y, metadados)
+
+
+def carregar_dados_codificados(caminho_dados=ARQUIVO_DADOS, diretorio=None):
+    # Equivalente a carregar_dados + separar_alvo + codificar_features, a partir do cache binário
+    # (construído na primeira chamada ou quando o CSV muda). Lança FileNotFoundError se o CSV não existir.
+    diretorio = diretorio_cache(caminho_dados) if diretorio is None else diretorio
+    metadados = ler_metadados(diretorio)
+    if not cache_valido(metadados, caminho_dados, diretorio):
+        with etapa('montar_cache_binario') as medicao:
+            metadados = construir_cache(caminho_dados, diretorio)
+            medicao.registrar_linhas(metadados['linhas'])
+    with etapa('abrir_cache_binario', metadados['linhas']):
+        return abrir_cache(diretorio, metadados)
@@ -0,0 +1,109 @@
+# Cache LRU de previsões para orçamentos repetidos (mesmo serviço, preço, quilometragem...).
+# A chave é a entrada bruta normalizada: 'Servico' sem espaços nas pontas e as cinco numéricas arredondadas
+# para casas_decimais. O modelo recebe a mesma entrada normalizada, então uma previsão em cache é sempre
+# igual à que o modelo daria para essa chave. O cache se esvazia sozinho quando o preditor muda (modelo
+# retreinado ou recarregado vira outro objeto).
+from collections import OrderedDict
+
+import numpy as np
+
+CAPACIDADE_PADRAO = 4096 # Entradas distintas mantidas; a menos usada recentemente sai primeiro
+CASAS_DECIMAIS_PADRAO = 2 # Centavos nos valores; quilometragem e ano já são inteiros
+
+_AUSENTE = object()
+
+
+class CachePrevisoes:
+    def __init__(self, capacidade=CAPACIDADE_PADRAO, casas_decimais=CASAS_DECIMAIS_PADRAO):
+        self.capacidade = max(1, capacidade)
+        self.casas_decimais = casas_decimais
+        self.entradas = OrderedDict() # chave normalizada -> previsão, da menos para a mais recente
+        self.acertos = 0
+        self.faltas = 0
+        self.invalidacoes = 0
+        self._preditor = None # Preditor que gerou as previsões guardadas
+
+    def normalizar(self, servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao):
+        # + 0.0 junta -0.0 e 0.0 na mesma chave
+        casas = self.casas_decimais
+        return (str(servico).strip(), round(float(valor_pecas), casas) + 0.0, round(float(valor_mao_obra), casas) + 0.0,
+                round(float(tempo_horas), casas) + 0.0, round(float(quilometragem), casas) + 0.0,
+                round(float(ano_fabricacao), casas) + 0.0)
+
+    def _conferir_preditor(self, preditor):
+        if preditor is not self._preditor:
+            if self.entradas:
+                self.invalidacoes += 1
+            self.entradas.clear()
+            self._preditor = preditor
+
+    def invalidar(self):
+        self._conferir_preditor(None)
+
+    def _guardar(self, chave, previsao):
+        self.entradas[chave] = previsao
+        if len(self.entradas) > self.capacidade:
+            self.entradas.popitem(last=False)
+
+    def prever_linha(self, preditor, servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao):
+        self._conferir_preditor(preditor)
+        chave = self.normalizar(servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao)
+        previsao = self.entradas.get(chave, _AUSENTE)
+        if previsao is not _AUSENTE:
+            self.entradas.move_to_end(chave)
+            self.acertos += 1
+            return previsao
+        self.faltas += 1
+        previsao = preditor.prever_linha(*chave)
+        self._guardar(chave, previsao)
+        return previsao
+
+    def prever(self, preditor, servicos, valores_numericos, buffer=None):
+        # Lote: só as linhas fora do cache vão para o modelo, em uma única chamada de prever
+        self._conferir_preditor(preditor)
+        chaves = [self.normalizar(servico, *valores) for servico, valores
+                  in zip(servicos, np.asarray(valores_numericos, dtype=np.float64).tolist())]
+        previsoes = [self.entradas.get(chave, _AUSENTE) for chave in chaves]
+        faltantes = {}
+        for indice, (chave, previsao) in enumerate(zip(chaves, previsoes)):
+            if previsao is _AUSENTE:
+                faltantes.setdefault(chave, []).append(indice)
+            else:
+                self.entradas.move_to_end(chave)
+        self.faltas += len(faltantes)
+        self.acertos += len(chaves) - len(faltantes)
+
+        if faltantes:
+            chaves_faltantes = list(faltantes)
+            novas = preditor.prever([chave[0] for chave in chaves_faltantes],
+                                    np.array([chave[1:] for chave in chaves_faltantes], dtype=np.float64),
+                                    buffer if buffer is None or len(buffer) >= len(chaves_faltantes) else None)
+            for chave, previsao in zip(chaves_faltantes, novas.tolist()):
+                self._guardar(chave, previsao)
+                for indice in faltantes[chave]:
+                    previsoes[indice] = previsao
+        return np.array(previsoes)
+
+    def estatisticas(self):
+        consultas = self.acertos + self.faltas
+        return {'entradas': len(self.entradas), 'capacidade': self.capacidade, 'acertos': self.acertos,
+                'faltas': self.faltas, 'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+                'invalidacoes': self.invalidacoes}
+
+
+class PreditorComCache:
+    # Mesma interface dos outros preditores (novo_buffer / prever / prever_linha), com o cache na frente.
+    # Trocar self.preditor (ex.: modelo recarregado) esvazia o cache na próxima consulta.
+    def __init__(self, preditor, cache=None):
+        self.preditor = preditor
+        self.cache = CachePrevisoes() if cache is None else cache
+
+    def novo_buffer(self, n_linhas=1):
+        return self.preditor.novo_buffer(n_linhas)
+
+    def prever(self, servicos, valores_numericos, buffer=None):
+        return self.cache.prever(self.preditor, servicos, valores_numericos, buffer)
+
+    def prever_linha(self, servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao):
+        return self.cache.prever_linha(self.preditor, servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem,
+                                       ano_fabricacao)
@@ -0,0 +1,104 @@
+# Codificador pré-compilado das ordens de serviço: substitui o pd.get_dummies + reindex feito a cada previsão.
+# Guarda o mapa serviço -> índice da coluna one-hot e a ordem fixa das colunas do treino, e escreve as linhas
+# direto em um buffer NumPy. Para o SVM, o StandardScaler é embutido na própria codificação.
+import numpy as np
+
+from oficina.dados import COLUNA_SERVICO, COLUNAS_NUMERICAS
+
+
+class CodificadorOficina:
+    def __init__(self, colunas, media=None, escala=None):
+        # colunas: layout do treino (X_treino.columns), numéricas primeiro e depois 'Servico_<nome>'
+        self.colunas = list(colunas)
+        self.n_colunas = len(self.colunas)
+        posicao_coluna = {nome: indice for indice, nome in enumerate(self.colunas)}
+        self.indices_numericos = np.array([posicao_coluna[nome] for nome in COLUNAS_NUMERICAS])
+        prefixo = COLUNA_SERVICO + '_'
+        self.indice_servico = {nome[len(prefixo):]: indice for nome, indice in posicao_coluna.items()
+                               if nome.startswith(prefixo)}
+
+        # Transformação afim (x - media) / escala; sem escalonador é a identidade
+        self.media = np.zeros(self.n_colunas) if media is None else np.asarray(media, dtype=np.float64)
+        self.escala = np.ones(self.n_colunas) if escala is None else np.asarray(escala, dtype=np.float64)
+        self.linha_base = -self.media / self.escala # Valor de cada coluna quando a entrada é 0 (one-hot desligado)
+        self.valor_ativo = (1.0 - self.media) / self.escala # Valor de cada coluna one-hot ligada
+        self.media_numericas = self.media[self.indices_numericos]
+        self.escala_numericas = self.escala[self.indices_numericos]
+
+    @classmethod
+    def ajustar(cls, X_features_originais):
+        # Gera o mesmo layout de colunas que o pd.get_dummies do treino, sem precisar codificar os dados
+        servicos = sorted(X_features_originais[COLUNA_SERVICO].astype(str).unique())
+        colunas_numericas = [nome for nome in X_features_originais.columns if nome != COLUNA_SERVICO]
+        return cls(colunas_numericas + [f'{COLUNA_SERVICO}_{servico}' for servico in servicos])
+
+    @classmethod
+    def do_artefato(cls, artefato):
+        # Codificador do layout salvo no artefato, já com o escalonador embutido quando houver um
+        codificador = cls(artefato['colunas'])
+        if artefato.get('escalonador') is not None:
+            codificador = codificador.com_escalonador(artefato['escalonador'])
+        return codificador
+
+    def com_escalonador(self, escalonador):
+        # Novo codificador cuja saída já sai escalonada, equivalente a escalonador.transform(codificar(...))
+        escala = escalonador.scale_ if escalonador.scale_ is not None else np.ones(self.n_colunas)
+        # with_mean=False (escalonador ajustado na matriz esparsa): o transform não subtrai a média, mesmo tendo mean_
+        media = escalonador.mean_ if escalonador.with_mean and escalonador.mean_ is not None else np.zeros(self.n_colunas)
+        return CodificadorOficina(self.colunas, media, escala)
+
+    def novo_buffer(self, n_linhas=1):
+        return np.empty((n_linhas, self.n_colunas), dtype=np.float64)
+
+    def codificar(self, servicos, valores_numericos, saida=None):
+        # servicos: sequência de n nomes; valores_numericos: matriz n x 5 na ordem de COLUNAS_NUMERICAS.
+        # Serviços desconhecidos ficam com todas as colunas one-hot desligadas, como no reindex(fill_value=0)
+        valores_numericos = np.asarray(valores_numericos, dtype=np.float64)
+        n_linhas = len(valores_numericos)
+        saida = self.novo_buffer(n_linhas) if saida is None else saida[:n_linhas]
+
+        saida[:] = self.linha_base
+        saida[:, self.indices_numericos] = (valores_numericos - self.media_numericas) / self.escala_numericas
+        indices_colunas = np.fromiter((self.indice_servico.get(servico, -1) for servico in servicos),
+                                      dtype=np.intp, count=n_linhas)
+        linhas_conhecidas = np.flatnonzero(indices_colunas >= 0)
+        colunas_ativas = indices_colunas[linhas_conhecidas]
+        saida[linhas_conhecidas, colunas_ativas] = self.valor_ativo[colunas_ativas]
+        return saida
+
+    def codificar_linha(self, servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao,
+                        saida=None):
+        # Caminho de uma única entrada (menu e scripts): retorna uma matriz 1 x n_colunas
+        saida = self.novo_buffer() if saida is None else saida
+        linha = saida[0]
+        linha[:] = self.linha_base
+        numericos = (valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao)
+        for indice_coluna, valor, media, escala in zip(self.indices_numericos, numericos,
+                                                       self.media_numericas, self.escala_numericas):
+            linha[indice_coluna] = (valor - media) / escala
+        indice_coluna = self.indice_servico.get(servico)
+        if indice_coluna is not None:
+            linha[indice_coluna] = self.valor_ativo[indice_coluna]
+        return saida
+
+    def codificar_dataframe(self, dataframe, saida=None):
+        # Atalho para blocos lidos do CSV (colunas e 'Servico' já limpos)
+        return self.codificar(dataframe[COLUNA_SERVICO].to_numpy(), dataframe[COLUNAS_NUMERICAS].to_numpy(np.float64),
+                              saida)
+
+
+class PreditorCodificado:
+    # Modelo sklearn + codificador: prevê direto a partir das colunas brutas (serviço + cinco numéricas)
+    def __init__(self, modelo, codificador):
+        self.modelo = modelo
+        self.codificador = codificador
+
+    def novo_buffer(self, n_linhas=1):
+        return self.codificador.novo_buffer(n_linhas)
+
+    def prever(self, servicos, valores_numericos, buffer=None):
+        return self.modelo.predict(self.codificador.codificar(servicos, valores_numericos, buffer))
+
+    def prever_linha(self, servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao):
+        return self.modelo.predict(self.codificador.codificar_linha(
+            servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao))[0]
@@ -0,0 +1,179 @@
+# Comparação lado a lado dos modelos nas mesmas dobras: substitui rodar Árvore Isolada.py, SVM Puro.py e
+# SVM + Pipeline.py um depois do outro (cada um relendo o CSV e com uma divisão treino/teste diferente).
+# O CSV é lido e codificado uma única vez (cache binário, oficina/cache_binario.py); as dobras k-fold estratificadas
+# em Avaliacao_Cliente são as mesmas para todos os modelos. Cada (modelo, dobra) é uma tarefa de um pool de
+# processos, e cada processo mapeia os arrays do cache do disco, somente leitura, em vez de receber uma cópia.
+# Saída: tabela com acurácia, métricas do classification_report, tempo de treino e vazão de previsão, e o mesmo
+# conteúdo (com o relatório completo por classe) em JSON.
+#
+# Uso: python -m oficina.comparacao [--modelos arvore svm pipeline_svm] [--dobras 5] [--saida comparacao_modelos.json]
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import sklearn
+from sklearn.metrics import classification_report
+from sklearn.model_selection import StratifiedKFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer
+
+from oficina.dados import ARQUIVO_DADOS, escalonar, parametros_modelo, treinar_arvore, treinar_svm, treinar_svm_aproximado
+from oficina.artefatos import escrever_atomicamente
+from oficina.cache_binario import abrir_cache, carregar_dados_codificados, diretorio_cache, ler_metadados
+from oficina.ensemble import treinar_ensemble
+from oficina.pipeline import matriz_bruta, treinar_pipeline
+
+SEMENTE = 1
+ARQUIVO_SAIDA = 'comparacao_modelos.json'
+
+
+def _treinar_svm(X_treino, y_treino):
+    # Como no SVM Puro.py: escalonador ajustado só no treino da dobra, depois o SVC
+    modelo_svm, escalonador = treinar_svm(X_treino, y_treino)
+    escalonar_dobra = FunctionTransformer(lambda X: escalonar(escalonador, X)) # Densifica só se o escalonador centraliza
+    return Pipeline([('scaler', escalonar_dobra), ('svc', modelo_svm)])
+
+
+# Modelos disponíveis: nome -> função (X_treino, y_treino) -> modelo com predict, com os hiperparâmetros em uso
+# (padrão ou do python -m oficina.ajuste). Os de MODELOS_ENTRADA_BRUTA recebem as seis colunas brutas em vez
+# da matriz esparsa no layout do get_dummies.
+REGISTRO_MODELOS = {
+    'arvore': treinar_arvore,
+    'svm': _treinar_svm,
+    'svm_aproximado': treinar_svm_aproximado,
+    'ensemble': lambda X_treino, y_treino: treinar_ensemble(X_treino, y_treino, n_jobs=1), # O pool já ocupa os núcleos
+    'pipeline_arvore': lambda X_treino, y_treino: treinar_pipeline('arvore', X_treino, y_treino),
+    'pipeline_svm': lambda X_treino, y_treino: treinar_pipeline('svm', X_treino, y_treino),
+}
+MODELOS_ENTRADA_BRUTA = ('pipeline_arvore', 'pipeline_svm')
+
+_dados_trabalhador = None # Cache binário mapeado do disco, aberto uma vez por processo
+
+
+def _inicializar_trabalhador(diretorio):
+    global _dados_trabalhador
+    _dados_trabalhador = abrir_cache(diretorio, ler_metadados(diretorio))
+
+
+def avaliar_dobra(nome_modelo, indices_treino, indices_teste):
+    # Executado nos processos do pool: treina na dobra e prevê o teste da dobra.
+    # Retorna (previsões, segundos de treino, segundos de previsão)
+    dados = _dados_trabalhador
+    y = np.asarray(dados.y)
+    if nome_modelo in MODELOS_ENTRADA_BRUTA:
+        X_treino = matriz_bruta(*dados.linhas_brutas(indices_treino))
+        X_teste = matriz_bruta(*dados.linhas_brutas(indices_teste))
+    else:
+        # Matrizes esparsas montadas das colunas compactas mapeadas (oficina/dados_compactos.py)
+        X_treino = (dados.matriz_arvore(indices_treino) if nome_modelo == 'arvore'
+                    else dados.matriz_esparsa(indices_treino, np.float64))
+        X_teste = dados.matriz_esparsa(indices_teste, np.float64)
+
+    inicio = time.perf_counter()
+    modelo = REGISTRO_MODELOS[nome_modelo](X_treino, y[indices_treino])
+    segundos_treino = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    previsoes = modelo.predict(X_teste)
+    return np.asarray(previsoes), segundos_treino, time.perf_counter() - inicio
+
+
+def parametros_comparados(nome_modelo):
+    return parametros_modelo(nome_modelo.removeprefix('pipeline_'))
+
+
+def resumir(nome_modelo, resultados_dobras, dobras, y, classes):
+    # Junta as previsões de todas as dobras (cada linha é prevista uma vez, fora do treino) para o
+    # classification_report; acurácia, treino e vazão também por dobra
+    previsoes = np.empty_like(y)
+    acuracias, segundos_treino, linhas_previstas, segundos_previsao = [], [], 0, 0.0
+    for (previsoes_dobra, segundos_fit, segundos_predict), (_, indices_teste) in zip(resultados_dobras, dobras):
+        previsoes[indices_teste] = previsoes_dobra
+        acuracias.append(float(np.mean(previsoes_dobra == y[indices_teste])))
+        segundos_treino.append(segundos_fit)
+        linhas_previstas += len(indices_teste)
+        segundos_previsao += segundos_predict
+    relatorio = classification_report(y, previsoes, labels=classes, target_names=[str(c) for c in classes],
+                                      zero_division=0, output_dict=True)
+    return {
+        'parametros': parametros_comparados(nome_modelo),
+        'acuracia_media': float(np.mean(acuracias)),
+        'acuracia_desvio': float(np.std(acuracias)),
+        'acuracia_dobras': acuracias,
+        'precisao_macro': relatorio['macro avg']['precision'],
+        'recall_macro': relatorio['macro avg']['recall'],
+        'f1_macro': relatorio['macro avg']['f1-score'],
+        'f1_ponderado': relatorio['weighted avg']['f1-score'],
+        'segundos_treino_medio': float(np.mean(segundos_treino)),
+        'previsoes_por_segundo': linhas_previstas / segundos_previsao if segundos_previsao else None,
+        'relatorio': relatorio,
+    }
+
+
+def imprimir_tabela(resumos):
+    print(f"{'modelo':<16} {'acurácia':>16} {'precisão':>9} {'recall':>7} {'F1 macro':>9} {'F1 pond.':>9}"
+          f" {'treino s':>9} {'previsões/s':>12}")
+    for nome_modelo, resumo in sorted(resumos.items(), key=lambda item: item[1]['acuracia_media'], reverse=True):
+        vazao = resumo['previsoes_por_segundo']
+        print(f"{nome_modelo:<16} {resumo['acuracia_media'] * 100:>8.2f}% ± {resumo['acuracia_desvio'] * 100:5.2f}"
+              f" {resumo['precisao_macro']:>9.3f} {resumo['recall_macro']:>7.3f} {resumo['f1_macro']:>9.3f}"
+              f" {resumo['f1_ponderado']:>9.3f} {resumo['segundos_treino_medio']:>9.3f}"
+              f" {vazao if vazao is None else f'{vazao:,.0f}':>12}")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Compara os modelos nas mesmas dobras estratificadas, em paralelo.")
+    parser.add_argument('--modelos', nargs='+', choices=tuple(REGISTRO_MODELOS), default=list(REGISTRO_MODELOS))
+    parser.add_argument('--dobras', type=int, default=5)
+    parser.add_argument('--processos', type=int, default=os.cpu_count())
+    parser.add_argument('--dados-treino', default=ARQUIVO_DADOS)
+    parser.add_argument('--saida', default=ARQUIVO_SAIDA)
+    args = parser.parse_args(argumentos)
+
+    try:
+        dados = carregar_dados_codificados(args.dados_treino) # Lê e codifica o CSV só se o cache estiver desatualizado
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.dados_treino}' não foi encontrado.")
+        return 1
+
+    y = dados.y_alvo.to_numpy()
+    classes = sorted(np.unique(y).tolist())
+    try:
+        dobras = list(StratifiedKFold(args.dobras, shuffle=True, random_state=SEMENTE).split(np.zeros(len(y)), y))
+    except ValueError as erro_dobras:
+        print(f"Erro: Não foi possível montar {args.dobras} dobras estratificadas: {erro_dobras}")
+        return 1
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(args.processos, initializer=_inicializar_trabalhador,
+                             initargs=(diretorio_cache(args.dados_treino),)) as executor:
+        # Todas as tarefas são enviadas de uma vez: modelos e dobras diferentes treinam ao mesmo tempo
+        futuros = {nome_modelo: [executor.submit(avaliar_dobra, nome_modelo, indices_treino, indices_teste)
+                                 for indices_treino, indices_teste in dobras]
+                   for nome_modelo in args.modelos}
+        resumos = {nome_modelo: resumir(nome_modelo, [futuro.result() for futuro in futuros_modelo], dobras, y, classes)
+                   for nome_modelo, futuros_modelo in futuros.items()}
+    segundos_total = time.perf_counter() - inicio
+
+    print(f"{len(args.modelos)} modelos x {args.dobras} dobras estratificadas em {len(y)} linhas "
+          f"({args.processos} processos, {segundos_total:.1f} s)\n")
+    imprimir_tabela(resumos)
+
+    resultado = {
+        'dados': os.path.abspath(args.dados_treino), 'linhas': int(len(y)), 'dobras': args.dobras, 'semente': SEMENTE,
+        'processos': args.processos, 'segundos_total': segundos_total,
+        'ambiente': {'python': platform.python_version(), 'numpy': np.__version__, 'sklearn': sklearn.__version__},
+        'modelos': resumos,
+    }
+    conteudo = json.dumps(resultado, indent=2, ensure_ascii=False)
+    escrever_atomicamente(args.saida, lambda arquivo: arquivo.write(conteudo.encode('utf-8')))
+    print(f"\nResultados gravados em '{args.saida}'.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
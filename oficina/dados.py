@@ -0,0 +1,216 @@
+import json
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn import tree, svm # Libs para modelos de Árvore de Decisão e SVM
+from sklearn.preprocessing import StandardScaler # Lib para escalonar features
+from sklearn.model_selection import train_test_split # Lib para dividir dados
+from sklearn.pipeline import Pipeline
+from sklearn.kernel_approximation import Nystroem, RBFSampler # Features aproximadas do kernel RBF
+from sklearn.linear_model import SGDClassifier
+
+from oficina.instrumentacao import etapa
+
+ARQUIVO_DADOS = 'oficina_Britt.csv'
+COLUNA_SERVICO = 'Servico'
+COLUNA_ALVO = 'Avaliacao_Cliente'
+COLUNAS_NUMERICAS = ['Valor_Pecas', 'Valor_Mao_Obra', 'Tempo_Servico_Horas', 'Quilometragem_Carro', 'Ano_Fabricacao_Carro']
+COLUNAS_ENTRADA = [COLUNA_SERVICO] + COLUNAS_NUMERICAS # As seis colunas brutas de uma ordem de serviço
+
+# Hiperparâmetros padrão dos modelos (também fazem parte da chave dos artefatos salvos em oficina/artefatos.py)
+PARAMETROS_ARVORE = {}
+PARAMETROS_SVM = {'kernel': 'linear', 'C': 1.0}
+# Ensemble (oficina/ensemble.py): floresta de 'arvores' árvores e 'svms' SVMs lineares, cada um em 'fracao_svm'
+# das linhas; 'peso_svms' é o peso dos SVMs na média das probabilidades
+PARAMETROS_ENSEMBLE = {'arvores': 100, 'max_features': 'sqrt', 'svms': 10, 'fracao_svm': 0.3,
+                       'svm': {'kernel': 'linear', 'C': 1.0}, 'peso_svms': 0.5, 'semente': 1}
+# SVM de kernel RBF aproximado: 'mapa' nystroem (amostra de linhas do treino) ou rff (features aleatórias de
+# Fourier) com 'componentes' features, seguido de um classificador linear ('linearsvc' ou 'sgd').
+# gamma None = 1 / número de colunas, o mesmo do SVC(gamma='scale') em dados escalonados
+PARAMETROS_SVM_APROXIMADO = {'mapa': 'nystroem', 'componentes': 300, 'gamma': None, 'classificador': 'linearsvc',
+                             'C': 1.0, 'semente': 1}
+PARAMETROS_PADRAO = {'arvore': PARAMETROS_ARVORE, 'svm': PARAMETROS_SVM, 'ensemble': PARAMETROS_ENSEMBLE,
+                     'svm_aproximado': PARAMETROS_SVM_APROXIMADO}
+ARQUIVO_PARAMETROS = 'parametros_modelos.json' # Configuração vencedora gravada por python -m oficina.ajuste
+PROPORCAO_TESTE = 0.3 # Divisão treino/teste do menu e dos scripts
+SEMENTE_DIVISAO = 1
+LIMITE_DIVISAO_EXATA = 1_000_000 # Linhas até onde o treino em blocos repete a divisão do menu (mascara_teste)
+# Semente da árvore (desempate entre divisões igualmente boas), a mesma no ajuste e nos artefatos: assim a
+# configuração escolhida pelo python -m oficina.ajuste é avaliada na mesma árvore que o menu treina
+SEMENTE_ARVORE = 1
+
+
+def parametros_modelo(nome_modelo, caminho=ARQUIVO_PARAMETROS):
+    # Hiperparâmetros em uso: os do ajuste (se o arquivo existir) ou os padrões acima
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            parametros_ajustados = json.load(arquivo)
+    except FileNotFoundError:
+        parametros_ajustados = {}
+    return dict(parametros_ajustados.get(nome_modelo, PARAMETROS_PADRAO[nome_modelo]))
+
+
+def limpar_dados(dataframe):
+    # Remove espaços extras dos nomes das colunas e das linhas de 'Servico'
+    with etapa('limpeza_colunas', len(dataframe)):
+        dataframe.columns = dataframe.columns.str.strip()
+        dataframe[COLUNA_SERVICO] = dataframe[COLUNA_SERVICO].astype(str).str.strip()
+    return dataframe
+
+
+def carregar_dados(caminho=ARQUIVO_DADOS):
+    # Lança FileNotFoundError se o arquivo não existir; quem chama decide como avisar o usuário
+    with etapa('leitura_csv') as medicao:
+        dataframe = pd.read_csv(caminho)
+        medicao.registrar_linhas(len(dataframe))
+    return limpar_dados(dataframe)
+
+
+def ler_blocos(caminho, tamanho_bloco, colunas=None):
+    # Lê o CSV em blocos de tamanho fixo e gera (posição da primeira linha do bloco, bloco limpo).
+    # colunas: nomes já sem espaços; só essas colunas são lidas
+    posicao = 0
+    usecols = None if colunas is None else (lambda nome: nome.strip() in colunas)
+    for bloco in pd.read_csv(caminho, chunksize=tamanho_bloco, usecols=usecols, skipinitialspace=True):
+        bloco.columns = bloco.columns.str.strip()
+        if COLUNA_SERVICO in bloco:
+            bloco[COLUNA_SERVICO] = bloco[COLUNA_SERVICO].astype(str).str.strip()
+        yield posicao, bloco
+        posicao += len(bloco)
+
+
+def separar_alvo(dataframe):
+    # Define a variável alvo e as features brutas
+    y_alvo = dataframe[COLUNA_ALVO]
+    X_features_originais = dataframe.drop(COLUNA_ALVO, axis=1)
+    return X_features_originais, y_alvo
+
+
+def codificar_features(X_features_originais, colunas_treino=None):
+    # Transforma 'Servico' em colunas numéricas; com colunas_treino, alinha ao layout usado no treino
+    with etapa('get_dummies', len(X_features_originais)):
+        X_codificadas = pd.get_dummies(X_features_originais, columns=[COLUNA_SERVICO], prefix=COLUNA_SERVICO, dtype=int)
+        if colunas_treino is not None:
+            X_codificadas = X_codificadas.reindex(columns=colunas_treino, fill_value=0)
+    return X_codificadas
+
+
+def dividir_treino_teste(X_features_codificadas, y_alvo, estratificar=False):
+    with etapa('train_test_split', len(X_features_codificadas)):
+        return train_test_split(X_features_codificadas, y_alvo, test_size=PROPORCAO_TESTE, random_state=SEMENTE_DIVISAO,
+                                stratify=y_alvo if estratificar else None)
+
+
+def mascara_teste(n_linhas):
+    # Linhas do teste da divisão do menu (dividir_treino_teste sem estratificar) em um CSV de n_linhas. Sem
+    # estratificação a divisão só depende do número de linhas, então quem lê o CSV em blocos também a conhece.
+    # O train_test_split monta vetores de índices do tamanho do CSV (~24 bytes por linha): só para arquivos de
+    # até LIMITE_DIVISAO_EXATA linhas; acima disso, sorteio_teste
+    indices_teste = train_test_split(np.arange(n_linhas), test_size=PROPORCAO_TESTE, random_state=SEMENTE_DIVISAO)[1]
+    mascara = np.zeros(n_linhas, dtype=bool)
+    mascara[indices_teste] = True
+    return mascara
+
+
+def sorteio_teste(posicao, n_linhas):
+    # Linhas de teste do bloco que começa na linha posicao, sem nada do tamanho do CSV: cada linha vai para o
+    # teste com probabilidade PROPORCAO_TESTE, por um hash (splitmix64) do seu índice e da SEMENTE_DIVISAO.
+    # O resultado de uma linha não depende do tamanho do bloco; a proporção é só aproximada
+    with np.errstate(over='ignore'): # A aritmética do hash é módulo 2**64
+        z = np.arange(posicao, posicao + n_linhas, dtype=np.uint64) + np.uint64(SEMENTE_DIVISAO)
+        z *= np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z ^= z >> np.uint64(31)
+    return z < np.uint64(int(PROPORCAO_TESTE * 2**64))
+
+
+# Os modelos são treinados sobre a matriz NumPy (sem nomes de colunas) para aceitarem direto
+# a saída do CodificadorOficina; o layout das colunas fica salvo junto no artefato. Também aceitam a matriz
+# CSR da representação compacta (oficina/dados_compactos.py: matriz_esparsa), que é passada sem densificar.
+def matriz_treino(X_treino):
+    return X_treino if sparse.issparse(X_treino) else np.asarray(X_treino, dtype=np.float64)
+
+
+def montar_arvore(parametros=None):
+    parametros = parametros_modelo('arvore') if parametros is None else parametros
+    return tree.DecisionTreeClassifier(**{'random_state': SEMENTE_ARVORE, **parametros})
+
+
+def treinar_arvore(X_treino, y_treino, parametros=None):
+    modelo_arvore = montar_arvore(parametros)
+    with etapa('fit_arvore', X_treino.shape[0]):
+        modelo_arvore.fit(matriz_treino(X_treino), y_treino)
+    return modelo_arvore
+
+
+def gamma_centralizado(escalonador):
+    # gamma='scale' do SVC é 1 / (colunas * X.var()), calculado sobre a matriz que ele recebe. Na matriz escalonada
+    # e centralizada, X.var() é a média das variâncias das colunas escalonadas (1, ou 0 nas colunas constantes)
+    variancia = float(np.mean(escalonador.var_ / escalonador.scale_ ** 2))
+    return 1.0 / (len(escalonador.var_) * variancia) if variancia != 0 else 1.0
+
+
+def treinar_svm(X_treino, y_treino, parametros=None):
+    # Retorna o modelo e o escalonador ajustado no treino (o SVM só recebe dados escalonados). Na matriz esparsa
+    # o escalonador só divide pelo desvio, porque centralizar a densificaria. O kernel linear com intercepto e o
+    # RBF de gamma fixo não mudam com essa translação, mas o gamma='scale' sim: o SVC o calcularia pela variância
+    # da matriz não centralizada (ano e quilometragem divididos pelo desvio ficam na casa das centenas e o gamma
+    # cai ordens de grandeza). Por isso o gamma é resolvido antes pela variância da matriz centralizada, o mesmo
+    # do caminho denso. Os kernels poly e sigmoid mudam com a translação e recebem a matriz densa centralizada
+    parametros = dict(parametros_modelo('svm') if parametros is None else parametros)
+    X_treino = matriz_treino(X_treino)
+    if sparse.issparse(X_treino) and parametros.get('kernel', 'rbf') not in ('linear', 'rbf'):
+        X_treino = X_treino.toarray()
+    escalonador = StandardScaler(with_mean=not sparse.issparse(X_treino))
+    with etapa('escalonador_fit_transform', X_treino.shape[0]):
+        X_treino_escalonado = escalonador.fit_transform(X_treino)
+    if parametros.get('kernel', 'rbf') == 'rbf' and not escalonador.with_mean and parametros.get('gamma', 'scale') == 'scale':
+        parametros['gamma'] = gamma_centralizado(escalonador)
+    modelo_svm = svm.SVC(**parametros)
+    with etapa('fit_svm', X_treino.shape[0]):
+        modelo_svm.fit(X_treino_escalonado, y_treino)
+    return modelo_svm, escalonador
+
+
+def escalonar(escalonador, X):
+    # escalonador.transform que também aceita a matriz esparsa quando o escalonador centraliza (poly e sigmoid)
+    if sparse.issparse(X) and escalonador.with_mean:
+        X = X.toarray()
+    return escalonador.transform(X)
+
+
+def montar_svm_aproximado(n_linhas, n_colunas, parametros=None):
+    # Pipeline escalonador -> mapa de features do kernel RBF -> classificador linear, para um treino de
+    # n_linhas x n_colunas. O treino fica linear nas linhas (o SVC exato cresce de forma quadrática ou pior)
+    parametros = parametros_modelo('svm_aproximado') if parametros is None else parametros
+    componentes = min(parametros['componentes'], n_linhas) # O Nystroem não usa mais componentes que linhas
+    gamma = 1.0 / n_colunas if parametros['gamma'] is None else parametros['gamma']
+    if parametros['mapa'] == 'nystroem':
+        mapa = Nystroem(kernel='rbf', gamma=gamma, n_components=componentes, random_state=parametros['semente'])
+    elif parametros['mapa'] == 'rff':
+        mapa = RBFSampler(gamma=gamma, n_components=componentes, random_state=parametros['semente'])
+    else:
+        raise ValueError(f"Mapa de features desconhecido: {parametros['mapa']}. Use 'nystroem' ou 'rff'.")
+    if parametros['classificador'] == 'linearsvc':
+        classificador = svm.LinearSVC(C=parametros['C'], random_state=parametros['semente'])
+    elif parametros['classificador'] == 'sgd':
+        # alpha equivalente ao C do LinearSVC: 1 / (C * linhas)
+        classificador = SGDClassifier(loss='hinge', alpha=1.0 / (parametros['C'] * n_linhas), random_state=parametros['semente'])
+    else:
+        raise ValueError(f"Classificador desconhecido: {parametros['classificador']}. Use 'linearsvc' ou 'sgd'.")
+    return Pipeline([('scaler', StandardScaler()), ('mapa', mapa), ('svc', classificador)])
+
+
+def treinar_svm_aproximado(X_treino, y_treino, parametros=None):
+    parametros = parametros_modelo('svm_aproximado') if parametros is None else parametros
+    X_treino = matriz_treino(X_treino)
+    svm_aproximado = montar_svm_aproximado(*X_treino.shape, parametros)
+    if sparse.issparse(X_treino):
+        # Como no treinar_svm: só divide pelo desvio. O gamma aqui nunca é 'scale' (None vira 1 / colunas, o valor do
+        # 'scale' na matriz centralizada) e o kernel RBF de gamma fixo não muda com a translação
+        svm_aproximado.set_params(scaler__with_mean=False)
+    with etapa('fit_svm_aproximado', X_treino.shape[0]):
+        svm_aproximado.fit(X_treino, y_treino)
+    return svm_aproximado
@@ -0,0 +1,131 @@
+# Representação compacta das ordens de serviço: 'Servico' vira um código inteiro (índice na lista de serviços)
+# e cada coluna numérica fica no tipo mais estreito que a comporta: preços e horas em float32, quilometragem em
+# int32 e ano em int16; a nota também vai para o menor inteiro que cabe. Por linha são ~21 bytes, contra
+# (5 + serviços) x 8 bytes da matriz densa do get_dummies. Para treinar e prever, matriz_esparsa monta direto
+# das colunas a matriz CSR no mesmo layout do get_dummies (numéricas e depois 'Servico_<nome>' em ordem
+# alfabética), com uma única coluna one-hot guardada por linha.
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from oficina.dados import COLUNA_ALVO, COLUNA_SERVICO, COLUNAS_NUMERICAS, dividir_treino_teste, ler_blocos
+
+TIPOS_COMPACTOS = {'Valor_Pecas': np.float32, 'Valor_Mao_Obra': np.float32, 'Tempo_Servico_Horas': np.float32,
+                   'Quilometragem_Carro': np.int32, 'Ano_Fabricacao_Carro': np.int16}
+TAMANHO_BLOCO_COMPACTO = 500_000
+LIMITE_ARVORE_DENSA = 256 * 2**20 # Bytes da matriz float32 até onde a árvore treina na matriz densa
+
+
+def tipo_codigos(n_servicos):
+    return np.int16 if n_servicos <= np.iinfo(np.int16).max else np.int32
+
+
+def converter_coluna(valores, tipo, nome_coluna):
+    # Converte para o tipo estreito; lança ValueError se algum valor mudaria (fração em coluna inteira, fora da faixa)
+    convertidos = np.asarray(valores).astype(tipo)
+    if np.issubdtype(tipo, np.integer) and not np.array_equal(convertidos, valores):
+        raise ValueError(f"A coluna '{nome_coluna}' tem valores que não cabem em {np.dtype(tipo).name}.")
+    return convertidos
+
+
+def estreitar_alvo(y):
+    # Menor inteiro com sinal que comporta as notas (int8 para 1..5); alvo não inteiro fica como está
+    y = np.asarray(y)
+    if not np.issubdtype(y.dtype, np.integer) or not y.size:
+        return y
+    for tipo in (np.int8, np.int16, np.int32):
+        if np.iinfo(tipo).min <= y.min() and y.max() <= np.iinfo(tipo).max:
+            return y.astype(tipo)
+    return y
+
+
+class DadosCompactos:
+    # servicos: nomes na ordem de aparição no CSV (como o unique() do pandas); codigos_servico[i] é a posição
+    # do serviço da linha i nessa lista. numericas: {coluna: array estreito}, nas colunas de COLUNAS_NUMERICAS
+    def __init__(self, servicos, codigos_servico, numericas, y):
+        self.servicos = list(servicos)
+        self.codigos_servico = codigos_servico
+        self.numericas = {nome: numericas[nome] for nome in COLUNAS_NUMERICAS}
+        self.y = y
+        self.colunas = COLUNAS_NUMERICAS + [f'{COLUNA_SERVICO}_{servico}' for servico in sorted(self.servicos)]
+        posicao_coluna = {nome: indice for indice, nome in enumerate(self.colunas)}
+        self.coluna_do_codigo = np.array([posicao_coluna[f'{COLUNA_SERVICO}_{servico}'] for servico in self.servicos],
+                                         dtype=np.int32)
+
+    def __len__(self):
+        return len(self.codigos_servico)
+
+    def nbytes(self):
+        return (self.codigos_servico.nbytes + sum(coluna.nbytes for coluna in self.numericas.values())
+                + self.y.nbytes)
+
+    def _linhas(self, coluna, indices):
+        return coluna if indices is None else coluna[indices]
+
+    def matriz_numerica(self, indices=None, dtype=np.float64):
+        # Linhas x 5 na ordem de COLUNAS_NUMERICAS
+        colunas = [self._linhas(self.numericas[nome], indices) for nome in COLUNAS_NUMERICAS]
+        matriz = np.empty((len(colunas[0]), len(colunas)), dtype=dtype)
+        for posicao, coluna in enumerate(colunas):
+            matriz[:, posicao] = coluna
+        return matriz
+
+    def matriz_esparsa(self, indices=None, dtype=np.float32):
+        # CSR no layout de self.colunas: por linha, as cinco numéricas e a coluna one-hot do serviço.
+        # float32 basta para a árvore (o sklearn compara em float32); o SVM usa float64
+        codigos = self._linhas(self.codigos_servico, indices)
+        n_linhas, n_numericas = len(codigos), len(COLUNAS_NUMERICAS)
+        por_linha = n_numericas + 1
+        valores = np.empty((n_linhas, por_linha), dtype=dtype)
+        valores[:, :n_numericas] = self.matriz_numerica(indices, dtype)
+        valores[:, n_numericas] = 1
+        colunas = np.empty((n_linhas, por_linha), dtype=np.int32)
+        colunas[:, :n_numericas] = np.arange(n_numericas, dtype=np.int32)
+        colunas[:, n_numericas] = self.coluna_do_codigo[codigos]
+        ponteiros = np.arange(0, n_linhas * por_linha + 1, por_linha, dtype=np.int64)
+        matriz = sparse.csr_matrix((valores.ravel(), colunas.ravel(), ponteiros), shape=(n_linhas, len(self.colunas)))
+        matriz.eliminate_zeros() # Preços zerados não precisam ser guardados
+        return matriz
+
+    def matriz_arvore(self, indices=None):
+        # O divisor esparso da árvore do sklearn é bem mais lento que o denso (~5x com 1 milhão de linhas e 106
+        # serviços, benchmarks/benchmark_dados_compactos.py): enquanto a matriz float32 couber em
+        # LIMITE_ARVORE_DENSA ela é densificada; acima disso, fica a CSR
+        matriz = self.matriz_esparsa(indices, np.float32)
+        if matriz.shape[0] * matriz.shape[1] * np.dtype(np.float32).itemsize <= LIMITE_ARVORE_DENSA:
+            return matriz.toarray()
+        return matriz
+
+    def linhas_brutas(self, indices=None):
+        # Serviço e valores numéricos originais das linhas (ex.: as do teste), para os preditores das colunas brutas
+        servicos = np.asarray(self.servicos, dtype=object)[self._linhas(self.codigos_servico, indices)]
+        return servicos, self.matriz_numerica(indices)
+
+    def dividir(self, estratificar=False):
+        # Mesma divisão do dividir_treino_teste sobre a matriz inteira, mas só dos índices das linhas.
+        # Retorna (indices_treino, indices_teste, y_treino, y_teste)
+        return dividir_treino_teste(np.arange(len(self)), pd.Series(self.y, name=COLUNA_ALVO, copy=False), estratificar)
+
+
+def ler_csv_compacto(caminho, tamanho_bloco=TAMANHO_BLOCO_COMPACTO):
+    # Lê o CSV em blocos, convertendo cada bloco para as colunas compactas; nunca há mais que um bloco em
+    # objetos do pandas na memória. Lança FileNotFoundError se o arquivo não existir
+    posicao_servico = {}
+    blocos_codigos, blocos_alvo = [], []
+    blocos_numericas = {nome: [] for nome in COLUNAS_NUMERICAS}
+    for _, bloco in ler_blocos(caminho, tamanho_bloco, [COLUNA_SERVICO, COLUNA_ALVO] + COLUNAS_NUMERICAS):
+        codigos_bloco, servicos_bloco = pd.factorize(bloco[COLUNA_SERVICO])
+        mapa_bloco = np.array([posicao_servico.setdefault(servico, len(posicao_servico)) for servico in servicos_bloco],
+                              dtype=np.int32)
+        blocos_codigos.append(mapa_bloco[codigos_bloco])
+        for nome in COLUNAS_NUMERICAS:
+            blocos_numericas[nome].append(converter_coluna(bloco[nome].to_numpy(), TIPOS_COMPACTOS[nome], nome))
+        blocos_alvo.append(bloco[COLUNA_ALVO].to_numpy())
+
+    def juntar(blocos, tipo):
+        return np.concatenate(blocos).astype(tipo, copy=False) if blocos else np.empty(0, dtype=tipo)
+
+    codigos_servico = juntar(blocos_codigos, tipo_codigos(len(posicao_servico)))
+    numericas = {nome: juntar(blocos_numericas[nome], TIPOS_COMPACTOS[nome]) for nome in COLUNAS_NUMERICAS}
+    y = estreitar_alvo(np.concatenate(blocos_alvo)) if blocos_alvo else np.empty(0, dtype=np.int8)
+    return DadosCompactos(list(posicao_servico), codigos_servico, numericas, y)
@@ -0,0 +1,280 @@
+# Ensemble da oficina: floresta aleatória (árvores em amostras bootstrap, sorteando colunas a cada nó) mais SVMs
+# treinados em subconjuntos estratificados das linhas (bagging). Uma árvore isolada decora o treino e um SVC
+# único não escala; a média de muitos membros é mais estável e cada membro é barato.
+# Treino: os membros são treinados em paralelo (joblib, um processo por núcleo). A matriz de treino é gravada
+# uma vez em disco (float32 para as árvores, escalonada em float64 para os SVMs) e cada processo a mapeia com
+# mmap, sem receber uma cópia dela.
+# Previsão: voto suave, a média das probabilidades dos membros, calculada para todos os membros de uma vez:
+#   árvores  os nós de todas as árvores ficam em arrays planos e os pares (linha, árvore) descem nível a nível
+#   SVMs     os pesos de todos os pares um-contra-um de todos os SVMs formam uma única matriz; uma multiplicação
+#            dá todas as decisões, que viram votos + confiança como no decision_function(ovr) do sklearn
+# O EnsembleOficina prevê tanto a matriz codificada (predict/predict_proba) quanto as colunas brutas
+# (prever/prever_linha, a mesma interface dos preditores de oficina/codificador.py). A matriz codificada pode ser
+# a CSR da representação compacta (oficina/dados_compactos.py): ela é densificada um bloco de linhas por vez.
+import os
+import tempfile
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn import svm, tree
+from sklearn.preprocessing import StandardScaler
+
+from oficina.dados import parametros_modelo
+from oficina.codificador import CodificadorOficina
+from oficina.instrumentacao import etapa
+
+FOLHA = -1 # Valor de children_left/children_right nas folhas do sklearn
+LINHAS_POR_BLOCO = 4096 # Linhas previstas por vez (a descida guarda linhas x árvores nós em memória)
+
+
+def _bloco_denso(X, inicio, fim, dtype):
+    bloco = X[inicio:fim]
+    return bloco.toarray().astype(dtype, copy=False) if sparse.issparse(bloco) else np.asarray(bloco, dtype=dtype)
+
+
+def _gravar_memmap(diretorio, nome, X, dtype, transformar=None):
+    # Copia X para um .npy em blocos (sem montar a matriz convertida inteira na memória) e o reabre só para leitura
+    caminho = os.path.join(diretorio, f'{nome}.npy')
+    destino = np.lib.format.open_memmap(caminho, mode='w+', dtype=dtype, shape=X.shape)
+    for inicio in range(0, X.shape[0], LINHAS_POR_BLOCO * 16):
+        bloco = _bloco_denso(X, inicio, inicio + LINHAS_POR_BLOCO * 16, np.float64)
+        destino[inicio:inicio + len(bloco)] = transformar(bloco) if transformar is not None else bloco
+    destino.flush()
+    del destino
+    return np.load(caminho, mmap_mode='r')
+
+
+def _treinar_membro_arvore(X_arvores, y, semente, max_features):
+    # Bootstrap como pesos (quantas vezes cada linha foi sorteada): a árvore lê a matriz mapeada sem copiá-la
+    gerador = np.random.default_rng(semente)
+    contagens = np.bincount(gerador.integers(0, len(y), len(y)), minlength=len(y)).astype(np.float64)
+    membro = tree.DecisionTreeClassifier(max_features=max_features, random_state=semente)
+    return membro.fit(X_arvores, y, sample_weight=contagens)
+
+
+def _treinar_membro_svm(X_svms, y, indices, parametros_svm):
+    return svm.SVC(**parametros_svm).fit(X_svms[indices], y[indices])
+
+
+def _amostra_estratificada(y, fracao, gerador):
+    # fracao das linhas de cada classe (ao menos uma), para todo SVM ver todas as notas
+    indices = []
+    for classe in np.unique(y):
+        linhas_classe = np.flatnonzero(y == classe)
+        tamanho = max(1, int(round(fracao * len(linhas_classe))))
+        indices.append(gerador.choice(linhas_classe, tamanho, replace=False))
+    return np.sort(np.concatenate(indices))
+
+
+def treinar_ensemble(X_treino, y_treino, parametros=None, n_jobs=-1, colunas=None):
+    # colunas: nomes das colunas de X_treino quando ele não é um DataFrame (ex.: a matriz esparsa)
+    parametros = parametros_modelo('ensemble') if parametros is None else parametros
+    if colunas is None and hasattr(X_treino, 'columns'):
+        colunas = list(X_treino.columns)
+    X = X_treino.to_numpy() if hasattr(X_treino, 'to_numpy') else X_treino
+    y = np.asarray(y_treino)
+    gerador = np.random.default_rng(parametros['semente'])
+    sementes_arvores = gerador.integers(0, 2**31 - 1, parametros['arvores']).tolist()
+    amostras_svms = [_amostra_estratificada(y, parametros['fracao_svm'], gerador) for _ in range(parametros['svms'])]
+
+    escalonador = StandardScaler()
+    for inicio in range(0, X.shape[0], LINHAS_POR_BLOCO * 16):
+        escalonador.partial_fit(_bloco_denso(X, inicio, inicio + LINHAS_POR_BLOCO * 16, np.float64))
+
+    with tempfile.TemporaryDirectory(prefix='ensemble-') as diretorio:
+        X_arvores = _gravar_memmap(diretorio, 'X_arvores', X, np.float32)
+        X_svms = _gravar_memmap(diretorio, 'X_svms', X, np.float64, escalonador.transform) if parametros['svms'] else None
+        tarefas = [delayed(_treinar_membro_arvore)(X_arvores, y, semente, parametros['max_features'])
+                   for semente in sementes_arvores]
+        tarefas += [delayed(_treinar_membro_svm)(X_svms, y, indices, parametros['svm']) for indices in amostras_svms]
+        with etapa('fit_ensemble', len(y)):
+            membros = Parallel(n_jobs=n_jobs)(tarefas)
+        del X_arvores, X_svms # Fecha os mapas antes de apagar o diretório
+
+    arvores, svms = membros[:len(sementes_arvores)], membros[len(sementes_arvores):]
+    return EnsembleOficina(arvores, svms, escalonador, np.unique(y), parametros['peso_svms'], colunas)
+
+
+class EnsembleOficina:
+    def __init__(self, arvores, svms, escalonador, classes, peso_svms=0.5, colunas=None):
+        self.arvores = list(arvores)
+        self.svms = list(svms)
+        self.escalonador = escalonador
+        self.classes_ = np.asarray(classes)
+        n_colunas = len(escalonador.mean_)
+        self.colunas = list(colunas) if colunas is not None else [f'x{indice}' for indice in range(n_colunas)]
+        # Sem um dos grupos, o outro fica com todo o peso
+        self.peso_svms = peso_svms if self.arvores and self.svms else float(bool(self.svms))
+        self._empilhar_arvores()
+        self._empilhar_svms()
+
+        codificador = CodificadorOficina(self.colunas) if colunas is not None else None
+        self.indices_numericos = codificador.indices_numericos if codificador else np.arange(0)
+        self.indice_servico = codificador.indice_servico if codificador else {}
+        self.posicao_numerica_coluna = np.full(n_colunas, -1, dtype=np.intp)
+        self.posicao_numerica_coluna[self.indices_numericos] = np.arange(len(self.indices_numericos))
+        # Caminho das colunas brutas do SVM: numéricas x pesos + linha de pesos do serviço (ou só o intercepto)
+        self.pesos_svm_numericos = np.ascontiguousarray(self.pesos_svm[self.indices_numericos])
+        colunas_servico = list(self.indice_servico.values())
+        self.pesos_svm_servico = np.vstack([self.pesos_svm[colunas_servico] + self.interceptos_svm,
+                                            self.interceptos_svm[None, :]])
+        self.posicao_servico = {servico: posicao for posicao, servico in enumerate(self.indice_servico)}
+
+    def _indices_classes(self, classes_membro):
+        return np.searchsorted(self.classes_, classes_membro)
+
+    def _empilhar_arvores(self):
+        # Nós de todas as árvores em arrays planos; filhos com o deslocamento da árvore; proba normalizada por nó
+        n_classes = len(self.classes_)
+        feature, threshold, esquerda, direita, probabilidades, raizes = [], [], [], [], [], []
+        deslocamento, profundidade = 0, 0
+        for arvore in self.arvores:
+            estrutura = arvore.tree_
+            internos = estrutura.children_left != FOLHA
+            raizes.append(deslocamento)
+            feature.append(np.where(internos, estrutura.feature, 0))
+            threshold.append(estrutura.threshold)
+            esquerda.append(np.where(internos, estrutura.children_left + deslocamento, FOLHA))
+            direita.append(np.where(internos, estrutura.children_right + deslocamento, FOLHA))
+            valores = estrutura.value[:, 0, :]
+            proba_no = np.zeros((estrutura.node_count, n_classes))
+            proba_no[:, self._indices_classes(arvore.classes_)] = valores / valores.sum(axis=1, keepdims=True)
+            probabilidades.append(proba_no)
+            deslocamento += estrutura.node_count
+            profundidade = max(profundidade, arvore.get_depth())
+        vazio = np.zeros(0, dtype=np.intp)
+        self.feature = np.concatenate(feature).astype(np.intp) if feature else vazio
+        self.threshold = np.concatenate(threshold) if threshold else np.zeros(0)
+        self.filhos_esquerda = np.concatenate(esquerda).astype(np.intp) if esquerda else vazio
+        self.filhos_direita = np.concatenate(direita).astype(np.intp) if direita else vazio
+        self.proba_no = np.concatenate(probabilidades) if probabilidades else np.zeros((0, n_classes))
+        self.eh_folha = self.filhos_esquerda == FOLHA
+        self.raizes = np.asarray(raizes, dtype=np.intp)
+        self.profundidade = profundidade
+
+    def _empilhar_svms(self):
+        # Pesos de todos os pares de todos os SVMs, com o StandardScaler embutido (ver oficina/svm_linear.py),
+        # e as matrizes que levam as decisões aos votos e à confiança de cada (membro, classe)
+        n_classes, n_membros = len(self.classes_), len(self.svms)
+        media, escala = self.escalonador.mean_, self.escalonador.scale_
+        pesos, interceptos, pares = [], [], [] # pares: (membro, classe que vota no positivo, classe do negativo)
+        for indice_membro, membro in enumerate(self.svms):
+            if getattr(membro, 'kernel', None) != 'linear':
+                raise ValueError("Os SVMs do ensemble precisam de kernel='linear'.")
+            coeficientes = membro.coef_
+            coeficientes = coeficientes.toarray() if hasattr(coeficientes, 'toarray') else np.asarray(coeficientes)
+            pesos_membro = coeficientes / escala
+            pesos.append(pesos_membro)
+            interceptos.append(np.asarray(membro.intercept_) - pesos_membro @ media)
+            indices = self._indices_classes(membro.classes_)
+            # Ordem da libsvm; no caso binário o sklearn inverte o sinal e o positivo vai para a segunda classe
+            pares_membro = ([(1, 0)] if len(indices) == 2 else
+                            [(i, j) for i in range(len(indices)) for j in range(i + 1, len(indices))])
+            pares += [(indice_membro, indices[i], indices[j]) for i, j in pares_membro]
+        n_pares = len(pares)
+        self.pesos_svm = np.vstack(pesos).T if pesos else np.zeros((len(media), 0)) # n_colunas x n_pares
+        self.interceptos_svm = np.concatenate(interceptos) if interceptos else np.zeros(0)
+        self.votos_positivos = np.zeros((n_pares, n_membros * n_classes))
+        self.votos_negativos = np.zeros((n_pares, n_membros * n_classes))
+        self.sinal_confianca = np.zeros((n_pares, n_membros * n_classes))
+        for indice_par, (indice_membro, classe_positiva, classe_negativa) in enumerate(pares):
+            self.votos_positivos[indice_par, indice_membro * n_classes + classe_positiva] = 1
+            self.votos_negativos[indice_par, indice_membro * n_classes + classe_negativa] = 1
+            self.sinal_confianca[indice_par, indice_membro * n_classes + classe_positiva] += 1
+            self.sinal_confianca[indice_par, indice_membro * n_classes + classe_negativa] -= 1
+
+    def _proba_arvores(self, n_linhas, valor_no):
+        # valor_no(linhas, colunas) devolve o valor de cada linha na coluna do nó; a descida é feita para
+        # todos os pares (linha, árvore) ao mesmo tempo, avançando só os que ainda não chegaram a uma folha
+        n_arvores = len(self.raizes)
+        nos = np.tile(self.raizes, n_linhas)
+        linhas = np.repeat(np.arange(n_linhas), n_arvores)
+        ativos = np.arange(len(nos))
+        for _ in range(self.profundidade):
+            ativos = ativos[~self.eh_folha[nos[ativos]]]
+            if not ativos.size:
+                break
+            nos_ativos = nos[ativos]
+            vai_esquerda = valor_no(linhas[ativos], self.feature[nos_ativos]) <= self.threshold[nos_ativos]
+            nos[ativos] = np.where(vai_esquerda, self.filhos_esquerda[nos_ativos], self.filhos_direita[nos_ativos])
+        return self.proba_no[nos].reshape(n_linhas, n_arvores, -1).mean(axis=1)
+
+    def _proba_svms(self, decisoes):
+        # Votos + confiança transformada, como o decision_function(ovr) do sklearn, por membro; o que é
+        # negativo vira 0 e cada membro é normalizado para somar 1
+        positivas = decisoes > 0
+        votos = positivas @ self.votos_positivos + (~positivas) @ self.votos_negativos
+        confianca = decisoes @ self.sinal_confianca
+        pontos = np.maximum(votos + confianca / (3 * (np.abs(confianca) + 1)), 0)
+        pontos = pontos.reshape(len(decisoes), len(self.svms), len(self.classes_))
+        pontos /= np.maximum(pontos.sum(axis=2, keepdims=True), 1e-12)
+        return pontos.mean(axis=1)
+
+    def _combinar(self, proba_arvores, proba_svms):
+        if proba_svms is None:
+            return proba_arvores
+        if proba_arvores is None:
+            return proba_svms
+        return (1 - self.peso_svms) * proba_arvores + self.peso_svms * proba_svms
+
+    def predict_proba(self, X):
+        # X: matriz codificada no layout das colunas (ex.: X_teste)
+        X = X if sparse.issparse(X) else np.asarray(X)
+        blocos = []
+        for inicio in range(0, X.shape[0], LINHAS_POR_BLOCO):
+            X_bloco = _bloco_denso(X, inicio, inicio + LINHAS_POR_BLOCO, np.float64)
+            proba_arvores = proba_svms = None
+            if self.arvores:
+                X_arvores = X_bloco.astype(np.float32) # O sklearn compara em float32
+
+                def valor_no(linhas, colunas):
+                    return X_arvores[linhas, colunas]
+
+                proba_arvores = self._proba_arvores(len(X_bloco), valor_no)
+            if self.svms:
+                proba_svms = self._proba_svms(X_bloco @ self.pesos_svm + self.interceptos_svm)
+            blocos.append(self._combinar(proba_arvores, proba_svms))
+        return np.concatenate(blocos) if blocos else np.zeros((0, len(self.classes_)))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def novo_buffer(self, n_linhas=1):
+        # Mantém a interface dos outros preditores; o ensemble não precisa de buffer
+        return None
+
+    def probabilidades(self, servicos, valores_numericos):
+        # Colunas brutas (serviço + cinco numéricas) -> probabilidade de cada classe, sem codificar a matriz
+        valores_numericos = np.asarray(valores_numericos, dtype=np.float64)
+        servicos = list(servicos)
+        blocos = []
+        for inicio in range(0, len(valores_numericos), LINHAS_POR_BLOCO):
+            numericos = valores_numericos[inicio:inicio + LINHAS_POR_BLOCO]
+            servicos_bloco = servicos[inicio:inicio + LINHAS_POR_BLOCO]
+            proba_arvores = proba_svms = None
+            if self.arvores:
+                numericos_arvores = numericos.astype(np.float32)
+                colunas_servico = np.fromiter((self.indice_servico.get(servico, -1) for servico in servicos_bloco),
+                                              dtype=np.intp, count=len(numericos))
+                posicao_numerica = self.posicao_numerica_coluna
+
+                def valor_no(linhas, colunas):
+                    posicoes = posicao_numerica[colunas]
+                    valores = numericos_arvores[linhas, np.maximum(posicoes, 0)]
+                    return np.where(posicoes >= 0, valores, (colunas_servico[linhas] == colunas).astype(np.float32))
+
+                proba_arvores = self._proba_arvores(len(numericos), valor_no)
+            if self.svms:
+                desconhecido = len(self.posicao_servico)
+                indices_servico = np.fromiter((self.posicao_servico.get(servico, desconhecido) for servico in servicos_bloco),
+                                              dtype=np.intp, count=len(numericos))
+                proba_svms = self._proba_svms(numericos @ self.pesos_svm_numericos + self.pesos_svm_servico[indices_servico])
+            blocos.append(self._combinar(proba_arvores, proba_svms))
+        return np.concatenate(blocos) if blocos else np.zeros((0, len(self.classes_)))
+
+    def prever(self, servicos, valores_numericos, buffer=None):
+        return self.classes_[np.argmax(self.probabilidades(servicos, valores_numericos), axis=1)]
+
+    def prever_linha(self, servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao):
+        return self.prever([servico], [(valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao)])[0]
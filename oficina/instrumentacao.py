@@ -0,0 +1,174 @@
+# Instrumentação das etapas de treino e previsão (leitura do CSV, get_dummies, train_test_split, fit, predict...).
+# Desligada por padrão: etapa() devolve sempre o mesmo contexto vazio, sem medir nada.
+# Para ligar em uma execução do menu ou de um script:
+#   OFICINA_METRICAS=json|prometheus        ou  --metricas[=json|prometheus]
+#   OFICINA_METRICAS_ARQUIVO=metricas.json  ou  --metricas-arquivo=metricas.json  (padrão: stderr)
+#   OFICINA_PERFIL=cprofile|tracemalloc     ou  --perfil=cprofile|tracemalloc     (captura de uma execução)
+# Cada etapa acumula execuções, tempo total e máximo, linhas processadas e a variação de blocos de memória
+# alocados pelo Python (sys.getallocatedblocks). As métricas são gravadas ao final do processo.
+import atexit
+import json
+import os
+import resource
+import sys
+import time
+
+FORMATOS = ('json', 'prometheus')
+PERFIS = ('cprofile', 'tracemalloc')
+ARQUIVO_PERFIL_CPROFILE = 'perfil_oficina.prof'
+LINHAS_RESUMO_PERFIL = 25
+
+_ativa = False
+_etapas = {} # nome -> {'execucoes', 'segundos', 'segundos_max', 'linhas', 'blocos_alocados'}
+
+
+class _EtapaNula:
+    # Contexto usado com a instrumentação desligada: não mede nada
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        return False
+
+    def registrar_linhas(self, linhas):
+        pass
+
+
+_ETAPA_NULA = _EtapaNula()
+
+
+class _Etapa:
+    def __init__(self, nome, linhas):
+        self.nome = nome
+        self.linhas = linhas
+
+    def __enter__(self):
+        self.blocos_inicio = sys.getallocatedblocks()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *erro):
+        segundos = time.perf_counter() - self.inicio
+        registro = _etapas.setdefault(self.nome, {'execucoes': 0, 'segundos': 0.0, 'segundos_max': 0.0, 'linhas': 0,
+                                                  'blocos_alocados': 0})
+        registro['execucoes'] += 1
+        registro['segundos'] += segundos
+        registro['segundos_max'] = max(registro['segundos_max'], segundos)
+        registro['linhas'] += self.linhas or 0
+        registro['blocos_alocados'] += sys.getallocatedblocks() - self.blocos_inicio
+        return False
+
+    def registrar_linhas(self, linhas):
+        # Para etapas que só sabem quantas linhas processaram no final (ex.: leitura do CSV)
+        self.linhas = linhas
+
+
+def etapa(nome, linhas=None):
+    # Uso: with etapa('fit_arvore', len(X_treino)): ...
+    return _Etapa(nome, linhas) if _ativa else _ETAPA_NULA
+
+
+def ativa():
+    return _ativa
+
+
+def metricas():
+    return {'etapas': {nome: dict(registro) for nome, registro in _etapas.items()},
+            'processo': {'pico_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}
+
+
+def exportar_json():
+    return json.dumps(metricas(), indent=2, ensure_ascii=False)
+
+
+def exportar_prometheus():
+    # Formato de exposição em texto do Prometheus
+    series = [
+        ('oficina_etapa_execucoes_total', 'counter', "Execuções da etapa", 'execucoes'),
+        ('oficina_etapa_segundos_total', 'counter', "Tempo total gasto na etapa", 'segundos'),
+        ('oficina_etapa_segundos_max', 'gauge', "Maior duração de uma execução da etapa", 'segundos_max'),
+        ('oficina_etapa_linhas_total', 'counter', "Linhas processadas pela etapa", 'linhas'),
+        ('oficina_etapa_blocos_alocados', 'gauge', "Variação de blocos de memória alocados pelo Python", 'blocos_alocados'),
+    ]
+    linhas = []
+    for nome_metrica, tipo, descricao, campo in series:
+        linhas += [f'# HELP {nome_metrica} {descricao}', f'# TYPE {nome_metrica} {tipo}']
+        for nome_etapa, registro in _etapas.items():
+            nome_escapado = nome_etapa.replace('\\', '\\\\').replace('"', '\\"')
+            linhas.append(f'{nome_metrica}{{etapa="{nome_escapado}"}} {registro[campo]}')
+    linhas += ['# HELP oficina_processo_pico_rss_mb Pico de memória residente do processo',
+               '# TYPE oficina_processo_pico_rss_mb gauge',
+               f"oficina_processo_pico_rss_mb {metricas()['processo']['pico_rss_mb']}"]
+    return '\n'.join(linhas) + '\n'
+
+
+def _gravar(conteudo, arquivo):
+    if arquivo:
+        with open(arquivo, 'w', encoding='utf-8') as saida:
+            saida.write(conteudo)
+    else:
+        sys.stderr.write(conteudo + '\n')
+
+
+def _iniciar_perfil(perfil):
+    if perfil == 'cprofile':
+        import cProfile
+        import pstats
+        perfilador = cProfile.Profile()
+        perfilador.enable()
+
+        def finalizar():
+            perfilador.disable()
+            perfilador.dump_stats(ARQUIVO_PERFIL_CPROFILE)
+            sys.stderr.write(f"\nPerfil cProfile gravado em '{ARQUIVO_PERFIL_CPROFILE}'; funções mais custosas:\n")
+            pstats.Stats(perfilador, stream=sys.stderr).sort_stats('cumulative').print_stats(LINHAS_RESUMO_PERFIL)
+    else:
+        import tracemalloc
+        tracemalloc.start()
+
+        def finalizar():
+            instantaneo = tracemalloc.take_snapshot()
+            atual, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            sys.stderr.write(f"\ntracemalloc: {atual / 2**20:.1f} MB alocados ao final, pico {pico / 2**20:.1f} MB; "
+                             f"linhas que mais alocam:\n")
+            for estatistica in instantaneo.statistics('lineno')[:LINHAS_RESUMO_PERFIL]:
+                sys.stderr.write(f"  {estatistica}\n")
+    atexit.register(finalizar)
+
+
+def ativar(formato='json', arquivo=None, perfil=None):
+    global _ativa
+    if _ativa:
+        return # Já ligada nesta execução
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de métricas desconhecido: {formato}. Use {', '.join(FORMATOS)}.")
+    if perfil is not None and perfil not in PERFIS:
+        raise ValueError(f"Perfil desconhecido: {perfil}. Use {', '.join(PERFIS)}.")
+    _ativa = True
+    atexit.register(lambda: _gravar(exportar_json() if formato == 'json' else exportar_prometheus(), arquivo))
+    if perfil is not None:
+        _iniciar_perfil(perfil)
+
+
+def configurar(argumentos=None):
+    # Lê as variáveis de ambiente e as opções --metricas/--metricas-arquivo/--perfil; as opções são
+    # removidas de sys.argv para não atrapalhar o argparse de quem chama
+    argumentos = sys.argv if argumentos is None else argumentos
+    formato = os.environ.get('OFICINA_METRICAS') or None
+    arquivo = os.environ.get('OFICINA_METRICAS_ARQUIVO') or None
+    perfil = os.environ.get('OFICINA_PERFIL') or None
+    restantes = []
+    for argumento in argumentos:
+        opcao, _, valor = argumento.partition('=')
+        if opcao == '--metricas':
+            formato = valor or 'json'
+        elif opcao == '--metricas-arquivo':
+            arquivo = valor
+        elif opcao == '--perfil':
+            perfil = valor or 'cprofile'
+        else:
+            restantes.append(argumento)
+    argumentos[:] = restantes
+    if formato is not None or perfil is not None:
+        ativar(formato or 'json', arquivo, perfil)
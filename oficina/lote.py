@@ -0,0 +1,73 @@
+# Classificação em lote: lê um CSV no layout do oficina_Britt.csv em blocos, codifica cada bloco de uma vez,
+# prevê com a Árvore de Decisão e/ou o SVM e grava as previsões em disco bloco a bloco.
+# Uso: python -m oficina.lote entrada.csv saida.csv [--modelos arvore svm] [--tamanho-bloco 50000]
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from oficina.dados import ARQUIVO_DADOS, COLUNA_SERVICO, COLUNAS_NUMERICAS
+from oficina.artefatos import MODELOS_PADRAO, MODELOS_SERVIDOS, carregar_modelos
+
+TAMANHO_BLOCO_PADRAO = 50_000 # Linhas por bloco; a memória usada depende só deste valor, não do tamanho do arquivo
+COLUNAS_PREVISAO = {'arvore': 'Previsao_Arvore', 'svm': 'Previsao_SVM', 'svm_incremental': 'Previsao_SVM_Incremental',
+                    'ensemble': 'Previsao_Ensemble', 'svm_aproximado': 'Previsao_SVM_Aproximado',
+                    'pipeline_arvore': 'Previsao_Pipeline_Arvore', 'pipeline_svm': 'Previsao_Pipeline_SVM'}
+
+
+def classificar_bloco(bloco, modelos, buffers=None):
+    # modelos: {nome: preditor}. Prevê o bloco inteiro de uma vez por modelo, reaproveitando os buffers
+    bloco.columns = bloco.columns.str.strip()
+    bloco[COLUNA_SERVICO] = bloco[COLUNA_SERVICO].astype(str).str.strip()
+    servicos = bloco[COLUNA_SERVICO].to_numpy()
+    numericos = bloco[COLUNAS_NUMERICAS].to_numpy(np.float64)
+    for nome_modelo, preditor in modelos.items():
+        buffer = None if buffers is None else buffers[nome_modelo]
+        bloco[COLUNAS_PREVISAO[nome_modelo]] = preditor.prever(servicos, numericos, buffer)
+    return bloco
+
+
+def classificar_arquivo(caminho_entrada, caminho_saida, modelos, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+    # Retorna o total de linhas classificadas; o arquivo de saída é sobrescrito
+    total_linhas = 0
+    buffers = {nome: preditor.novo_buffer(tamanho_bloco) for nome, preditor in modelos.items()} # Reutilizados por todos os blocos
+    for numero_bloco, bloco in enumerate(pd.read_csv(caminho_entrada, chunksize=tamanho_bloco)):
+        bloco_classificado = classificar_bloco(bloco, modelos, buffers)
+        bloco_classificado.to_csv(caminho_saida, mode='w' if numero_bloco == 0 else 'a',
+                                  header=numero_bloco == 0, index=False)
+        total_linhas += len(bloco_classificado)
+    return total_linhas
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Classifica ordens de serviço em lote a partir de um CSV.")
+    parser.add_argument('entrada', help="CSV com as colunas Servico, Valor_Pecas, ..., Ano_Fabricacao_Carro")
+    parser.add_argument('saida', help="CSV de saída com as colunas de entrada e as previsões")
+    parser.add_argument('--modelos', nargs='+', choices=MODELOS_SERVIDOS, default=list(MODELOS_PADRAO))
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO_PADRAO)
+    parser.add_argument('--dados-treino', default=ARQUIVO_DADOS, help="CSV usado para treinar os modelos")
+    args = parser.parse_args(argumentos)
+
+    # Usa os mesmos modelos do Menu(Main).py: mesma codificação, mesma divisão treino/teste e mesmos artefatos salvos
+    try:
+        modelos = carregar_modelos(args.dados_treino, args.modelos)
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.dados_treino}' não foi encontrado.")
+        return 1
+
+    try:
+        total_linhas = classificar_arquivo(args.entrada, args.saida, modelos, args.tamanho_bloco)
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.entrada}' não foi encontrado.")
+        return 1
+    except KeyError as erro_coluna:
+        print(f"Erro: Coluna obrigatória ausente no arquivo de entrada: {erro_coluna}")
+        return 1
+
+    print(f"{total_linhas} ordens de serviço classificadas em '{args.saida}'.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
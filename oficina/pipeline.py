@@ -0,0 +1,126 @@
+# Pipeline único de pré-processamento + modelo, ajustado sobre as seis colunas brutas de uma ordem de serviço
+# (COLUNAS_ENTRADA). O ColumnTransformer faz o one-hot de 'Servico' (serviços desconhecidos ficam com todas as
+# colunas desligadas) e, nos SVMs, escalona as numéricas (a árvore as recebe brutas: escalonar não muda as
+# divisões e deixaria os limiares em desvios-padrão); depois vem a Árvore ou o SVM. Linhas e lotes brutos entram direto
+# em uma matriz NumPy de objetos, sem get_dummies, reindex nem DataFrame, e o pipeline inteiro é salvo como um
+# único artefato (oficina/artefatos.py: obter_pipeline). Na previsão, o ColumnTransformer ajustado vira um
+# CodificadorOficina equivalente, que escreve a linha codificada em um buffer reaproveitado.
+import numpy as np
+from sklearn import svm, tree
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from oficina.dados import (COLUNA_SERVICO, COLUNAS_ENTRADA, COLUNAS_NUMERICAS, montar_arvore, montar_svm_aproximado,
+                           parametros_modelo)
+from oficina.codificador import CodificadorOficina, PreditorCodificado
+from oficina.arvore_compilada import compilar_arvore
+from oficina.svm_linear import compilar_se_linear
+from oficina.instrumentacao import etapa
+
+INDICE_SERVICO = COLUNAS_ENTRADA.index(COLUNA_SERVICO)
+INDICES_NUMERICOS = [COLUNAS_ENTRADA.index(nome) for nome in COLUNAS_NUMERICAS]
+MODELOS_PIPELINE = ('arvore', 'svm', 'svm_aproximado')
+
+
+def montar_modelo(nome_modelo, parametros, n_linhas, n_colunas):
+    # Etapa final do pipeline; n_linhas x n_colunas é o tamanho do treino já codificado (usado pelo kernel aproximado)
+    if nome_modelo == 'arvore':
+        return montar_arvore(parametros)
+    if nome_modelo == 'svm':
+        return svm.SVC(**parametros)
+    if nome_modelo == 'svm_aproximado':
+        # Sem o escalonador do montar_svm_aproximado: o ColumnTransformer já escalona as numéricas
+        return Pipeline(montar_svm_aproximado(n_linhas, n_colunas, parametros).steps[1:])
+    raise ValueError(f"Modelo desconhecido: {nome_modelo}. Use {', '.join(MODELOS_PIPELINE)}.")
+
+
+def montar_pipeline(nome_modelo, parametros=None, n_linhas=None, n_colunas=None):
+    # Com os hiperparâmetros em uso (padrão ou do python -m oficina.ajuste)
+    parametros = parametros_modelo(nome_modelo) if parametros is None else parametros
+    # Nomes das colunas sem o prefixo do transformador ('Valor_Pecas', 'Servico_Troca de Oleo'), como no get_dummies
+    preprocessamento = ColumnTransformer([
+        ('servico', OneHotEncoder(handle_unknown='ignore', sparse_output=False, dtype=np.float64), [INDICE_SERVICO]),
+        ('numericas', 'passthrough' if nome_modelo == 'arvore' else StandardScaler(), INDICES_NUMERICOS),
+    ], sparse_threshold=0.0, verbose_feature_names_out=False)
+    return Pipeline([('preprocessamento', preprocessamento),
+                     ('modelo', montar_modelo(nome_modelo, parametros, n_linhas, n_colunas))])
+
+
+def matriz_bruta(servicos, valores_numericos, saida=None):
+    # Matriz n x 6 na ordem de COLUNAS_ENTRADA (o ColumnTransformer recebe colunas de tipos diferentes)
+    n_linhas = len(servicos)
+    saida = np.empty((n_linhas, len(COLUNAS_ENTRADA)), dtype=object) if saida is None else saida[:n_linhas]
+    saida[:, INDICE_SERVICO] = servicos
+    saida[:, INDICES_NUMERICOS] = valores_numericos
+    return saida
+
+
+def treinar_pipeline(nome_modelo, X_treino_bruto, y_treino, parametros=None):
+    # X_treino_bruto: saída de matriz_bruta (ou qualquer matriz n x 6 na ordem de COLUNAS_ENTRADA)
+    n_colunas = len(np.unique(X_treino_bruto[:, INDICE_SERVICO])) + len(INDICES_NUMERICOS) # Colunas após o one-hot
+    pipeline = montar_pipeline(nome_modelo, parametros, len(X_treino_bruto), n_colunas)
+    with etapa(f'fit_pipeline_{nome_modelo}', len(X_treino_bruto)):
+        pipeline.fit(X_treino_bruto, np.asarray(y_treino))
+    return pipeline
+
+
+def codificador_do_pipeline(pipeline):
+    # CodificadorOficina equivalente ao ColumnTransformer ajustado: one-hot nas categorias vistas no treino (em
+    # ordem, antes das numéricas) e (x - media) / escala nas numéricas (na árvore, que as recebe brutas, a
+    # identidade). Gera a mesma matriz que o transform, sem o custo fixo do sklearn (validação, joblib, hstack)
+    # a cada chamada
+    preprocessamento = pipeline.named_steps['preprocessamento']
+    categorias = preprocessamento.named_transformers_['servico'].categories_[0]
+    colunas = [f'{COLUNA_SERVICO}_{servico}' for servico in categorias] + COLUNAS_NUMERICAS
+    escalonador = preprocessamento.named_transformers_['numericas']
+    if not isinstance(escalonador, StandardScaler):
+        return CodificadorOficina(colunas)
+    media = np.concatenate([np.zeros(len(categorias)), escalonador.mean_])
+    escala = np.concatenate([np.ones(len(categorias)), escalonador.scale_])
+    return CodificadorOficina(colunas, media, escala)
+
+
+class PipelineOficina:
+    # Pipeline ajustado com a mesma interface dos outros preditores (novo_buffer / prever / prever_linha).
+    # O pipeline salvo é a referência; prever e prever_linha usam o codificador equivalente e os modos compilados:
+    # a ArvoreCompilada (a árvore recebe as numéricas brutas, como ela compara) e o SVM de kernel linear. Com
+    # entradas de verificação, qualquer divergência com o pipeline.predict volta ao sklearn.
+    def __init__(self, pipeline, servicos_verificacao=None, numericos_verificacao=None):
+        self.pipeline = pipeline
+        self.classes_ = pipeline.classes_
+        modelo = pipeline.named_steps['modelo']
+        codificador = codificador_do_pipeline(pipeline)
+        preditor = None
+        if isinstance(modelo, tree.DecisionTreeClassifier) and servicos_verificacao is not None:
+            preditor = compilar_arvore(modelo, codificador, servicos_verificacao, numericos_verificacao)
+        preditor = preditor or compilar_se_linear(modelo, codificador) or PreditorCodificado(modelo, codificador)
+        if servicos_verificacao is not None and not np.array_equal(preditor.prever(servicos_verificacao, numericos_verificacao),
+                                            pipeline.predict(matriz_bruta(servicos_verificacao, numericos_verificacao))):
+            preditor = None
+        self.preditor = preditor
+
+    def novo_buffer(self, n_linhas=1):
+        if self.preditor is None:
+            return np.empty((n_linhas, len(COLUNAS_ENTRADA)), dtype=object)
+        return self.preditor.novo_buffer(n_linhas)
+
+    def predict(self, X_bruto):
+        # Matriz n x 6 na ordem de COLUNAS_ENTRADA, direto pelo pipeline do sklearn
+        return self.pipeline.predict(X_bruto)
+
+    def prever(self, servicos, valores_numericos, buffer=None):
+        if self.preditor is None:
+            return self.pipeline.predict(matriz_bruta(servicos, valores_numericos, buffer))
+        return self.preditor.prever(servicos, valores_numericos, buffer)
+
+    def prever_linha(self, servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao):
+        if self.preditor is None:
+            linha = [[servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao]]
+            return self.pipeline.predict(np.array(linha, dtype=object))[0]
+        return self.preditor.prever_linha(servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem,
+                                          ano_fabricacao)
+
+    def nomes_features(self):
+        # Colunas que o modelo enxerga, ex.: 'Servico_Troca de Oleo', 'Valor_Pecas'
+        return self.pipeline[:-1].get_feature_names_out(COLUNAS_ENTRADA).tolist()
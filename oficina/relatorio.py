@@ -0,0 +1,475 @@
+# Relatório de desempenho e explicação dos modelos do menu (Árvore de Decisão e SVM) sobre um conjunto de ordens de
+# serviço: o X_teste da divisão do menu (padrão) ou um lote em CSV (--entrada, no layout do oficina_Britt.csv; com a
+# coluna Avaliacao_Cliente também entram as métricas). Cada bloco de linhas é codificado uma vez e passa uma única
+# vez, vetorizado, por cada modelo, acumulando:
+#   todos    previsões, acertos e matriz de confusão por 'Servico'
+#   árvore   decision_path: profundidade dos caminhos, visitas por nó, colunas testadas em cada caminho, acertos
+#            por folha
+#   SVM      com kernel linear, a contribuição de cada coluna para a decisão de cada par um-contra-um: peso x valor
+#            escalonado em relação à ordem de serviço média do treino ((x - media) / desvio)
+# A saída é um relatório estático (index.html com figuras PNG e um CSV por modelo com as linhas por serviço). As
+# figuras usam a Figure do matplotlib direto, sem pyplot: nada de janela nem plt.show(), que trava o menu. A árvore
+# é desenhada só até --profundidade-figura e escrita como texto (export_text) até --profundidade-texto.
+#
+# Uso: python -m oficina.relatorio [--entrada lote.csv] [--modelos arvore svm] [--saida relatorio_oficina]
+import argparse
+import html
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from scipy import sparse
+from sklearn.tree import export_text, plot_tree
+
+from oficina.dados import ARQUIVO_DADOS, COLUNA_ALVO, COLUNA_SERVICO, COLUNAS_NUMERICAS
+from oficina.artefatos import MODELOS_PADRAO, escrever_atomicamente, obter_arvore, obter_svm
+from oficina.codificador import CodificadorOficina, PreditorCodificado
+from oficina.svm_linear import compilar_se_linear
+from oficina.instrumentacao import etapa
+
+DIRETORIO_RELATORIO = 'relatorio_oficina'
+TAMANHO_BLOCO_PADRAO = 50_000 # Linhas do lote por bloco, como no oficina/lote.py
+PROFUNDIDADE_FIGURA = 3 # O plot_tree da árvore inteira fica ilegível (e lento) com milhares de nós
+PROFUNDIDADE_TEXTO = 8
+LINHAS_TABELA = 30 # Linhas das tabelas do HTML (serviços, nós, folhas, colunas); os CSVs têm todas
+ROTULOS_MODELOS = {'arvore': 'Árvore de Decisão', 'svm': 'SVM'}
+
+
+class EstatisticasModelo:
+    # Acumula, bloco a bloco, previsões e acertos por serviço. classes: as do modelo; notas reais fora delas contam
+    # como erro, mas não entram na matriz de confusão
+    def __init__(self, classes):
+        self.classes = np.asarray(classes)
+        self.por_servico = {} # servico -> {'linhas', 'previstas' (K,), 'confusao' (K x K: real x prevista)}
+        self.com_rotulos = False
+
+    def acumular(self, servicos, previsoes, y=None):
+        n_classes = len(self.classes)
+        codigos, nomes = pd.factorize(servicos)
+        indices_previstos = np.searchsorted(self.classes, previsoes)
+        previstas = np.bincount(codigos * n_classes + indices_previstos,
+                                minlength=len(nomes) * n_classes).reshape(len(nomes), n_classes)
+        linhas = np.bincount(codigos, minlength=len(nomes))
+        if y is not None:
+            self.com_rotulos = True
+            y = np.asarray(y)
+            indices_reais = np.minimum(np.searchsorted(self.classes, y), n_classes - 1)
+            conhecidas = self.classes[indices_reais] == y
+            chave = (codigos * n_classes + indices_reais) * n_classes + indices_previstos
+            confusao = np.bincount(chave[conhecidas], minlength=len(nomes) * n_classes * n_classes)
+            confusao = confusao.reshape(len(nomes), n_classes, n_classes)
+        for posicao, servico in enumerate(nomes):
+            registro = self.por_servico.setdefault(servico, {'linhas': 0, 'previstas': np.zeros(n_classes, dtype=np.int64),
+                                                             'confusao': np.zeros((n_classes, n_classes), dtype=np.int64)})
+            registro['linhas'] += int(linhas[posicao])
+            registro['previstas'] += previstas[posicao]
+            if y is not None:
+                registro['confusao'] += confusao[posicao]
+
+    def linhas(self):
+        return sum(registro['linhas'] for registro in self.por_servico.values())
+
+    def confusao(self):
+        return sum((registro['confusao'] for registro in self.por_servico.values()),
+                   np.zeros((len(self.classes),) * 2, dtype=np.int64))
+
+    def acuracia(self, registro=None):
+        # Acertos / linhas (todas as linhas, inclusive as de notas fora das classes do modelo)
+        if registro is None:
+            return float(np.trace(self.confusao()) / max(self.linhas(), 1))
+        return float(np.trace(registro['confusao']) / max(registro['linhas'], 1))
+
+    def tabela_servicos(self):
+        # DataFrame por serviço, do mais frequente para o menos
+        linhas = []
+        for servico, registro in self.por_servico.items():
+            linha = {COLUNA_SERVICO: servico, 'linhas': registro['linhas']}
+            if self.com_rotulos:
+                linha['acuracia'] = self.acuracia(registro)
+                erros = registro['confusao'] * (1 - np.eye(len(self.classes), dtype=np.int64))
+                real, prevista = np.unravel_index(np.argmax(erros), erros.shape)
+                linha['erro_mais_comum'] = f"{self.classes[real]} -> {self.classes[prevista]}" if erros.any() else ''
+            for classe, quantidade in zip(self.classes, registro['previstas']):
+                linha[f'previstas_{classe}'] = int(quantidade)
+            linhas.append(linha)
+        return pd.DataFrame(linhas).sort_values('linhas', ascending=False, kind='stable').reset_index(drop=True)
+
+
+class EstatisticasArvore:
+    # decision_path de cada bloco: caminhos (linhas x nós, CSR) somados sem laço por linha
+    def __init__(self, modelo, colunas):
+        self.modelo = modelo
+        self.colunas = list(colunas)
+        estrutura = modelo.tree_
+        self.visitas = np.zeros(estrutura.node_count, dtype=np.int64)
+        self.acertos_folha = np.zeros(estrutura.node_count, dtype=np.int64)
+        self.linhas_testando_coluna = np.zeros(len(self.colunas), dtype=np.int64)
+        self.profundidades = np.zeros(estrutura.max_depth + 1, dtype=np.int64)
+        self.profundidade_servico = {} # servico -> [linhas, soma das profundidades, maior profundidade]
+
+    def prever(self, X):
+        # Mesmo resultado do predict (classe de maior peso na folha), junto com a folha de cada linha
+        folhas = self.modelo.apply(X)
+        return self.modelo.classes_[np.argmax(self.modelo.tree_.value[folhas, 0], axis=1)], folhas
+
+    def acumular(self, X, servicos, folhas, acertos=None):
+        caminhos = self.modelo.decision_path(X)
+        nos_por_linha = np.diff(caminhos.indptr)
+        profundidade = nos_por_linha - 1 # Arestas da raiz até a folha
+        self.visitas += np.bincount(caminhos.indices, minlength=len(self.visitas))
+        self.profundidades += np.bincount(profundidade, minlength=len(self.profundidades))
+
+        # Colunas testadas em cada caminho (uma coluna testada duas vezes no mesmo caminho conta uma vez)
+        coluna_no = self.modelo.tree_.feature[caminhos.indices]
+        internos = coluna_no >= 0
+        linhas_nos = np.repeat(np.arange(X.shape[0]), nos_por_linha)
+        testes = sparse.csr_matrix((np.ones(np.count_nonzero(internos)), (linhas_nos[internos], coluna_no[internos])),
+                                   shape=(X.shape[0], len(self.colunas)))
+        self.linhas_testando_coluna += np.bincount(testes.indices, minlength=len(self.colunas))
+
+        if acertos is not None:
+            self.acertos_folha += np.bincount(folhas, weights=acertos, minlength=len(self.acertos_folha)).astype(np.int64)
+        codigos, nomes = pd.factorize(servicos)
+        linhas = np.bincount(codigos, minlength=len(nomes))
+        somas = np.bincount(codigos, weights=profundidade, minlength=len(nomes))
+        maximos = np.zeros(len(nomes), dtype=np.int64)
+        np.maximum.at(maximos, codigos, profundidade)
+        for posicao, servico in enumerate(nomes):
+            registro = self.profundidade_servico.setdefault(servico, [0, 0.0, 0])
+            registro[0] += int(linhas[posicao])
+            registro[1] += somas[posicao]
+            registro[2] = max(registro[2], int(maximos[posicao]))
+
+    def regra(self, no):
+        estrutura = self.modelo.tree_
+        return f"{self.colunas[estrutura.feature[no]]} <= {estrutura.threshold[no]:.4g}"
+
+    def profundidade_nos(self):
+        estrutura = self.modelo.tree_
+        profundidade = np.zeros(estrutura.node_count, dtype=np.int64)
+        for no in range(estrutura.node_count): # Os filhos sempre têm id maior que o pai
+            for filho in (estrutura.children_left[no], estrutura.children_right[no]):
+                if filho >= 0:
+                    profundidade[filho] = profundidade[no] + 1
+        return profundidade
+
+
+class EstatisticasSVMLinear:
+    # Contribuição da coluna j para a decisão do par p: peso[p, j] x (x_j - media_j) / desvio_j. A média do |.| e a
+    # média com sinal saem só das somas de |x_c| e de x_c por coluna, sem montar a matriz linhas x pares x colunas
+    def __init__(self, modelo, escalonador, colunas):
+        coeficientes = modelo.coef_
+        self.pesos = coeficientes.toarray() if hasattr(coeficientes, 'toarray') else np.asarray(coeficientes)
+        media = escalonador.mean_ if escalonador.mean_ is not None else np.zeros(len(colunas))
+        escala = escalonador.scale_ if escalonador.scale_ is not None else np.ones(len(colunas))
+        # x_c = (x - media) / desvio para todas as colunas, inclusive as one-hot (media_j = frequência do serviço)
+        self.codificador_centrado = CodificadorOficina(colunas, media, escala)
+        # Decisão da ordem de serviço média: intercepto do modelo com a entrada escalonada como o SVM a recebeu
+        media_transformada = media / escala if escalonador.with_mean is False else np.zeros(len(colunas))
+        self.decisao_base = np.asarray(modelo.intercept_) + self.pesos @ media_transformada
+        self.colunas = list(colunas)
+        self.classes = np.asarray(modelo.classes_)
+        n_classes = len(self.classes)
+        self.pares = [(i, j) for i in range(n_classes) for j in range(i + 1, n_classes)] if n_classes > 2 else [(1, 0)]
+        self.soma_abs = np.zeros(len(colunas))
+        self.soma = np.zeros(len(colunas))
+        self.linhas = 0
+
+    def acumular(self, servicos, numericos, buffer=None):
+        X_centrado = self.codificador_centrado.codificar(servicos, numericos, buffer)
+        self.soma_abs += np.abs(X_centrado).sum(axis=0)
+        self.soma += X_centrado.sum(axis=0)
+        self.linhas += len(X_centrado)
+
+    def contribuicoes(self):
+        # (pares x colunas) média de |contribuição| e média com sinal; positiva favorece a primeira classe do par
+        linhas = max(self.linhas, 1)
+        return np.abs(self.pesos) * (self.soma_abs / linhas), self.pesos * (self.soma / linhas)
+
+
+def obter_artefatos(dados, caminho_dados, nomes):
+    # Mesmos artefatos do Menu(Main).py / carregar_modelos (mesma divisão e configuração): lidos do disco se já
+    # treinados com este CSV
+    indices_treino, _, y_treino, _ = dados.dividir()
+    artefatos = {}
+    if 'arvore' in nomes:
+        artefatos['arvore'] = obter_arvore(dados.matriz_arvore(indices_treino), y_treino, dados.servicos, caminho_dados,
+                                           colunas=dados.colunas)
+    if 'svm' in nomes:
+        artefatos['svm'] = obter_svm(dados.matriz_esparsa(indices_treino, np.float64), y_treino, dados.servicos,
+                                     caminho_dados, colunas=dados.colunas)
+    return artefatos
+
+
+def blocos_entrada(caminho_entrada, tamanho_bloco):
+    # (servicos, numericos, y ou None) por bloco do CSV, com colunas e serviços limpos como no carregar_dados
+    for bloco in pd.read_csv(caminho_entrada, chunksize=tamanho_bloco):
+        bloco.columns = bloco.columns.str.strip()
+        servicos = bloco[COLUNA_SERVICO].astype(str).str.strip().to_numpy()
+        y = bloco[COLUNA_ALVO].to_numpy() if COLUNA_ALVO in bloco.columns else None
+        yield servicos, bloco[COLUNAS_NUMERICAS].to_numpy(np.float64), y
+
+
+def analisar(artefatos, blocos, tamanho_bloco):
+    # Uma passada pelos blocos; retorna {nome: EstatisticasModelo} e as estatísticas da árvore e do SVM linear
+    estatisticas = {nome: EstatisticasModelo(artefato['modelo'].classes_) for nome, artefato in artefatos.items()}
+    arvore = svm_linear = None
+    preditor_svm = None
+    if 'arvore' in artefatos:
+        arvore = EstatisticasArvore(artefatos['arvore']['modelo'], artefatos['arvore']['colunas'])
+        codificador = CodificadorOficina(artefatos['arvore']['colunas'])
+        buffer_arvore = codificador.novo_buffer(tamanho_bloco)
+    if 'svm' in artefatos:
+        artefato_svm = artefatos['svm']
+        codificador_svm = CodificadorOficina.do_artefato(artefato_svm)
+        preditor_svm = (compilar_se_linear(artefato_svm['modelo'], codificador_svm)
+                        or PreditorCodificado(artefato_svm['modelo'], codificador_svm))
+        buffer_svm = preditor_svm.novo_buffer(tamanho_bloco)
+        if getattr(artefato_svm['modelo'], 'kernel', None) == 'linear':
+            svm_linear = EstatisticasSVMLinear(artefato_svm['modelo'], artefato_svm['escalonador'], artefato_svm['colunas'])
+            buffer_centrado = svm_linear.codificador_centrado.novo_buffer(tamanho_bloco)
+
+    for servicos, numericos, y in blocos:
+        with etapa('relatorio_bloco', len(servicos)):
+            if arvore is not None:
+                X = codificador.codificar(servicos, numericos, buffer_arvore)
+                previsoes, folhas = arvore.prever(X)
+                estatisticas['arvore'].acumular(servicos, previsoes, y)
+                arvore.acumular(X, servicos, folhas, None if y is None else previsoes == y)
+            if preditor_svm is not None:
+                estatisticas['svm'].acumular(servicos, preditor_svm.prever(servicos, numericos, buffer_svm), y)
+                if svm_linear is not None:
+                    svm_linear.acumular(servicos, numericos, buffer_centrado)
+    return estatisticas, arvore, svm_linear
+
+
+def nova_figura(tamanho):
+    # Figure com o canvas Agg (PNG em memória), independente do backend do pyplot
+    figura = Figure(figsize=tamanho)
+    FigureCanvasAgg(figura)
+    return figura
+
+
+def salvar_figura(figura, caminho):
+    escrever_atomicamente(caminho, lambda arquivo: figura.savefig(arquivo, format='png', dpi=100, bbox_inches='tight'))
+
+
+def salvar_arvore(modelo, nomes_features, diretorio, profundidade_figura=PROFUNDIDADE_FIGURA,
+                  profundidade_texto=PROFUNDIDADE_TEXTO):
+    # Figura (PNG) até profundidade_figura e texto (export_text) até profundidade_texto; nenhuma janela é aberta,
+    # então serve também para o menu. Retorna (caminho do PNG, caminho do texto)
+    os.makedirs(diretorio, exist_ok=True)
+    nos_desenhados = min(2 ** (min(profundidade_figura, modelo.get_depth()) + 1) - 1, modelo.tree_.node_count)
+    figura = nova_figura((max(12, min(nos_desenhados, 63) * 0.6), 2.5 * (min(profundidade_figura, modelo.get_depth()) + 1)))
+    eixo = figura.subplots()
+    plot_tree(modelo, max_depth=profundidade_figura, feature_names=list(nomes_features),
+              class_names=[str(classe) for classe in modelo.classes_], filled=True, rounded=True, fontsize=7, ax=eixo)
+    eixo.set_title(f"Árvore de Decisão (até a profundidade {profundidade_figura} de {modelo.get_depth()}, "
+                   f"{modelo.get_n_leaves()} folhas)")
+    caminho_figura = os.path.join(diretorio, 'arvore.png')
+    salvar_figura(figura, caminho_figura)
+
+    texto = export_text(modelo, feature_names=list(nomes_features), max_depth=profundidade_texto)
+    caminho_texto = os.path.join(diretorio, 'arvore.txt')
+    escrever_atomicamente(caminho_texto, lambda arquivo: arquivo.write(texto.encode('utf-8')))
+    return caminho_figura, caminho_texto
+
+
+def figura_confusao(estatisticas, titulo, caminho):
+    confusao = estatisticas.confusao()
+    figura = nova_figura((4.5, 4))
+    eixo = figura.subplots()
+    eixo.imshow(confusao, cmap='Blues')
+    rotulos = [str(classe) for classe in estatisticas.classes]
+    eixo.set_xticks(range(len(rotulos)), rotulos)
+    eixo.set_yticks(range(len(rotulos)), rotulos)
+    eixo.set_xlabel('Prevista')
+    eixo.set_ylabel('Real')
+    limite = confusao.max() / 2 if confusao.size else 0
+    for (real, prevista), quantidade in np.ndenumerate(confusao):
+        eixo.text(prevista, real, str(quantidade), ha='center', va='center',
+                  color='white' if quantidade > limite else 'black')
+    eixo.set_title(titulo)
+    salvar_figura(figura, caminho)
+
+
+def figura_barras(rotulos, valores, titulo, rotulo_x, caminho):
+    figura = nova_figura((7, 0.3 * len(rotulos) + 1.2))
+    eixo = figura.subplots()
+    eixo.barh(range(len(rotulos)), valores)
+    eixo.set_yticks(range(len(rotulos)), rotulos, fontsize=8)
+    eixo.invert_yaxis()
+    eixo.set_xlabel(rotulo_x)
+    eixo.set_title(titulo)
+    salvar_figura(figura, caminho)
+
+
+def tabela_html(cabecalho, linhas):
+    def celula(valor):
+        if isinstance(valor, (float, np.floating)):
+            return f"{valor:.4g}"
+        return html.escape(str(valor))
+    partes = ['<table><tr>', *(f'<th>{html.escape(str(nome))}</th>' for nome in cabecalho), '</tr>']
+    for linha in linhas:
+        partes += ['<tr>', *(f'<td>{celula(valor)}</td>' for valor in linha), '</tr>']
+    partes.append('</table>')
+    return ''.join(partes)
+
+
+def secao_modelo(nome, estatisticas, diretorio):
+    rotulo = ROTULOS_MODELOS[nome]
+    partes = [f'<h2>{rotulo}</h2>']
+    tabela = estatisticas.tabela_servicos()
+    arquivo_csv = f'por_servico_{nome}.csv'
+    conteudo_csv = tabela.to_csv(index=False)
+    escrever_atomicamente(os.path.join(diretorio, arquivo_csv), lambda arquivo: arquivo.write(conteudo_csv.encode('utf-8')))
+    if estatisticas.com_rotulos:
+        partes.append(f'<p>Acurácia: <b>{estatisticas.acuracia() * 100:.2f}%</b> em {estatisticas.linhas()} linhas.</p>')
+        figura_confusao(estatisticas, f'Matriz de confusão ({rotulo})', os.path.join(diretorio, f'confusao_{nome}.png'))
+        partes.append(f'<img src="confusao_{nome}.png" alt="Matriz de confusão">')
+    partes.append(f'<h3>Por serviço</h3><p>Os {min(LINHAS_TABELA, len(tabela))} serviços mais frequentes de '
+                  f'{len(tabela)}; todos em <a href="{arquivo_csv}">{arquivo_csv}</a>.</p>')
+    partes.append(tabela_html(tabela.columns, tabela.head(LINHAS_TABELA).itertuples(index=False)))
+    return partes
+
+
+def secao_arvore(arvore, com_rotulos, diretorio, profundidade_figura, profundidade_texto):
+    modelo, estrutura = arvore.modelo, arvore.modelo.tree_
+    linhas = max(int(arvore.visitas[0]), 1) # Toda linha passa pela raiz
+    partes = ['<h3>Caminhos de decisão (decision_path)</h3>',
+              f'<p>Profundidade da árvore: {modelo.get_depth()}, folhas: {modelo.get_n_leaves()}, nós: {estrutura.node_count}. '
+              f'Profundidade média dos caminhos: {np.dot(np.arange(len(arvore.profundidades)), arvore.profundidades) / linhas:.2f}.</p>']
+    figura_barras([str(profundidade) for profundidade in range(len(arvore.profundidades))], arvore.profundidades,
+                  'Linhas por profundidade do caminho', 'linhas', os.path.join(diretorio, 'profundidades_arvore.png'))
+    partes.append('<img src="profundidades_arvore.png" alt="Profundidade dos caminhos">')
+
+    ordem_colunas = np.argsort(-arvore.linhas_testando_coluna, kind='stable')[:LINHAS_TABELA]
+    ordem_colunas = ordem_colunas[arvore.linhas_testando_coluna[ordem_colunas] > 0]
+    partes.append('<h4>Colunas testadas nos caminhos</h4>')
+    partes.append(tabela_html(['coluna', '% das linhas'], [(arvore.colunas[coluna], 100 * arvore.linhas_testando_coluna[coluna] / linhas)
+                                                            for coluna in ordem_colunas]))
+
+    internos = np.flatnonzero(estrutura.children_left >= 0)
+    profundidade_nos = arvore.profundidade_nos()
+    mais_visitados = internos[np.argsort(-arvore.visitas[internos], kind='stable')][:LINHAS_TABELA]
+    partes.append('<h4>Nós mais visitados</h4>')
+    partes.append(tabela_html(['nó', 'profundidade', 'regra', '% das linhas', '% que segue a regra'], [
+        (no, profundidade_nos[no], arvore.regra(no), 100 * arvore.visitas[no] / linhas,
+         100 * arvore.visitas[estrutura.children_left[no]] / max(arvore.visitas[no], 1)) for no in mais_visitados]))
+
+    profundidade_servico = [(servico, soma / linhas_servico, maximo)
+                            for servico, (linhas_servico, soma, maximo) in arvore.profundidade_servico.items()]
+    partes.append('<h4>Profundidade dos caminhos por serviço</h4>')
+    partes.append(tabela_html([COLUNA_SERVICO, 'média', 'máxima'],
+                              sorted(profundidade_servico, key=lambda item: -item[1])[:LINHAS_TABELA]))
+
+    if com_rotulos:
+        folhas = np.flatnonzero((estrutura.children_left < 0) & (arvore.visitas > 0))
+        erros = arvore.visitas[folhas] - arvore.acertos_folha[folhas]
+        piores = folhas[np.argsort(-erros, kind='stable')][:LINHAS_TABELA]
+        partes.append('<h4>Folhas com mais erros</h4>')
+        partes.append(tabela_html(['folha', 'profundidade', 'classe', 'linhas', 'erros', 'acurácia'], [
+            (folha, profundidade_nos[folha], modelo.classes_[np.argmax(estrutura.value[folha, 0])], arvore.visitas[folha],
+             arvore.visitas[folha] - arvore.acertos_folha[folha], arvore.acertos_folha[folha] / arvore.visitas[folha])
+            for folha in piores if arvore.visitas[folha] > arvore.acertos_folha[folha]]))
+
+    salvar_arvore(modelo, arvore.colunas, diretorio, profundidade_figura, profundidade_texto)
+    partes.append(f'<h4>Árvore</h4><p>Até a profundidade {profundidade_figura}; em texto até a profundidade '
+                  f'{profundidade_texto}: <a href="arvore.txt">arvore.txt</a>.</p><img src="arvore.png" alt="Árvore de Decisão">')
+    return partes
+
+
+def secao_svm_linear(svm_linear, diretorio):
+    media_abs, media_sinal = svm_linear.contribuicoes()
+    partes = ['<h3>Contribuições das colunas (kernel linear)</h3>',
+              '<p>Contribuição = peso do par x (valor - média do treino) / desvio. Positiva favorece a primeira nota '
+              'do par. "Decisão base" é a decisão da ordem de serviço média.</p>']
+    total = media_abs.sum(axis=0)
+    principais = np.argsort(-total, kind='stable')[:LINHAS_TABELA]
+    figura_barras([svm_linear.colunas[coluna] for coluna in principais], total[principais],
+                  'Média de |contribuição| somada nos pares', '|contribuição| média',
+                  os.path.join(diretorio, 'contribuicoes_svm.png'))
+    partes.append('<img src="contribuicoes_svm.png" alt="Contribuições das colunas">')
+    for indice_par, (classe_i, classe_j) in enumerate(svm_linear.pares):
+        par = f'{svm_linear.classes[classe_i]} x {svm_linear.classes[classe_j]}'
+        ordem = np.argsort(-media_abs[indice_par], kind='stable')[:10]
+        partes.append(f'<h4>Par {html.escape(par)} (decisão base {svm_linear.decisao_base[indice_par]:.3f})</h4>')
+        partes.append(tabela_html(['coluna', '|contribuição| média', 'contribuição média', 'peso'], [
+            (svm_linear.colunas[coluna], media_abs[indice_par, coluna], media_sinal[indice_par, coluna],
+             svm_linear.pesos[indice_par, coluna]) for coluna in ordem]))
+    return partes
+
+
+ESTILO = ('body{font-family:sans-serif;margin:2em;max-width:70em}table{border-collapse:collapse;margin:0.5em 0 1.5em}'
+          'td,th{border:1px solid #ccc;padding:2px 8px;text-align:right}td:first-child,th:first-child{text-align:left}'
+          'img{max-width:100%}')
+
+
+def escrever_relatorio(diretorio, origem, estatisticas, arvore, svm_linear, profundidade_figura, profundidade_texto):
+    os.makedirs(diretorio, exist_ok=True)
+    partes = [f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Relatório dos modelos</title>'
+              f'<style>{ESTILO}</style></head><body><h1>Relatório dos modelos</h1><p>{html.escape(origem)}</p>']
+    for nome, estatisticas_modelo in estatisticas.items():
+        partes += secao_modelo(nome, estatisticas_modelo, diretorio)
+        if nome == 'arvore':
+            partes += secao_arvore(arvore, estatisticas_modelo.com_rotulos, diretorio, profundidade_figura, profundidade_texto)
+        elif nome == 'svm':
+            partes += (secao_svm_linear(svm_linear, diretorio) if svm_linear is not None
+                       else ['<p>Kernel não linear: sem contribuições por coluna.</p>'])
+    partes.append('</body></html>')
+    conteudo = '\n'.join(partes)
+    caminho = os.path.join(diretorio, 'index.html')
+    escrever_atomicamente(caminho, lambda arquivo: arquivo.write(conteudo.encode('utf-8')))
+    return caminho
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Relatório de desempenho por serviço e explicação dos modelos (HTML + PNG).")
+    parser.add_argument('--entrada', help="CSV de ordens de serviço (padrão: o X_teste da divisão do menu)")
+    parser.add_argument('--modelos', nargs='+', choices=MODELOS_PADRAO, default=list(MODELOS_PADRAO))
+    parser.add_argument('--saida', default=DIRETORIO_RELATORIO, help="Diretório do relatório")
+    parser.add_argument('--dados-treino', default=ARQUIVO_DADOS, help="CSV usado para treinar os modelos")
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO_PADRAO)
+    parser.add_argument('--profundidade-figura', type=int, default=PROFUNDIDADE_FIGURA)
+    parser.add_argument('--profundidade-texto', type=int, default=PROFUNDIDADE_TEXTO)
+    args = parser.parse_args(argumentos)
+
+    from oficina.cache_binario import carregar_dados_codificados # Import local, como no artefatos.carregar_modelos
+    try:
+        dados = carregar_dados_codificados(args.dados_treino)
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.dados_treino}' não foi encontrado.")
+        return 1
+    artefatos = obter_artefatos(dados, args.dados_treino, args.modelos)
+
+    if args.entrada is None:
+        _, indices_teste, _, y_teste = dados.dividir()
+        blocos = [(*dados.linhas_brutas(indices_teste), y_teste.to_numpy())]
+        tamanho_bloco = len(indices_teste)
+        origem = f"Conjunto de teste do menu ({len(indices_teste)} linhas de '{args.dados_treino}')."
+    else:
+        blocos, tamanho_bloco = blocos_entrada(args.entrada, args.tamanho_bloco), args.tamanho_bloco
+        origem = f"Lote '{args.entrada}'."
+    try:
+        estatisticas, arvore, svm_linear = analisar(artefatos, blocos, tamanho_bloco)
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.entrada}' não foi encontrado.")
+        return 1
+    except KeyError as erro_coluna:
+        print(f"Erro: Coluna obrigatória ausente no arquivo de entrada: {erro_coluna}")
+        return 1
+
+    caminho = escrever_relatorio(args.saida, origem, estatisticas, arvore, svm_linear, args.profundidade_figura,
+                                 args.profundidade_texto)
+    for nome, estatisticas_modelo in estatisticas.items():
+        acuracia = f", acurácia {estatisticas_modelo.acuracia() * 100:.2f}%" if estatisticas_modelo.com_rotulos else ''
+        print(f"{ROTULOS_MODELOS[nome]}: {estatisticas_modelo.linhas()} linhas{acuracia}")
+    print(f"Relatório gravado em '{caminho}'.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,349 @@
+# Servidor local de previsões (HTTP/JSON sobre asyncio) para sistemas que não conseguem usar o menu interativo.
+# Carrega a Árvore e o SVM uma única vez e agrupa as requisições que chegam juntas em uma só chamada de predict.
+#
+# Uso: python -m oficina.servidor [--porta 8000] [--max-lote 64] [--max-espera-ms 2]
+#   POST /prever/arvore  e  POST /prever/svm
+#     corpo: {"Servico": "Troca de Oleo", "Valor_Pecas": 120.5, "Valor_Mao_Obra": 50, "Tempo_Servico_Horas": 1,
+#             "Quilometragem_Carro": 85000, "Ano_Fabricacao_Carro": 2018}
+#     ou uma lista desses objetos; resposta: {"previsoes": [4, ...]}
+#   GET /saude -> {"status": "ok", "modelos": [...]}
+#   --cache-previsoes N põe um cache LRU de N entradas na frente de cada modelo (oficina/cache_previsoes.py)
+#   --atualizacao-incremental liga POST /avaliacoes (oficina/atualizacao_incremental.py)
+#     corpo: as seis colunas mais "Avaliacao_Cliente", um objeto ou uma lista; o svm_incremental aprende na hora
+#     e, quando um limite é cruzado, todos os modelos são retreinados em outro processo e trocados ao terminar
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from oficina.dados import ARQUIVO_DADOS, COLUNA_ALVO, COLUNA_SERVICO, COLUNAS_NUMERICAS
+from oficina.artefatos import MODELOS_PADRAO, MODELOS_SERVIDOS, carregar_modelos
+from oficina.cache_previsoes import CASAS_DECIMAIS_PADRAO, CachePrevisoes, PreditorComCache
+from oficina.atualizacao_incremental import LIMITE_LINHAS_RETREINO, AtualizadorIncremental, retreinar_completo
+
+MAX_LOTE_PADRAO = 64 # Máximo de linhas por chamada de predict
+MAX_ESPERA_MS_PADRAO = 2.0 # Quanto tempo o primeiro pedido de um lote espera por companhia
+TAMANHO_MAXIMO_CORPO = 1 << 20
+MENSAGENS_STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                    413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class EntradaInvalida(ValueError):
+    pass
+
+
+def validar_entradas(corpo):
+    # Aceita um objeto ou uma lista de objetos com as seis colunas brutas; retorna (servicos, matriz numérica)
+    entradas = corpo if isinstance(corpo, list) else [corpo]
+    if not entradas:
+        raise EntradaInvalida("Nenhuma entrada enviada.")
+    servicos = []
+    numericos = np.empty((len(entradas), len(COLUNAS_NUMERICAS)), dtype=np.float64)
+    for indice_entrada, entrada in enumerate(entradas):
+        if not isinstance(entrada, dict):
+            raise EntradaInvalida(f"Entrada {indice_entrada}: esperado um objeto JSON.")
+        try:
+            servicos.append(str(entrada[COLUNA_SERVICO]).strip())
+            for indice_coluna, nome_coluna in enumerate(COLUNAS_NUMERICAS):
+                numericos[indice_entrada, indice_coluna] = float(entrada[nome_coluna])
+        except KeyError as erro_coluna:
+            raise EntradaInvalida(f"Entrada {indice_entrada}: coluna obrigatória ausente: {erro_coluna}")
+        except (TypeError, ValueError):
+            raise EntradaInvalida(f"Entrada {indice_entrada}: valor numérico inválido.")
+    return servicos, numericos
+
+
+def validar_avaliacoes(corpo):
+    # Como validar_entradas, mais a nota inteira de Avaliacao_Cliente; retorna (servicos, numéricos, notas)
+    servicos, numericos = validar_entradas(corpo)
+    entradas = corpo if isinstance(corpo, list) else [corpo]
+    notas = np.empty(len(entradas), dtype=np.int64)
+    for indice_entrada, entrada in enumerate(entradas):
+        if COLUNA_ALVO not in entrada:
+            raise EntradaInvalida(f"Entrada {indice_entrada}: coluna obrigatória ausente: '{COLUNA_ALVO}'")
+        try:
+            nota = float(entrada[COLUNA_ALVO])
+        except (TypeError, ValueError):
+            nota = None
+        if nota is None or not nota.is_integer():
+            raise EntradaInvalida(f"Entrada {indice_entrada}: {COLUNA_ALVO} deve ser um número inteiro.")
+        notas[indice_entrada] = int(nota)
+    return servicos, numericos, notas
+
+
+class AgrupadorPrevisoes:
+    # Junta os pedidos de um modelo que chegam dentro da janela max_espera (até max_lote linhas)
+    # e responde todos com uma única chamada vetorizada de predict. O predict roda na thread do agrupador, fora
+    # do loop de eventos: um lote grande não segura as outras conexões (nem o /saude). Com uma thread só por
+    # agrupador, os lotes de um modelo continuam um de cada vez e o buffer não é usado por dois ao mesmo tempo
+    def __init__(self, preditor, max_lote=MAX_LOTE_PADRAO, max_espera_ms=MAX_ESPERA_MS_PADRAO):
+        self.preditor = preditor
+        self.max_lote = max(1, max_lote)
+        self.max_espera = max_espera_ms / 1000
+        self.fila = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.buffer = preditor.novo_buffer(self.max_lote)
+        self.lotes_processados = 0
+        self.linhas_processadas = 0
+
+    async def prever(self, servicos, numericos):
+        futuro = asyncio.get_running_loop().create_future()
+        await self.fila.put((servicos, numericos, futuro))
+        return await futuro
+
+    async def executar(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pedidos = [await self.fila.get()]
+            total_linhas = len(pedidos[0][0])
+            prazo = loop.time() + self.max_espera
+            while total_linhas < self.max_lote:
+                tempo_restante = prazo - loop.time()
+                if tempo_restante <= 0:
+                    break
+                try:
+                    pedido = await asyncio.wait_for(self.fila.get(), tempo_restante)
+                except asyncio.TimeoutError:
+                    break
+                pedidos.append(pedido)
+                total_linhas += len(pedido[0])
+            await self.processar(pedidos, total_linhas)
+
+    async def processar(self, pedidos, total_linhas):
+        # As respostas (set_result) ficam no loop de eventos; só o predict vai para a thread
+        loop = asyncio.get_running_loop()
+        try:
+            servicos = [servico for pedido in pedidos for servico in pedido[0]]
+            numericos = np.concatenate([pedido[1] for pedido in pedidos])
+            buffer = self.buffer if total_linhas <= self.max_lote else None # Pedido maior que o lote: buffer próprio
+            previsoes = (await loop.run_in_executor(self.executor, self.preditor.prever, servicos, numericos,
+                                                    buffer)).tolist()
+        except Exception as erro_previsao:
+            for pedido in pedidos:
+                if not pedido[2].done():
+                    pedido[2].set_exception(erro_previsao)
+            return
+
+        self.lotes_processados += 1
+        self.linhas_processadas += total_linhas
+        inicio = 0
+        for servicos_pedido, numericos_pedido, futuro in pedidos:
+            fim = inicio + len(servicos_pedido)
+            if not futuro.done(): # O cliente pode ter desconectado
+                futuro.set_result(previsoes[inicio:fim])
+            inicio = fim
+
+    def trocar_preditor(self, preditor):
+        # Roda no loop de eventos; um lote já na thread termina com o preditor e o buffer antigos e o seguinte
+        # já usa o novo.
+        # Com cache na frente, o cache se esvazia sozinho ao ver o preditor trocado
+        if isinstance(self.preditor, PreditorComCache):
+            self.preditor.preditor = preditor
+        else:
+            self.preditor = preditor
+        self.buffer = preditor.novo_buffer(self.max_lote) # O layout das colunas pode ter mudado no retreino
+
+
+class ServidorPrevisoes:
+    def __init__(self, agrupadores, atualizador=None):
+        self.agrupadores = agrupadores # {nome do modelo: AgrupadorPrevisoes}
+        self.atualizador = atualizador # AtualizadorIncremental, com --atualizacao-incremental
+        # Uma única thread aplica as avaliações (na ordem de chegada) fora do loop de eventos
+        self.executor_atualizacao = ThreadPoolExecutor(max_workers=1) if atualizador is not None else None
+        self.tarefa_retreino = None
+
+    async def tratar_conexao(self, leitor, escritor):
+        # Uma conexão pode enviar várias requisições (HTTP/1.1 keep-alive)
+        try:
+            while True:
+                linha_requisicao = await leitor.readline()
+                if not linha_requisicao:
+                    break
+                cabecalhos = {}
+                while True:
+                    linha = await leitor.readline()
+                    if linha in (b'\r\n', b'\n', b''):
+                        break
+                    nome, _, valor = linha.decode('latin-1').partition(':')
+                    cabecalhos[nome.strip().lower()] = valor.strip()
+
+                partes = linha_requisicao.decode('latin-1').split()
+                if len(partes) != 3:
+                    await self.responder(escritor, 400, {'erro': "Linha de requisição inválida."}, fechar=True)
+                    break
+                metodo, caminho, versao_http = partes
+                try:
+                    tamanho_corpo = int(cabecalhos.get('content-length', 0) or 0)
+                except ValueError:
+                    tamanho_corpo = -1
+                if tamanho_corpo < 0:
+                    await self.responder(escritor, 400, {'erro': "Content-Length inválido."}, fechar=True)
+                    break
+                if tamanho_corpo > TAMANHO_MAXIMO_CORPO:
+                    await self.responder(escritor, 413, {'erro': "Corpo da requisição grande demais."}, fechar=True)
+                    break
+                corpo = await leitor.readexactly(tamanho_corpo) if tamanho_corpo else b''
+
+                fechar = (cabecalhos.get('connection', '').lower() == 'close'
+                          or (versao_http == 'HTTP/1.0' and cabecalhos.get('connection', '').lower() != 'keep-alive'))
+                status, resposta = await self.rotear(metodo, caminho, corpo)
+                await self.responder(escritor, status, resposta, fechar)
+                if fechar:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def rotear(self, metodo, caminho, corpo):
+        if caminho == '/saude':
+            estatisticas = {nome: {'lotes': agrupador.lotes_processados, 'linhas': agrupador.linhas_processadas}
+                            for nome, agrupador in self.agrupadores.items()}
+            for nome, agrupador in self.agrupadores.items():
+                if isinstance(agrupador.preditor, PreditorComCache):
+                    estatisticas[nome]['cache'] = agrupador.preditor.cache.estatisticas()
+            resposta = {'status': 'ok', 'modelos': list(self.agrupadores), 'estatisticas': estatisticas}
+            if self.atualizador is not None:
+                resposta['atualizacao'] = self.atualizador.estatisticas()
+            return 200, resposta
+
+        if caminho == '/avaliacoes' and self.atualizador is not None:
+            if metodo != 'POST':
+                return 405, {'erro': "Use POST para registrar avaliações."}
+            try:
+                servicos, numericos, notas = validar_avaliacoes(json.loads(corpo or b'null'))
+            except json.JSONDecodeError:
+                return 400, {'erro': "Corpo não é um JSON válido."}
+            except EntradaInvalida as erro_entrada:
+                return 400, {'erro': str(erro_entrada)}
+            try:
+                return 200, await self.registrar_avaliacoes(servicos, numericos, notas)
+            except Exception as erro_atualizacao:
+                return 500, {'erro': f"Erro inesperado ao registrar as avaliações: {erro_atualizacao}"}
+
+        prefixo = '/prever/'
+        if not caminho.startswith(prefixo) or caminho[len(prefixo):] not in self.agrupadores:
+            return 404, {'erro': f"Caminho desconhecido: {caminho}. Use {', '.join(prefixo + nome for nome in self.agrupadores)}."}
+        if metodo != 'POST':
+            return 405, {'erro': "Use POST para previsões."}
+
+        try:
+            servicos, numericos = validar_entradas(json.loads(corpo or b'null'))
+        except json.JSONDecodeError:
+            return 400, {'erro': "Corpo não é um JSON válido."}
+        except EntradaInvalida as erro_entrada:
+            return 400, {'erro': str(erro_entrada)}
+
+        try:
+            previsoes = await self.agrupadores[caminho[len(prefixo):]].prever(servicos, numericos)
+        except Exception as erro_previsao:
+            return 500, {'erro': f"Erro inesperado durante a previsão: {erro_previsao}"}
+        return 200, {'previsoes': previsoes}
+
+    async def registrar_avaliacoes(self, servicos, numericos, notas):
+        loop = asyncio.get_running_loop()
+        preditor = await loop.run_in_executor(self.executor_atualizacao, self.atualizador.registrar,
+                                              servicos, numericos, notas)
+        self.agrupadores['svm_incremental'].trocar_preditor(preditor)
+        motivo = self.atualizador.motivo_retreino()
+        if motivo is not None and self.tarefa_retreino is None:
+            self.tarefa_retreino = asyncio.create_task(self.retreinar(motivo))
+        return {'registradas': len(notas), 'linhas_pendentes': self.atualizador.linhas_pendentes,
+                'retreino_em_andamento': self.tarefa_retreino is not None}
+
+    async def retreinar(self, motivo):
+        # Retreino completo em outro processo; até ele terminar, os modelos atuais continuam respondendo
+        loop = asyncio.get_running_loop()
+        nomes = [nome for nome in self.agrupadores if nome != 'svm_incremental']
+        print(f"Retreino completo iniciado ({motivo}).", flush=True)
+        try:
+            caminho_avaliacoes = await loop.run_in_executor(self.executor_atualizacao, self.atualizador.iniciar_retreino)
+            # spawn: o processo filho não herda as threads nem o loop de eventos deste processo
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as processo:
+                modelos = await loop.run_in_executor(processo, retreinar_completo, self.atualizador.caminho_dados,
+                                                     caminho_avaliacoes, nomes)
+            preditor_incremental = await loop.run_in_executor(self.executor_atualizacao,
+                                                              self.atualizador.concluir_retreino)
+        except Exception as erro_retreino:
+            await loop.run_in_executor(self.executor_atualizacao, self.atualizador.cancelar_retreino)
+            print(f"Aviso: o retreino completo falhou ({erro_retreino}); os modelos atuais continuam em uso.", flush=True)
+        else:
+            for nome, preditor in modelos.items():
+                self.agrupadores[nome].trocar_preditor(preditor)
+            self.agrupadores['svm_incremental'].trocar_preditor(preditor_incremental)
+            print("Retreino completo concluído; modelos trocados.", flush=True)
+        finally:
+            self.tarefa_retreino = None
+
+    async def responder(self, escritor, status, resposta, fechar=False):
+        corpo = json.dumps(resposta, ensure_ascii=False).encode('utf-8')
+        cabecalho = (f"HTTP/1.1 {status} {MENSAGENS_STATUS[status]}\r\n"
+                     f"Content-Type: application/json; charset=utf-8\r\n"
+                     f"Content-Length: {len(corpo)}\r\n"
+                     f"Connection: {'close' if fechar else 'keep-alive'}\r\n\r\n")
+        escritor.write(cabecalho.encode('latin-1') + corpo)
+        await escritor.drain()
+
+
+async def servir(modelos, host, porta, max_lote=MAX_LOTE_PADRAO, max_espera_ms=MAX_ESPERA_MS_PADRAO, atualizador=None):
+    agrupadores = {nome: AgrupadorPrevisoes(preditor, max_lote, max_espera_ms) for nome, preditor in modelos.items()}
+    tarefas_agrupadores = [asyncio.create_task(agrupador.executar()) for agrupador in agrupadores.values()]
+    servidor = await asyncio.start_server(ServidorPrevisoes(agrupadores, atualizador).tratar_conexao, host, porta)
+    print(f"Servidor de previsões em http://{host}:{porta} (max_lote={max_lote}, max_espera={max_espera_ms} ms)", flush=True)
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        for tarefa in tarefas_agrupadores:
+            tarefa.cancel()
+        for agrupador in agrupadores.values():
+            agrupador.executor.shutdown(wait=False)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON local de previsões da oficina.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8000)
+    parser.add_argument('--max-lote', type=int, default=MAX_LOTE_PADRAO)
+    parser.add_argument('--max-espera-ms', type=float, default=MAX_ESPERA_MS_PADRAO)
+    parser.add_argument('--dados-treino', default=ARQUIVO_DADOS)
+    parser.add_argument('--modelos', nargs='+', choices=MODELOS_SERVIDOS, default=list(MODELOS_PADRAO))
+    parser.add_argument('--cache-previsoes', type=int, default=0,
+                        help="Entradas do cache LRU de previsões por modelo (0 desliga)")
+    parser.add_argument('--casas-decimais', type=int, default=CASAS_DECIMAIS_PADRAO,
+                        help="Arredondamento das colunas numéricas na chave do cache")
+    parser.add_argument('--atualizacao-incremental', action='store_true',
+                        help="Liga POST /avaliacoes (também serve o svm_incremental)")
+    parser.add_argument('--limite-linhas-retreino', type=int, default=LIMITE_LINHAS_RETREINO,
+                        help="Avaliações novas que disparam o retreino completo")
+    args = parser.parse_args(argumentos)
+
+    atualizador = None
+    try:
+        if args.atualizacao_incremental:
+            # O svm_incremental servido é o do atualizador, já com as avaliações do log aplicadas
+            atualizador = AtualizadorIncremental(args.dados_treino, limite_linhas=args.limite_linhas_retreino)
+            modelos = carregar_modelos(args.dados_treino, [nome for nome in args.modelos if nome != 'svm_incremental'])
+            modelos['svm_incremental'] = atualizador.preditor
+        else:
+            modelos = carregar_modelos(args.dados_treino, args.modelos)
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.dados_treino}' não foi encontrado.")
+        return 1
+    if args.cache_previsoes > 0:
+        modelos = {nome: PreditorComCache(preditor, CachePrevisoes(args.cache_previsoes, args.casas_decimais))
+                   for nome, preditor in modelos.items()}
+
+    try:
+        asyncio.run(servir(modelos, args.host, args.porta, args.max_lote, args.max_espera_ms, atualizador))
+    except KeyboardInterrupt:
+        print("Servidor encerrado.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+# Gerador de ordens de serviço sintéticas no esquema do oficina_Britt.csv, para medir o treino e a previsão
+# em volumes de produção. Cada serviço guarda o perfil aprendido do CSV real:
+#   Valor_Pecas, Valor_Mao_Obra, Tempo_Servico_Horas  média do serviço com ruído multiplicativo (log-normal),
+#                                                      então serviços sem peças continuam com Valor_Pecas = 0
+#   Quilometragem_Carro, Ano_Fabricacao_Carro         média do serviço com ruído normal
+#   Avaliacao_Cliente                                 distribuição das notas do serviço, suavizada pela global
+# A dispersão dentro de cada serviço vem dos serviços com mais de uma linha; se nenhum tiver (caso do
+# oficina_Britt.csv atual), usa DISPERSAO_PADRAO. Pedindo mais serviços que o CSV tem, os extras
+# ("Servico Sintetico 00001", ...) são variações de perfis reais sorteados.
+#
+# Uso: python -m oficina.sintetico saida.csv --linhas 1000000 [--servicos 500] [--semente 1]
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from oficina.dados import ARQUIVO_DADOS, COLUNA_ALVO, COLUNA_SERVICO, COLUNAS_NUMERICAS, carregar_dados
+
+COLUNAS_MULTIPLICATIVAS = ['Valor_Pecas', 'Valor_Mao_Obra', 'Tempo_Servico_Horas'] # Ruído proporcional ao valor
+# Desvio dentro do serviço quando o CSV não permite estimá-lo: log-desvio nas multiplicativas e
+# fração do desvio global nas demais (quilometragem e ano dependem mais do carro que do serviço)
+DISPERSAO_PADRAO = {'Valor_Pecas': 0.2, 'Valor_Mao_Obra': 0.2, 'Tempo_Servico_Horas': 0.2,
+                    'Quilometragem_Carro': 1.0, 'Ano_Fabricacao_Carro': 1.0}
+PESO_NOTAS_GLOBAIS = 1.0 # Pseudo-contagens da distribuição global somadas às notas de cada serviço
+VARIACAO_SERVICOS_EXTRAS = 0.25 # Log-desvio aplicado às médias de um perfil real para criar um serviço extra
+CONCENTRACAO_NOTAS_EXTRAS = 20.0 # Quanto as notas de um serviço extra ficam próximas das do perfil sorteado
+CASAS_DECIMAIS = {'Valor_Pecas': 2, 'Valor_Mao_Obra': 2, 'Quilometragem_Carro': 0, 'Ano_Fabricacao_Carro': 0}
+PASSO_HORAS = 0.5 # O CSV registra o tempo de serviço em meias horas
+TAMANHO_BLOCO_PADRAO = 1_000_000
+
+
+class GeradorOficina:
+    def __init__(self, servicos, pesos, medias, desvios, classes, probabilidades, limites):
+        self.servicos = list(servicos)
+        self.pesos = np.asarray(pesos, dtype=np.float64) / np.sum(pesos) # Frequência de cada serviço
+        self.medias = np.asarray(medias, dtype=np.float64) # n_servicos x 5, na ordem de COLUNAS_NUMERICAS
+        self.desvios = np.asarray(desvios, dtype=np.float64) # 5: log-desvio (multiplicativas) ou desvio absoluto
+        self.classes = np.asarray(classes)
+        self.probabilidades = np.asarray(probabilidades, dtype=np.float64) # n_servicos x n_classes
+        self.limites = np.asarray(limites, dtype=np.float64) # 2 x 5: mínimo e máximo observados de cada coluna
+
+    @classmethod
+    def ajustar(cls, dataframe):
+        # dataframe: CSV limpo (carregar_dados), com 'Servico', as cinco numéricas e Avaliacao_Cliente
+        grupos = dataframe.groupby(COLUNA_SERVICO, sort=False)
+        servicos = list(grupos.groups)
+        medias = grupos[COLUNAS_NUMERICAS].mean().loc[servicos].to_numpy(np.float64)
+        contagens = grupos.size().loc[servicos].to_numpy()
+
+        desvios = []
+        repetidos = dataframe[dataframe[COLUNA_SERVICO].map(grupos.size()) > 1]
+        for coluna in COLUNAS_NUMERICAS:
+            multiplicativa = coluna in COLUNAS_MULTIPLICATIVAS
+            if len(repetidos):
+                valores = np.log1p(repetidos[coluna]) if multiplicativa else repetidos[coluna]
+                desvios.append(float(valores.groupby(repetidos[COLUNA_SERVICO]).std().mean()))
+            else:
+                desvio_global = 1.0 if multiplicativa else float(dataframe[coluna].std())
+                desvios.append(DISPERSAO_PADRAO[coluna] * desvio_global)
+
+        classes = np.sort(dataframe[COLUNA_ALVO].unique())
+        notas = pd.crosstab(dataframe[COLUNA_SERVICO], dataframe[COLUNA_ALVO]).reindex(index=servicos, columns=classes,
+                                                                                        fill_value=0)
+        frequencia_global = notas.sum(axis=0).to_numpy(np.float64) / len(dataframe)
+        probabilidades = notas.to_numpy(np.float64) + PESO_NOTAS_GLOBAIS * frequencia_global
+        probabilidades /= probabilidades.sum(axis=1, keepdims=True)
+
+        limites = dataframe[COLUNAS_NUMERICAS].agg(['min', 'max']).to_numpy(np.float64)
+        return cls(servicos, contagens, medias, desvios, classes, probabilidades, limites)
+
+    @classmethod
+    def do_csv(cls, caminho=ARQUIVO_DADOS):
+        return cls.ajustar(carregar_dados(caminho))
+
+    def com_servicos(self, n_servicos, semente=1):
+        # Novo gerador com exatamente n_servicos categorias: os mais frequentes do CSV primeiro e,
+        # se faltar, variações de perfis reais sorteados pela frequência
+        n_reais = len(self.servicos)
+        ordem = np.argsort(-self.pesos, kind='stable')[:n_servicos]
+        servicos = [self.servicos[indice] for indice in ordem]
+        pesos, medias, probabilidades = self.pesos[ordem], self.medias[ordem], self.probabilidades[ordem]
+
+        n_extras = n_servicos - n_reais
+        if n_extras > 0:
+            gerador = np.random.default_rng(semente)
+            bases = gerador.choice(n_reais, n_extras, p=self.pesos)
+            variacao = np.ones((n_extras, len(COLUNAS_NUMERICAS)))
+            multiplicativas = [COLUNAS_NUMERICAS.index(coluna) for coluna in COLUNAS_MULTIPLICATIVAS]
+            variacao[:, multiplicativas] = gerador.lognormal(0.0, VARIACAO_SERVICOS_EXTRAS, (n_extras, len(multiplicativas)))
+            servicos += [f'Servico Sintetico {indice:05d}' for indice in range(1, n_extras + 1)]
+            pesos = np.concatenate([pesos, self.pesos[bases]])
+            medias = np.concatenate([medias, self.medias[bases] * variacao])
+            probabilidades = np.concatenate([probabilidades, np.vstack(
+                [gerador.dirichlet(self.probabilidades[base] * CONCENTRACAO_NOTAS_EXTRAS + 1e-3) for base in bases])])
+        return GeradorOficina(servicos, pesos, medias, self.desvios, self.classes, probabilidades, self.limites)
+
+    def gerar(self, n_linhas, semente=1):
+        gerador = np.random.default_rng(semente)
+        indices = gerador.choice(len(self.servicos), n_linhas, p=self.pesos)
+        colunas = {COLUNA_SERVICO: np.asarray(self.servicos, dtype=object)[indices]}
+        for posicao, coluna in enumerate(COLUNAS_NUMERICAS):
+            medias = self.medias[indices, posicao]
+            if coluna in COLUNAS_MULTIPLICATIVAS:
+                valores = medias * gerador.lognormal(-self.desvios[posicao] ** 2 / 2, self.desvios[posicao], n_linhas)
+            else:
+                valores = np.clip(medias + gerador.normal(0.0, self.desvios[posicao], n_linhas),
+                                  self.limites[0, posicao], self.limites[1, posicao])
+            if coluna == 'Tempo_Servico_Horas':
+                valores = np.maximum(np.round(valores / PASSO_HORAS) * PASSO_HORAS, PASSO_HORAS)
+            else:
+                valores = np.round(valores, CASAS_DECIMAIS[coluna])
+            colunas[coluna] = valores.astype(np.int64) if CASAS_DECIMAIS.get(coluna) == 0 else valores
+
+        # Nota: inverso da distribuição acumulada do serviço de cada linha
+        acumuladas = np.cumsum(self.probabilidades, axis=1)[indices]
+        sorteio = gerador.random(n_linhas)[:, None] * acumuladas[:, -1:]
+        colunas[COLUNA_ALVO] = self.classes[np.minimum((sorteio >= acumuladas).sum(axis=1), len(self.classes) - 1)]
+        return pd.DataFrame(colunas)
+
+    def escrever_csv(self, caminho, n_linhas, semente=1, tamanho_bloco=TAMANHO_BLOCO_PADRAO):
+        # Escreve em blocos (cada um com sua semente) para não montar o CSV inteiro na memória
+        for numero_bloco, inicio in enumerate(range(0, max(n_linhas, 1), tamanho_bloco)):
+            bloco = self.gerar(min(tamanho_bloco, n_linhas - inicio), semente=(semente, numero_bloco))
+            bloco.to_csv(caminho, mode='w' if inicio == 0 else 'a', header=inicio == 0, index=False)
+
+
+def gerar_csv(caminho, n_linhas, n_servicos=None, semente=1, caminho_base=ARQUIVO_DADOS):
+    gerador = GeradorOficina.do_csv(caminho_base)
+    if n_servicos is not None:
+        gerador = gerador.com_servicos(n_servicos, semente)
+    gerador.escrever_csv(caminho, n_linhas, semente)
+    return gerador
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Gera ordens de serviço sintéticas no esquema do oficina_Britt.csv.")
+    parser.add_argument('saida')
+    parser.add_argument('--linhas', type=int, default=100_000)
+    parser.add_argument('--servicos', type=int, default=None, help="Número de categorias de 'Servico' (padrão: as do CSV)")
+    parser.add_argument('--semente', type=int, default=1)
+    parser.add_argument('--dados-base', default=ARQUIVO_DADOS)
+    args = parser.parse_args(argumentos)
+
+    try:
+        gerador = gerar_csv(args.saida, args.linhas, args.servicos, args.semente, args.dados_base)
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.dados_base}' não foi encontrado.")
+        return 1
+    print(f"{args.linhas:,} linhas com {len(gerador.servicos)} serviços gravadas em '{args.saida}'.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
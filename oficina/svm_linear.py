@@ -0,0 +1,77 @@
+# Modo compilado do SVM de kernel linear: a média e a escala do StandardScaler são embutidas nos pesos
+# de cada par do um-contra-um (one-vs-one) e nos interceptos. A previsão vira uma multiplicação das cinco colunas
+# numéricas pelos pesos, mais a linha de pesos do serviço (a única coluna one-hot ligada), seguida da mesma
+# votação entre pares que a libsvm faz no SVC.predict.
+import numpy as np
+
+
+class SVMLinearCompilado:
+    def __init__(self, modelo_svm, codificador):
+        # modelo_svm: SVC(kernel='linear') treinado; codificador: CodificadorOficina com o escalonador embutido
+        if getattr(modelo_svm, 'kernel', None) != 'linear':
+            raise ValueError("O modo compilado só vale para SVC com kernel='linear'.")
+        coeficientes = modelo_svm.coef_
+        coeficientes = coeficientes.toarray() if hasattr(coeficientes, 'toarray') else np.asarray(coeficientes)
+
+        # decisão = sum(w * (x - media) / escala) + b = sum((w / escala) * x) + (b - sum(w * media / escala))
+        pesos = coeficientes / codificador.escala
+        interceptos = np.asarray(modelo_svm.intercept_) - pesos @ codificador.media
+
+        self.classes = np.asarray(modelo_svm.classes_)
+        self.pesos_numericos = np.ascontiguousarray(pesos[:, codificador.indices_numericos].T) # 5 x n_pares
+        self.indice_servico = {servico: posicao for posicao, servico in enumerate(codificador.indice_servico)}
+        # Uma linha de pesos por serviço e uma linha de zeros no fim para serviços desconhecidos (one-hot todo desligado)
+        self.pesos_servico = np.zeros((len(self.indice_servico) + 1, len(interceptos)))
+        self.pesos_servico[:-1] = pesos[:, list(codificador.indice_servico.values())].T
+        self.pesos_servico[:-1] += interceptos
+        self.pesos_servico[-1] = interceptos
+        self.indice_desconhecido = len(self.indice_servico)
+
+        # Votação: o par (i, j), na ordem da libsvm, vota em i se a decisão for > 0 e em j caso contrário.
+        # No caso binário o sklearn inverte o sinal da decisão, então o voto positivo vai para a segunda classe.
+        n_classes = len(self.classes)
+        pares = [(i, j) for i in range(n_classes) for j in range(i + 1, n_classes)]
+        if n_classes == 2:
+            pares = [(1, 0)]
+        self.votos_positivos = np.zeros((len(pares), n_classes))
+        self.votos_negativos = np.zeros((len(pares), n_classes))
+        for indice_par, (classe_i, classe_j) in enumerate(pares):
+            self.votos_positivos[indice_par, classe_i] = 1
+            self.votos_negativos[indice_par, classe_j] = 1
+
+    def novo_buffer(self, n_linhas=1):
+        # Buffer das decisões de cada par (n_linhas x n_pares)
+        return np.empty((n_linhas, self.pesos_numericos.shape[1]))
+
+    def decisoes(self, servicos, valores_numericos, buffer=None):
+        valores_numericos = np.asarray(valores_numericos, dtype=np.float64)
+        n_linhas = len(valores_numericos)
+        decisoes = np.matmul(valores_numericos, self.pesos_numericos,
+                             out=None if buffer is None else buffer[:n_linhas])
+        indices_servico = np.fromiter((self.indice_servico.get(servico, self.indice_desconhecido) for servico in servicos),
+                                      dtype=np.intp, count=n_linhas)
+        decisoes += self.pesos_servico[indices_servico]
+        return decisoes
+
+    def prever(self, servicos, valores_numericos, buffer=None):
+        positivas = self.decisoes(servicos, valores_numericos, buffer) > 0
+        votos = positivas @ self.votos_positivos + (~positivas) @ self.votos_negativos
+        return self.classes[np.argmax(votos, axis=1)] # Empate: vence a primeira classe, como na libsvm
+
+    def prever_linha(self, servico, valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao):
+        numericos = np.array((valor_pecas, valor_mao_obra, tempo_horas, quilometragem, ano_fabricacao), dtype=np.float64)
+        positivas = numericos @ self.pesos_numericos + self.pesos_servico[self.indice_servico.get(servico, self.indice_desconhecido)] > 0
+        votos = positivas @ self.votos_positivos + (~positivas) @ self.votos_negativos
+        return self.classes[np.argmax(votos)]
+
+    def divergencias(self, modelo_svm, codificador, servicos, valores_numericos):
+        # Número de linhas em que o modo compilado discorda do SVC.predict (esperado: 0)
+        esperado = modelo_svm.predict(codificador.codificar(servicos, valores_numericos))
+        return int(np.sum(self.prever(servicos, valores_numericos) != esperado))
+
+
+def compilar_se_linear(modelo_svm, codificador):
+    # Retorna o SVMLinearCompilado quando o kernel é linear; caso contrário None (use o predict do sklearn)
+    if getattr(modelo_svm, 'kernel', None) != 'linear':
+        return None
+    return SVMLinearCompilado(modelo_svm, codificador)
@@ -0,0 +1,151 @@
+# Treino fora da memória (out-of-core) para históricos muito maiores que o oficina_Britt.csv.
+# O CSV é lido em blocos e nunca inteiro:
+#   1ª passada: vocabulário completo de 'Servico' e classes de Avaliacao_Cliente
+#   2ª passada: StandardScaler.partial_fit sobre os blocos codificados
+#   3ª passada em diante (épocas): SGDClassifier(loss='hinge').partial_fit, um SVM linear incremental
+# As linhas de teste ficam fora de todas as passadas de treino e medem a acurácia ao final; assim o lote, o
+# relatório e a atualização incremental não avaliam o modelo em linhas que ele já viu. Em um CSV de até
+# dados.LIMITE_DIVISAO_EXATA linhas são as do teste da divisão do menu (dados.mascara_teste, um byte por linha);
+# em um maior, as de dados.sorteio_teste, calculadas bloco a bloco a partir do índice da linha (~30% das linhas,
+# sem memória proporcional ao CSV e sem repetir a divisão do menu, que nem carregaria um arquivo desse tamanho).
+# O resultado é salvo como artefato no mesmo formato do SVM (modelo, escalonador, colunas, serviços),
+# então serve pelo mesmo caminho de previsão do menu: CodificadorOficina.do_artefato + predict.
+#
+# Uso: python -m oficina.treino_em_blocos historico.csv [--tamanho-bloco 100000] [--epocas 5]
+import argparse
+import resource
+import sys
+import time
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from oficina.dados import (ARQUIVO_DADOS, COLUNA_ALVO, COLUNA_SERVICO, COLUNAS_NUMERICAS, LIMITE_DIVISAO_EXATA,
+                           ler_blocos, mascara_teste, sorteio_teste)
+from oficina.codificador import CodificadorOficina
+from oficina.artefatos import obter_artefato, montar_artefato
+
+TAMANHO_BLOCO_PADRAO = 100_000
+PARAMETROS_SGD = {'loss': 'hinge', 'alpha': 1e-4, 'random_state': 1}
+EPOCAS_PADRAO = 5
+
+
+def pico_memoria_mb():
+    # ru_maxrss vem em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class TreinoEmBlocos:
+    def __init__(self, caminho, tamanho_bloco=TAMANHO_BLOCO_PADRAO, epocas=EPOCAS_PADRAO, parametros=None):
+        self.caminho = caminho
+        self.tamanho_bloco = tamanho_bloco
+        self.epocas = epocas
+        self.teste = None # Máscara da divisão do menu, montada depois da 1ª passada (que conta as linhas) se couber
+        self.parametros = PARAMETROS_SGD if parametros is None else parametros
+        self.relatorio = [] # (etapa, linhas, segundos)
+
+    def _registrar(self, etapa, linhas, inicio):
+        segundos = time.perf_counter() - inicio
+        self.relatorio.append((etapa, linhas, segundos))
+        print(f"  {etapa:<24} {linhas:>12,} linhas  {segundos:8.2f} s  {linhas / max(segundos, 1e-9):>12,.0f} linhas/s"
+              f"  pico {pico_memoria_mb():8.1f} MB", flush=True)
+
+    def aprender_vocabulario(self):
+        inicio = time.perf_counter()
+        servicos, classes, total_linhas = set(), set(), 0
+        for posicao, bloco in ler_blocos(self.caminho, self.tamanho_bloco, [COLUNA_SERVICO, COLUNA_ALVO]):
+            servicos.update(bloco[COLUNA_SERVICO].unique())
+            classes.update(bloco[COLUNA_ALVO].unique().tolist())
+            total_linhas += len(bloco)
+        self._registrar('vocabulário', total_linhas, inicio)
+        # Mesmo layout do pd.get_dummies: numéricas na ordem do CSV e depois os serviços em ordem alfabética
+        colunas = COLUNAS_NUMERICAS + [f'{COLUNA_SERVICO}_{servico}' for servico in sorted(servicos)]
+        return CodificadorOficina(colunas), np.array(sorted(classes)), sorted(servicos), total_linhas
+
+    def mascara_bloco(self, posicao, n_linhas):
+        if self.teste is None:
+            return sorteio_teste(posicao, n_linhas)
+        return self.teste[posicao:posicao + n_linhas]
+
+    def ajustar_escalonador(self, codificador, buffer):
+        inicio = time.perf_counter()
+        escalonador, total_linhas = StandardScaler(), 0
+        for posicao, bloco in ler_blocos(self.caminho, self.tamanho_bloco):
+            treino = ~self.mascara_bloco(posicao, len(bloco))
+            escalonador.partial_fit(codificador.codificar_dataframe(bloco, buffer)[treino])
+            total_linhas += int(treino.sum())
+        self._registrar('escalonador', total_linhas, inicio)
+        return escalonador
+
+    def treinar_modelo(self, codificador_escalonado, classes, buffer):
+        modelo = SGDClassifier(**self.parametros)
+        gerador = np.random.default_rng(1)
+        for epoca in range(self.epocas):
+            inicio, total_linhas = time.perf_counter(), 0
+            for posicao, bloco in ler_blocos(self.caminho, self.tamanho_bloco):
+                treino = np.flatnonzero(~self.mascara_bloco(posicao, len(bloco)))
+                gerador.shuffle(treino) # O histórico costuma vir ordenado; embaralha dentro do bloco
+                X_bloco = codificador_escalonado.codificar_dataframe(bloco, buffer)
+                modelo.partial_fit(X_bloco[treino], bloco[COLUNA_ALVO].to_numpy()[treino], classes=classes)
+                total_linhas += len(treino)
+            self._registrar(f'época {epoca + 1}/{self.epocas}', total_linhas, inicio)
+        return modelo
+
+    def avaliar(self, modelo, codificador_escalonado, buffer):
+        inicio, acertos, total_linhas = time.perf_counter(), 0, 0
+        for posicao, bloco in ler_blocos(self.caminho, self.tamanho_bloco):
+            teste = self.mascara_bloco(posicao, len(bloco))
+            if not teste.any():
+                continue
+            previsoes = modelo.predict(codificador_escalonado.codificar_dataframe(bloco, buffer)[teste])
+            acertos += int(np.sum(previsoes == bloco[COLUNA_ALVO].to_numpy()[teste]))
+            total_linhas += int(teste.sum())
+        self._registrar('teste', total_linhas, inicio)
+        return acertos / total_linhas if total_linhas else None
+
+    def treinar(self):
+        # Retorna o artefato (mesmo formato de artefatos.obter_svm) com o modelo incremental
+        codificador, classes, servicos, total_linhas = self.aprender_vocabulario()
+        self.teste = mascara_teste(total_linhas) if total_linhas <= LIMITE_DIVISAO_EXATA else None
+        buffer = codificador.novo_buffer(self.tamanho_bloco) # Único buffer de codificação, reutilizado por todos os blocos
+        escalonador = self.ajustar_escalonador(codificador, buffer)
+        codificador_escalonado = codificador.com_escalonador(escalonador)
+        modelo = self.treinar_modelo(codificador_escalonado, classes, buffer)
+        acuracia = self.avaliar(modelo, codificador_escalonado, buffer)
+        if acuracia is not None:
+            print(f"Acurácia no teste ({'divisão do menu' if self.teste is not None else 'sorteio por linha'}): "
+                  f"{acuracia * 100:.2f}%")
+        artefato = montar_artefato(modelo, codificador.colunas, servicos, escalonador)
+        artefato['acuracia_teste'] = acuracia # Referência da detecção de deriva (oficina/atualizacao_incremental.py)
+        return artefato
+
+
+def obter_svm_incremental(caminho_dados=ARQUIVO_DADOS, tamanho_bloco=TAMANHO_BLOCO_PADRAO, epocas=EPOCAS_PADRAO):
+    # Artefato 'svm_incremental' do CSV; só treina de novo se o CSV ou a configuração mudar
+    configuracao = {'parametros': PARAMETROS_SGD, 'epocas': epocas,
+                    'teste': {'divisao_menu_ate': LIMITE_DIVISAO_EXATA, 'acima': 'sorteio_splitmix64'}}
+    return obter_artefato('svm_incremental', configuracao,
+                          TreinoEmBlocos(caminho_dados, tamanho_bloco, epocas).treinar, caminho_dados)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Treina um SVM linear incremental lendo o CSV em blocos.")
+    parser.add_argument('dados', nargs='?', default=ARQUIVO_DADOS)
+    parser.add_argument('--tamanho-bloco', type=int, default=TAMANHO_BLOCO_PADRAO)
+    parser.add_argument('--epocas', type=int, default=EPOCAS_PADRAO)
+    args = parser.parse_args(argumentos)
+
+    inicio = time.perf_counter()
+    try:
+        artefato = obter_svm_incremental(args.dados, args.tamanho_bloco, args.epocas)
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.dados}' não foi encontrado.")
+        return 1
+    print(f"Artefato 'svm_incremental' ({len(artefato['servicos'])} serviços) pronto em "
+          f"{time.perf_counter() - inicio:.2f} s; pico de memória do processo: {pico_memoria_mb():.1f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+# Treino em segundo plano: cada modelo é treinado (ou só conferido, se o artefato já existir) em um processo
+# próprio, todos ao mesmo tempo, logo que o programa abre. O processo filho grava o artefato em modelos_salvos/
+# e termina; quem está no menu continua usando o que já está pronto e, ao escolher um modelo, só carrega o
+# artefato do disco. Um treino que ninguém vai usar pode ser cancelado (o processo filho é encerrado).
+# Os filhos são iniciados com "python -m oficina.treino_segundo_plano", e não com multiprocessing, para não
+# reexecutar o script do menu (que não tem a guarda if __name__ == '__main__') dentro deles, e em uma sessão
+# (no Windows, um grupo de processos) própria: o Ctrl+C do terminal chega só ao menu e não mata o treino. Os
+# filhos só são encerrados pelo cancelar() e, na saída do programa, pelo encerrar().
+#
+# Uso (o que cada processo filho roda): python -m oficina.treino_segundo_plano arvore [--dados-treino oficina_Britt.csv]
+import argparse
+import atexit
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from oficina.dados import ARQUIVO_DADOS
+from oficina.artefatos import MODELOS_PADRAO, MODELOS_SERVIDOS, carregar_modelos
+
+TREINANDO, PRONTO, FALHOU, CANCELADO = 'treinando', 'pronto', 'falhou', 'cancelado'
+INTERVALO_CONSULTA = 0.2 # Segundos entre duas consultas ao processo filho enquanto se espera por ele
+# Fora do grupo de processos do terminal, para o SIGINT do Ctrl+C não chegar ao filho
+SEPARAR_DO_TERMINAL = ({'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP} if os.name == 'nt'
+                       else {'start_new_session': True})
+
+
+class TarefaTreino:
+    def __init__(self, nome_modelo, caminho_dados=ARQUIVO_DADOS):
+        self.nome_modelo = nome_modelo
+        self.caminho_dados = caminho_dados
+        self.processo = None
+        self.saida_erros = None
+        self.cancelada = False
+        self.inicio = None
+        self.fim = None
+        self.erro = None
+
+    def iniciar(self):
+        self.saida_erros = tempfile.TemporaryFile() # Arquivo e não PIPE: um stderr longo não trava o filho
+        self.inicio = time.perf_counter()
+        self.processo = subprocess.Popen([sys.executable, '-m', 'oficina.treino_segundo_plano', self.nome_modelo,
+                                          '--dados-treino', self.caminho_dados],
+                                         stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=self.saida_erros,
+                                         **SEPARAR_DO_TERMINAL)
+        threading.Thread(target=self._vigiar, daemon=True).start()
+
+    def _vigiar(self):
+        # Marca o fim assim que o filho termina, e não só na próxima vez que o menu perguntar
+        self.processo.wait()
+        self.fim = time.perf_counter()
+
+    def situacao(self):
+        if self.processo is None:
+            return CANCELADO if self.cancelada else TREINANDO
+        codigo = self.processo.poll()
+        if codigo is None:
+            return TREINANDO
+        if not self.saida_erros.closed:
+            if codigo != 0 and not self.cancelada:
+                self.saida_erros.seek(0)
+                linhas_erro = self.saida_erros.read().decode('utf-8', 'replace').strip().splitlines()
+                self.erro = linhas_erro[-1] if linhas_erro else f"código {codigo}"
+            self.saida_erros.close()
+        if self.cancelada:
+            return CANCELADO
+        return PRONTO if codigo == 0 else FALHOU
+
+    def segundos(self):
+        if self.inicio is None:
+            return 0.0
+        return (self.fim or time.perf_counter()) - self.inicio
+
+    def aguardar(self):
+        # Espera o filho terminar; Ctrl+C interrompe só a espera (o filho está em outra sessão e continua)
+        while self.situacao() == TREINANDO:
+            time.sleep(INTERVALO_CONSULTA)
+        return self.situacao()
+
+    def cancelar(self):
+        if self.situacao() != TREINANDO:
+            return False
+        self.cancelada = True
+        self.processo.terminate()
+        self.processo.wait()
+        self.situacao()
+        return True
+
+
+class TreinoSegundoPlano:
+    # Um TarefaTreino por modelo, iniciados juntos; os filhos que ainda estiverem rodando são encerrados
+    # quando o programa termina
+    def __init__(self, nomes=MODELOS_PADRAO, caminho_dados=ARQUIVO_DADOS):
+        self.tarefas = {nome: TarefaTreino(nome, caminho_dados) for nome in nomes}
+
+    def iniciar(self):
+        for tarefa in self.tarefas.values():
+            tarefa.iniciar()
+        atexit.register(self.encerrar)
+        return self
+
+    def situacao(self, nome_modelo):
+        return self.tarefas[nome_modelo].situacao()
+
+    def aguardar(self, nome_modelo):
+        return self.tarefas[nome_modelo].aguardar()
+
+    def cancelar(self, nome_modelo):
+        return self.tarefas[nome_modelo].cancelar()
+
+    def em_andamento(self):
+        return [nome for nome, tarefa in self.tarefas.items() if tarefa.situacao() == TREINANDO]
+
+    def resumo(self, rotulos=None):
+        # Ex.: "Árvore de Decisão: pronto (1.2 s) | SVM: treinando (8.4 s)"
+        partes = []
+        for nome, tarefa in self.tarefas.items():
+            situacao = tarefa.situacao()
+            texto = f"{(rotulos or {}).get(nome, nome)}: {situacao}"
+            if situacao in (TREINANDO, PRONTO):
+                texto += f" ({tarefa.segundos():.1f} s)"
+            elif situacao == FALHOU:
+                texto += f" ({tarefa.erro})"
+            partes.append(texto)
+        return ' | '.join(partes)
+
+    def encerrar(self):
+        for tarefa in self.tarefas.values():
+            tarefa.cancelar()
+
+
+def main(argumentos=None):
+    # Processo filho: treina (ou confere) o artefato do modelo com a mesma codificação e divisão do menu
+    parser = argparse.ArgumentParser(description="Treina o artefato de um modelo (usado pelo treino em segundo plano).")
+    parser.add_argument('modelo', choices=MODELOS_SERVIDOS)
+    parser.add_argument('--dados-treino', default=ARQUIVO_DADOS)
+    args = parser.parse_args(argumentos)
+
+    try:
+        carregar_modelos(args.dados_treino, [args.modelo])
+    except FileNotFoundError:
+        print(f"Erro: O arquivo '{args.dados_treino}' não foi encontrado.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,44 +1,51 @@
-import pandas as pd
-from sklearn import tree # Módulo para árvores de decisão
+import numpy as np
 from sklearn.metrics import accuracy_score # Métrica de acurácia
 from sklearn.model_selection import train_test_split # Função para dividir os dados
-import matplotlib.pyplot as plt # Para plotar a árvore
-from sklearn.tree import plot_tree # Função para plotar a árvore
+from oficina.cache_binario import carregar_dados_codificados # CSV já limpo e codificado, mapeado do disco
+from oficina.artefatos import obter_pipeline # Modelos salvos em disco (só treina se o CSV ou a configuração mudar)
+from oficina.pipeline import PipelineOficina, matriz_bruta # One-hot + Árvore em um único Pipeline
+from oficina.relatorio import DIRETORIO_RELATORIO, PROFUNDIDADE_FIGURA, PROFUNDIDADE_TEXTO, salvar_arvore # Árvore em PNG/texto
+from oficina.instrumentacao import configurar, etapa # Métricas por etapa (--metricas ou OFICINA_METRICAS)
 
-# 1. Leitura dos dados
+configurar() # Liga as métricas/perfil se pedido na linha de comando ou no ambiente
+
+# 1. Leitura dos dados (cache binário ao lado do CSV, montado na primeira execução ou quando o CSV muda)
 try:
-    dados = pd.read_csv('oficina_Britt.csv')
+    dados = carregar_dados_codificados('oficina_Britt.csv')
 except FileNotFoundError:
     print("Erro: O arquivo 'oficina_Britt.csv' não foi encontrado. Verifique o caminho.")
     exit()
 
-dados.columns = dados.columns.str.strip() # Remove espaços dos nomes das colunas
-
-# 2. Definição da variável alvo (alvo) e das features (features_originais) antes do pré-processamento
-alvo = dados['Avaliacao_Cliente'] #Define a variável Y(Alvo)
-features_originais = dados.drop('Avaliacao_Cliente', axis=1) # Dropa todos
+# 2. Definição da variável alvo (alvo)
+alvo = dados.y_alvo #Define a variável Y(Alvo)
 
-# 3. Aplicação do pd.get_dummies na feature categórica 'Servico'
-features_processadas = pd.get_dummies(features_originais, columns=['Servico'], prefix='Servico', dtype=int)
+# 3. Só os índices das linhas do cache são divididos; o Pipeline recebe as seis colunas brutas
+# ('Servico' + numéricas) e faz ele mesmo o one-hot de 'Servico' (ColumnTransformer), sem get_dummies
 
 # 4. Definição dos dados de treinamento e de teste (COM STRATIFY)
-X_treino, X_teste, alvo_treino, alvo_teste = train_test_split(
-    features_processadas, alvo, test_size=0.3, random_state=1)
-
-# 5. Aprendizado do modelo de Árvore de Decisão
-modelo_arvore = tree.DecisionTreeClassifier()
-modelo_arvore.fit(X_treino, alvo_treino)
+with etapa('train_test_split', len(dados)):
+    indices_treino, indices_teste, alvo_treino, alvo_teste = train_test_split(
+        np.arange(len(dados)), alvo, test_size=0.3, random_state=1)
+X_treino_bruto = matriz_bruta(*dados.linhas_brutas(indices_treino))
+servicos_teste, numericos_teste = dados.linhas_brutas(indices_teste) # Também conferem a previsão compilada
+X_teste_bruto = matriz_bruta(servicos_teste, numericos_teste)
+
+# 5. Aprendizado do Pipeline da Árvore de Decisão (ou carregamento do pipeline já treinado com este CSV)
+pipeline_arvore = PipelineOficina(obter_pipeline('arvore', X_treino_bruto, alvo_treino, dados.servicos)['modelo'],
+                                  servicos_teste, numericos_teste)
+modelo_arvore = pipeline_arvore.pipeline['modelo'] # A árvore em si, para a visualização
 
 # 6. Mostrar desempenho em PORCENTAGEM
-previsoes_no_teste = modelo_arvore.predict(X_teste)
+with etapa('predict_arvore', len(X_teste_bruto)):
+    previsoes_no_teste = pipeline_arvore.predict(X_teste_bruto)
 print(f"Acurácia do modelo: {accuracy_score(alvo_teste, previsoes_no_teste):.2f}")
 print("-" * 30)
 
 # 7. Mostrar classificação para uma nova entrada do usuário
 print("\n--- Previsão para Nova Entrada ---")
 try:
-    servicos_disponiveis = features_originais['Servico'].unique()
-    if servicos_disponiveis.size > 0:
+    servicos_disponiveis = dados.servicos
+    if servicos_disponiveis:
         servico_usuario = input(f"Digite o tipo de Serviço (ex: {servicos_disponiveis[0]}, disponíveis: {', '.join(servicos_disponiveis)}): ")
     else:
         servico_usuario = input("Digite o tipo de Serviço: ")
@@ -49,16 +56,10 @@ try:
     km_usuario = float(input("Digite a quilometragem do carro (ex.: 85000): "))
     ano_usuario = int(input("Digite o ano de fabricação do carro (ex.: 2018): "))
 
-    nova_entrada_df = pd.DataFrame([[
-        servico_usuario, pecas_usuario, mao_obra_usuario,
-        tempo_usuario, km_usuario, ano_usuario
-    ]], columns=features_originais.columns)
-
-    nova_entrada_processada_df = pd.get_dummies(nova_entrada_df, columns=['Servico'], prefix='Servico', dtype=int)
-    nova_entrada_reindexada_df = nova_entrada_processada_df.reindex(columns=X_treino.columns, fill_value=0)
-
-    resultado_previsao = modelo_arvore.predict(nova_entrada_reindexada_df)
-    print(f"\nPrevisão da Avaliação do Cliente para a nova entrada: {resultado_previsao[0]}")
+    with etapa('predict_arvore_linha', 1):
+        resultado_previsao = pipeline_arvore.prever_linha(
+            servico_usuario, pecas_usuario, mao_obra_usuario, tempo_usuario, km_usuario, ano_usuario)
+    print(f"\nPrevisão da Avaliação do Cliente para a nova entrada: {resultado_previsao}")
 
 except ValueError:
     print("\nErro: Entrada inválida. Por favor, verifique os tipos de dados e tente novamente.")
@@ -68,19 +69,13 @@ except Exception as e:
 # 8. Visualização da Árvore de Decisão
 print("\n--- Visualização da Árvore de Decisão ---")
 try:
-    feature_names = features_processadas.columns.tolist()
-    class_names = sorted([str(c) for c in alvo.unique()])
+    feature_names = pipeline_arvore.nomes_features() # Numéricas brutas: limiares em reais, horas, km e anos
 
-    plt.figure(figsize=(20,10))
-    plot_tree(modelo_arvore,
-              feature_names=feature_names,
-              class_names=class_names,
-              filled=True,
-              rounded=True,
-              proportion=False,
-              fontsize=7)
-    plt.title("Árvore de Decisão Treinada")
-    plt.show()
+    # PNG limitado em profundidade e texto, sem plt.show(): a janela travava o script com árvores grandes
+    caminho_png, caminho_txt = salvar_arvore(modelo_arvore, feature_names, DIRETORIO_RELATORIO)
+    print(f"Árvore com profundidade {modelo_arvore.get_depth()} e {modelo_arvore.get_n_leaves()} folhas.")
+    print(f"Figura (até a profundidade {PROFUNDIDADE_FIGURA}): {caminho_png}")
+    print(f"Texto (até a profundidade {PROFUNDIDADE_TEXTO}): {caminho_txt}")
 
 except Exception as e:
     print(f"\nOcorreu um erro ao tentar visualizar a árvore: {e}")